@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Schema 013: Background Textbook Processing
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Progress and error tracking for textbooks processed by the
+--              async-jobs worker instead of inside the upload request
+-- Dependencies: Schema 007 (content capture)
+-- ============================================================================
+
+ALTER TABLE textbook_downloads ADD COLUMN IF NOT EXISTS pages_processed INTEGER DEFAULT 0;
+ALTER TABLE textbook_downloads ADD COLUMN IF NOT EXISTS error_message TEXT;
+
+-- Worker startup scans for books left mid-flight by a crashed worker
+CREATE INDEX IF NOT EXISTS idx_textbooks_processing
+    ON textbook_downloads(id) WHERE embedding_status = 'processing';
+
+-- ============================================================================
+-- End of Schema 013
+-- ============================================================================
@@ -0,0 +1,22 @@
+-- ============================================================================
+-- Schema 014: Conversation Rolling Summary
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Rolling summary of older chat turns so each turn only loads a
+--              bounded tail of recent messages
+-- Dependencies: Schema 005 (interactions)
+-- ============================================================================
+
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary TEXT;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary_message_id INTEGER;
+
+-- Tail query: newest N messages of a conversation
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_tail
+    ON messages(conversation_id, id DESC);
+
+COMMENT ON COLUMN conversations.summary IS 'Rolling summary of turns older than the history window';
+COMMENT ON COLUMN conversations.summary_message_id IS 'ID of the last message folded into summary';
+
+-- ============================================================================
+-- End of Schema 014
+-- ============================================================================
@@ -0,0 +1,32 @@
+-- ============================================================================
+-- Schema 015: Conversation Message Counter
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Denormalized message count so the conversation list is a single
+--              indexed query instead of one COUNT(*) per conversation
+-- Dependencies: Schema 005 (interactions)
+-- ============================================================================
+
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS message_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill existing conversations
+UPDATE conversations c
+SET message_count = counts.total
+FROM (
+    SELECT conversation_id, COUNT(*) AS total
+    FROM messages
+    GROUP BY conversation_id
+) counts
+WHERE counts.conversation_id = c.id;
+
+-- Keyset pagination on (updated_at, id)
+CREATE INDEX IF NOT EXISTS idx_conversations_user_keyset
+    ON conversations(user_id, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_keyset
+    ON conversations(updated_at DESC, id DESC);
+
+COMMENT ON COLUMN conversations.message_count IS 'Number of messages, maintained by the llm-agent service on insert';
+
+-- ============================================================================
+-- End of Schema 015
+-- ============================================================================
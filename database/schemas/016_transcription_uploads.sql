@@ -0,0 +1,31 @@
+-- ============================================================================
+-- Schema 016: Resumable Multi-Part Transcription Uploads
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Upload state for audio sent in parts, so transcription can start
+--              as soon as the first part is stored and clients can resume
+-- Dependencies: Schema 002 (transcription)
+-- ============================================================================
+
+ALTER TABLE transcription_jobs ADD COLUMN IF NOT EXISTS upload_status VARCHAR(20) NOT NULL DEFAULT 'complete';
+ALTER TABLE transcription_jobs ADD COLUMN IF NOT EXISTS upload_parts INTEGER;
+ALTER TABLE transcription_jobs ADD COLUMN IF NOT EXISTS language VARCHAR(10);
+ALTER TABLE transcription_jobs ADD COLUMN IF NOT EXISTS queued_at TIMESTAMP;
+
+-- Parts received so far (one self-contained audio segment each)
+CREATE TABLE IF NOT EXISTS transcription_upload_parts (
+    job_id INTEGER NOT NULL REFERENCES transcription_jobs(id) ON DELETE CASCADE,
+    part_number INTEGER NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job_id, part_number)
+);
+
+COMMENT ON TABLE transcription_upload_parts IS 'Durable parts of multi-part audio uploads';
+COMMENT ON COLUMN transcription_jobs.upload_status IS 'Upload state: uploading, complete';
+COMMENT ON COLUMN transcription_jobs.upload_parts IS 'Total parts, set when the upload is completed';
+COMMENT ON COLUMN transcription_jobs.queued_at IS 'When the job was handed to the worker';
+
+-- ============================================================================
+-- End of Schema 016
+-- ============================================================================
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- Schema 017: Incremental Transcription Segments
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Timestamped transcript segments written as they are decoded, so
+--              long recordings are viewable and searchable mid-transcription
+-- Dependencies: Schema 002 (transcription), Schema 016 (uploads)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS transcription_segments (
+    id SERIAL PRIMARY KEY,
+    job_id INTEGER NOT NULL REFERENCES transcription_jobs(id) ON DELETE CASCADE,
+    segment_index INTEGER NOT NULL,
+    start_time FLOAT NOT NULL,
+    end_time FLOAT NOT NULL,
+    text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_transcription_segments_job_index UNIQUE (job_id, segment_index)
+);
+
+ALTER TABLE transcription_jobs ADD COLUMN IF NOT EXISTS vad_filter BOOLEAN DEFAULT FALSE;
+
+COMMENT ON TABLE transcription_segments IS 'Timestamped transcript segments, stored while transcription runs';
+COMMENT ON COLUMN transcription_segments.start_time IS 'Seconds from the start of the recording';
+COMMENT ON COLUMN transcription_jobs.vad_filter IS 'Skip silence (voice activity detection) while transcribing';
+
+-- ============================================================================
+-- End of Schema 017
+-- ============================================================================
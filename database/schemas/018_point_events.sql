@@ -0,0 +1,59 @@
+-- ============================================================================
+-- Schema 018: Point Award Events
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Idempotency key for point awards applied from the Redis event
+--              stream, and a shared level function for batched updates
+-- Dependencies: Schema 010 (gamification)
+-- ============================================================================
+
+-- Stream events are delivered at least once; the key makes re-applying one a no-op
+ALTER TABLE point_transactions ADD COLUMN IF NOT EXISTS event_key VARCHAR(200);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_event_key ON point_transactions(event_key);
+
+-- Level thresholds, shared by award_points() and the batch consumer
+CREATE OR REPLACE FUNCTION points_level(p_total_points INTEGER) RETURNS INTEGER AS $$
+    SELECT CASE
+        WHEN p_total_points >= 10000 THEN 10
+        WHEN p_total_points >= 5000 THEN 9
+        WHEN p_total_points >= 2500 THEN 8
+        WHEN p_total_points >= 1000 THEN 7
+        WHEN p_total_points >= 500 THEN 6
+        WHEN p_total_points >= 250 THEN 5
+        WHEN p_total_points >= 100 THEN 4
+        WHEN p_total_points >= 50 THEN 3
+        WHEN p_total_points >= 20 THEN 2
+        ELSE 1
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION award_points(
+    p_user_id INTEGER,
+    p_points INTEGER,
+    p_reason VARCHAR(100),
+    p_reference_type VARCHAR(50) DEFAULT NULL,
+    p_reference_id INTEGER DEFAULT NULL
+) RETURNS void AS $$
+BEGIN
+    -- Insert transaction
+    INSERT INTO point_transactions (user_id, points_change, reason, reference_type, reference_id)
+    VALUES (p_user_id, p_points, p_reason, p_reference_type, p_reference_id);
+    
+    -- Update user points and level
+    INSERT INTO user_points (user_id, total_points, level, last_activity_date)
+    VALUES (p_user_id, p_points, points_level(p_points), CURRENT_DATE)
+    ON CONFLICT (user_id) DO UPDATE
+    SET total_points = user_points.total_points + p_points,
+        level = points_level(user_points.total_points + p_points),
+        last_activity_date = CURRENT_DATE,
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON COLUMN point_transactions.event_key IS 'Idempotency key of the stream event that produced this transaction';
+COMMENT ON FUNCTION points_level IS 'Level for a point total';
+
+-- ============================================================================
+-- End of Schema 018
+-- ============================================================================
@@ -0,0 +1,51 @@
+-- ============================================================================
+-- Schema 019: Study Analytics Rollups
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Per-user, per-class, per-day aggregates kept up to date as
+--              sessions end and activities are logged, so stats endpoints
+--              never scan a user's full session history
+-- Dependencies: Schema 011 (study analytics)
+-- ============================================================================
+
+-- class_key is the session's class_id, or 0 for sessions without a class
+CREATE TABLE IF NOT EXISTS study_rollups_daily (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    class_key INTEGER NOT NULL DEFAULT 0,
+    day DATE NOT NULL,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    study_minutes INTEGER NOT NULL DEFAULT 0,
+    activities INTEGER NOT NULL DEFAULT 0,
+    items_completed INTEGER NOT NULL DEFAULT 0,
+    items_correct INTEGER NOT NULL DEFAULT 0,
+    activity_points INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (user_id, class_key, day)
+);
+
+-- All-time totals per user and class (one row read for list stats)
+CREATE TABLE IF NOT EXISTS study_rollups_total (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    class_key INTEGER NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    study_minutes INTEGER NOT NULL DEFAULT 0,
+    activities INTEGER NOT NULL DEFAULT 0,
+    items_completed INTEGER NOT NULL DEFAULT 0,
+    items_correct INTEGER NOT NULL DEFAULT 0,
+    activity_points INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (user_id, class_key)
+);
+
+-- Backfill and rebuild lookups
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_start ON study_sessions(user_id, start_time);
+
+COMMENT ON TABLE study_rollups_daily IS 'Per-user, per-class, per-day study aggregates (sessions by start day, activities by log day)';
+COMMENT ON TABLE study_rollups_total IS 'All-time study aggregates per user and class';
+COMMENT ON COLUMN study_rollups_daily.class_key IS 'Class ID, or 0 for sessions without a class';
+
+-- Populate existing history with: python backfill_rollups.py (study-analytics)
+
+-- ============================================================================
+-- End of Schema 019
+-- ============================================================================
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Schema 020: Session Activity Client IDs
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Client-generated activity IDs so batch uploads from offline
+--              clients can be retried without duplicating activities
+-- Dependencies: Schema 011 (study analytics)
+-- ============================================================================
+
+ALTER TABLE session_activities ADD COLUMN IF NOT EXISTS client_activity_id VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_session_activities_client_id
+    ON session_activities(session_id, client_activity_id);
+
+COMMENT ON COLUMN session_activities.client_activity_id IS 'Client-generated ID; a re-uploaded activity with the same ID is ignored';
+
+-- ============================================================================
+-- End of Schema 020
+-- ============================================================================
@@ -0,0 +1,36 @@
+-- ============================================================================
+-- Schema 021: AI Generation Cache
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Generated notes, tests and flashcards keyed on a hash of the
+--              source content, generator, prompt version and parameters, so
+--              repeat generations are served without a model call
+-- Dependencies: None (standalone cache table)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS generation_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    generator VARCHAR(20) NOT NULL,
+    prompt_version VARCHAR(20) NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    source_hashes TEXT[] NOT NULL DEFAULT '{}',
+    params JSONB NOT NULL DEFAULT '{}',
+    result JSONB NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    last_accessed_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_cache_content ON generation_cache(content_hash);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_sources ON generation_cache USING GIN (source_hashes);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_accessed ON generation_cache(last_accessed_at);
+
+COMMENT ON TABLE generation_cache IS 'Cached AI generations; least recently used rows are evicted past a size budget';
+COMMENT ON COLUMN generation_cache.cache_key IS 'SHA-256 of generator, prompt version, parameters and content hash';
+COMMENT ON COLUMN generation_cache.content_hash IS 'SHA-256 of the source content (for invalidation)';
+COMMENT ON COLUMN generation_cache.source_hashes IS 'SHA-256 of each source material the result was generated from';
+
+-- ============================================================================
+-- End of Schema 021
+-- ============================================================================
@@ -0,0 +1,52 @@
+-- ============================================================================
+-- Schema 022: Flashcard Schedule
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Current spaced repetition state per user and card, maintained
+--              on each review, so due cards are an index range scan instead
+--              of a search through flashcard_reviews history
+-- Dependencies: Schema 008 (study tools)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS flashcard_schedule (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    card_id INTEGER NOT NULL REFERENCES flashcards(id) ON DELETE CASCADE,
+    deck_id INTEGER NOT NULL REFERENCES flashcard_decks(id) ON DELETE CASCADE,
+    interval_days INTEGER NOT NULL DEFAULT 1,
+    ease_factor DECIMAL(4,2) NOT NULL DEFAULT 2.5,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    last_quality INTEGER CHECK (last_quality >= 0 AND last_quality <= 5),
+    last_reviewed_at TIMESTAMP,
+    next_review_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, card_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_flashcard_schedule_due ON flashcard_schedule(user_id, next_review_at);
+CREATE INDEX IF NOT EXISTS idx_flashcard_schedule_deck_due ON flashcard_schedule(user_id, deck_id, next_review_at);
+CREATE INDEX IF NOT EXISTS idx_flashcard_schedule_card ON flashcard_schedule(card_id);
+
+COMMENT ON TABLE flashcard_schedule IS 'Current SM-2 state per user and card; flashcard_reviews keeps the full history';
+COMMENT ON COLUMN flashcard_schedule.deck_id IS 'Denormalized from flashcards for per-deck due queries';
+
+-- Backfill from the latest review of each card
+INSERT INTO flashcard_schedule
+    (user_id, card_id, deck_id, interval_days, ease_factor, review_count, last_quality, last_reviewed_at, next_review_at)
+SELECT latest.user_id, latest.card_id, f.deck_id, COALESCE(latest.interval_days, 1), COALESCE(latest.ease_factor, 2.5),
+       counts.review_count, latest.quality, latest.reviewed_at,
+       COALESCE(latest.next_review_date, latest.reviewed_at)
+FROM (
+    SELECT DISTINCT ON (user_id, card_id) user_id, card_id, interval_days, ease_factor, quality, reviewed_at, next_review_date
+    FROM flashcard_reviews
+    ORDER BY user_id, card_id, reviewed_at DESC
+) latest
+JOIN (
+    SELECT user_id, card_id, COUNT(*) AS review_count
+    FROM flashcard_reviews
+    GROUP BY user_id, card_id
+) counts ON counts.user_id = latest.user_id AND counts.card_id = latest.card_id
+JOIN flashcards f ON f.id = latest.card_id
+ON CONFLICT (user_id, card_id) DO NOTHING;
+
+-- ============================================================================
+-- End of Schema 022
+-- ============================================================================
@@ -0,0 +1,47 @@
+-- ============================================================================
+-- Schema 023: Class Enrollments
+-- Version: 1.0
+-- Date: 2026-10-17
+-- Description: Class membership, read by the gamification class leaderboards.
+--              A class's owner is enrolled in it; other students join by
+--              enrollment
+-- Dependencies: Schema 006 (classes)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS class_enrollments (
+    class_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    enrolled_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (class_id, user_id)
+);
+
+-- Per-user lookup for leaderboard updates on every award
+CREATE INDEX IF NOT EXISTS idx_class_enrollments_user ON class_enrollments(user_id);
+
+COMMENT ON TABLE class_enrollments IS 'Students in each class; class leaderboards rank these users';
+
+-- A class's owner is a member of it
+CREATE OR REPLACE FUNCTION enroll_class_owner() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO class_enrollments (class_id, user_id)
+    VALUES (NEW.id, NEW.user_id)
+    ON CONFLICT (class_id, user_id) DO NOTHING;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_enroll_class_owner ON classes;
+CREATE TRIGGER trigger_enroll_class_owner
+    AFTER INSERT ON classes
+    FOR EACH ROW
+    EXECUTE FUNCTION enroll_class_owner();
+
+-- Backfill owners of existing classes
+INSERT INTO class_enrollments (class_id, user_id, enrolled_at)
+SELECT id, user_id, COALESCE(created_at, NOW())
+FROM classes
+ON CONFLICT (class_id, user_id) DO NOTHING;
+
+-- ============================================================================
+-- End of Schema 023
+-- ============================================================================
@@ -0,0 +1,92 @@
+"""
+AI Study Tools Service - Generation Throughput Benchmark
+Compares the old blocking call-per-request path against the shared async
+AIService, using the offline stub provider (no AWS credentials needed)
+
+The blocking baseline runs the same requests one after another, which is what
+an event loop blocked by a synchronous converse() call degrades to. A
+fraction of requests repeat earlier material to exercise in-flight coalescing.
+
+Usage:
+    python benchmark_generation.py [--requests 200] [--latency-ms 500] [--concurrency 8] [--duplicates 0.3]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault("GENERATION_CACHE_ENABLED", "false")  # measure provider calls, not cache reads
+
+from src.services.ai_service import AIService, StubProvider, build_prompt
+
+
+def make_requests(count: int, duplicates: float, seed_value: int = 42):
+    """(kind, content, params) tuples; `duplicates` of them repeat an earlier one"""
+    rng = random.Random(seed_value)
+    requests = []
+    for i in range(count):
+        if requests and rng.random() < duplicates:
+            requests.append(rng.choice(requests))
+            continue
+        content = f"Lecture {i}: " + " ".join(f"concept-{rng.randint(0, 10 ** 6)}" for _ in range(200))
+        kind = rng.choice(("notes", "test", "flashcards"))
+        params = {
+            "notes": {"source_type": "recording"},
+            "test": {"difficulty": "medium", "question_count": 10},
+            "flashcards": {"card_count": 20},
+        }[kind]
+        requests.append((kind, content, params))
+    return requests
+
+
+def run_blocking(requests, latency_ms: int) -> float:
+    start = time.perf_counter()
+    for kind, content, params in requests:
+        provider = StubProvider(latency_ms)  # previously: a new client per request
+        prompt, max_tokens = build_prompt(kind, content, params)
+        provider.complete(prompt, 0.7, max_tokens, kind, params)
+    return time.perf_counter() - start
+
+
+async def run_async(service: AIService, requests) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[service.generate(kind, content, params) for kind, content, params in requests])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AI generation throughput")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=500, help="Stub provider latency per call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Fraction of repeated requests")
+    parser.add_argument("--skip-blocking", action="store_true", help="Skip the slow sequential baseline")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("AI Study Tools: Generation Throughput Benchmark")
+    print("=" * 70)
+    print(f"{args.requests} requests, {args.latency_ms} ms stub latency, "
+          f"concurrency {args.concurrency}, {args.duplicates:.0%} duplicates")
+
+    requests = make_requests(args.requests, args.duplicates)
+
+    service = AIService(provider=StubProvider(args.latency_ms), max_concurrency=args.concurrency)
+    async_seconds = asyncio.run(run_async(service, requests))
+    stats = service.stats()
+    print(f"\nAsync pooled: {async_seconds:.2f}s ({args.requests / async_seconds:.1f} req/s), "
+          f"{stats['provider_calls']} provider calls, {stats['coalesced']} coalesced")
+
+    if not args.skip_blocking:
+        blocking_seconds = run_blocking(requests, args.latency_ms)
+        print(f"Blocking:     {blocking_seconds:.2f}s ({args.requests / blocking_seconds:.1f} req/s)")
+        print(f"\n[RESULTS] speedup: {blocking_seconds / async_seconds:.1f}x")
+    else:
+        print(f"\n[RESULTS] throughput: {args.requests / async_seconds:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
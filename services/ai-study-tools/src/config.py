@@ -23,6 +23,21 @@ class Settings(BaseSettings):
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
+
+    # AI generation
+    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "bedrock")  # bedrock | stub
+    AI_MODEL_ID: str = os.getenv("AI_MODEL_ID", "anthropic.claude-3-5-sonnet-20241022-v2:0")
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+    AI_REQUEST_TIMEOUT: int = int(os.getenv("AI_REQUEST_TIMEOUT", "120"))
+    AI_STUB_LATENCY_MS: int = int(os.getenv("AI_STUB_LATENCY_MS", "1500"))
+    AI_CHUNK_CHARS: int = int(os.getenv("AI_CHUNK_CHARS", "24000"))  # map-reduce above this
+    AI_MAP_PARALLELISM: int = int(os.getenv("AI_MAP_PARALLELISM", "4"))
+
+    # Generation cache
+    GENERATION_CACHE_ENABLED: bool = os.getenv("GENERATION_CACHE_ENABLED", "true").lower() == "true"
+    GENERATION_CACHE_MAX_BYTES: int = int(os.getenv("GENERATION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    GENERATION_CACHE_REDIS_TTL: int = int(os.getenv("GENERATION_CACHE_REDIS_TTL", "3600"))
+    GENERATION_CACHE_EVICT_EVERY: int = int(os.getenv("GENERATION_CACHE_EVICT_EVERY", "100"))
     
     # JWT
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
@@ -4,8 +4,11 @@ FastAPI service for AI-generated notes, tests, and flashcards
 """
 from fastapi import FastAPI
 
+from lm_common.db_pool import pool_stats
+
 from .config import settings
-from .routes import notes_router, tests_router, flashcards_router
+from .routes import notes_router, tests_router, flashcards_router, generation_cache_router
+from .services.ai_service import get_ai_service
 
 # Create FastAPI app
 app = FastAPI(
@@ -21,6 +24,7 @@ app = FastAPI(
 app.include_router(notes_router, prefix="/api")
 app.include_router(tests_router, prefix="/api")
 app.include_router(flashcards_router, prefix="/api")
+app.include_router(generation_cache_router, prefix="/api")
 
 
 # Add OPTIONS handler for CORS preflight
@@ -31,7 +35,9 @@ async def health_check():
     return {
         "status": "healthy",
         "service": settings.SERVICE_NAME,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "db_pools": pool_stats(),
+        "ai": get_ai_service().stats()
     }
 
 
@@ -46,7 +52,8 @@ async def root():
             "docs": "/docs",
             "notes": "/api/notes",
             "tests": "/api/tests",
-            "flashcards": "/api/flashcards"
+            "flashcards": "/api/flashcards",
+            "generation_cache": "/api/generation-cache"
         }
     }
 
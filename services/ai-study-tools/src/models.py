@@ -148,3 +148,62 @@ class FlashcardReviewResponse(BaseModel):
     next_review_date: datetime
     interval_days: int
     ease_factor: float
+
+
+class FlashcardBatchReviewItem(BaseModel):
+    card_id: int
+    quality: int = Field(ge=0, le=5)
+    reviewed_at: Optional[datetime] = None
+
+
+class FlashcardBatchReviewRequest(BaseModel):
+    user_id: int
+    reviews: List[FlashcardBatchReviewItem] = Field(min_length=1, max_length=500)
+
+
+class FlashcardBatchReviewResult(BaseModel):
+    card_id: int
+    status: str  # reviewed or rejected
+    review_id: Optional[int] = None
+    next_review_date: Optional[datetime] = None
+    interval_days: Optional[int] = None
+    ease_factor: Optional[float] = None
+    error: Optional[str] = None
+
+
+class FlashcardBatchReviewResponse(BaseModel):
+    reviewed: int
+    rejected: int
+    results: List[FlashcardBatchReviewResult]
+
+
+class DueFlashcardResponse(BaseModel):
+    card_id: int
+    deck_id: int
+    front_text: str
+    back_text: str
+    interval_days: int
+    ease_factor: float
+    next_review_date: Optional[datetime]
+    is_new: bool
+
+
+# ============================================================================
+# GENERATION CACHE MODELS
+# ============================================================================
+
+class GeneratorKind(str, Enum):
+    NOTES = "notes"
+    TEST = "test"
+    FLASHCARDS = "flashcards"
+
+
+class GenerationCacheInvalidate(BaseModel):
+    """Every given filter must match; at least one is required"""
+    cache_key: Optional[str] = Field(None, min_length=64, max_length=64)
+    source_material_id: Optional[int] = None
+    generator: Optional[GeneratorKind] = None
+
+
+class GenerationCacheInvalidateResponse(BaseModel):
+    deleted: int
@@ -1,35 +1,33 @@
 """
 Flashcard routes
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-import psycopg2
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from datetime import datetime
 
 from ..models import (
     FlashcardDeckCreate, FlashcardCreate, FlashcardDeckResponse,
-    FlashcardResponse, FlashcardReviewRequest, FlashcardReviewResponse
+    FlashcardResponse, FlashcardReviewRequest, FlashcardReviewResponse,
+    FlashcardBatchReviewRequest, FlashcardBatchReviewResponse, DueFlashcardResponse
 )
-from ..services.ai_service import AIService
+from ..services.ai_service import AIService, get_ai_service
+from ..services.spaced_repetition import record_reviews, due_cards
+from ..services.bulk_writer import insert_flashcards
 from ..config import settings
+from lm_common.db_pool import get_connection, pooled_connection
 
 router = APIRouter(prefix="/flashcards", tags=["flashcards"])
 
 
 def get_db():
-    """Get database connection"""
-    conn = psycopg2.connect(settings.database_url)
+    """Get a pooled database connection (returned to the pool after the request)"""
+    conn = get_connection(settings.database_url)
     try:
         yield conn
     finally:
         conn.close()
 
 
-def get_ai_service():
-    """Get AI service instance"""
-    return AIService()
-
-
 @router.post("/decks", response_model=FlashcardDeckResponse)
 async def create_deck(
     request: FlashcardDeckCreate,
@@ -74,16 +72,18 @@ async def generate_flashcards(
     deck_id: int,
     source_material_id: int,
     card_count: int = 10,
-    conn = Depends(get_db),
     ai_service: AIService = Depends(get_ai_service)
 ):
     """Generate flashcards from source material"""
+    # No database connection is held while the model runs
     try:
-        cur = conn.cursor()
-        
-        # Get source content
-        cur.execute("SELECT content FROM study_materials WHERE id = %s", (source_material_id,))
-        result = cur.fetchone()
+        with pooled_connection(settings.database_url) as conn:
+            cur = conn.cursor()
+            
+            # Get source content
+            cur.execute("SELECT content FROM study_materials WHERE id = %s", (source_material_id,))
+            result = cur.fetchone()
+            cur.close()
         
         if not result:
             raise HTTPException(status_code=404, detail="Source material not found")
@@ -91,36 +91,21 @@ async def generate_flashcards(
         source_content = result[0]
         
         # Generate flashcards using AI
-        cards_data = ai_service.generate_flashcards(source_content, card_count)
-        
-        # Save flashcards
-        for idx, card in enumerate(cards_data):
-            cur.execute("""
-                INSERT INTO flashcards (deck_id, front_text, back_text, order_index, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                deck_id,
-                card['front_text'],
-                card['back_text'],
-                idx,
-                datetime.now(),
-                datetime.now()
-            ))
-        
-        # Update deck card count
-        cur.execute("""
-            UPDATE flashcard_decks
-            SET card_count = card_count + %s, updated_at = %s
-            WHERE id = %s
-        """, (len(cards_data), datetime.now(), deck_id))
+        cards_data = await ai_service.generate_flashcards(source_content, card_count)
         
-        conn.commit()
-        cur.close()
+        with pooled_connection(settings.database_url) as conn:
+            cur = conn.cursor()
+            
+            # Save flashcards and update deck card count
+            insert_flashcards(cur, deck_id, cards_data)
+            
+            conn.commit()
+            cur.close()
         
         return {"message": f"Generated {len(cards_data)} flashcards", "count": len(cards_data)}
         
     except Exception as e:
-        conn.rollback()
+        # Uncommitted work is rolled back when the connection returns to the pool
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -234,67 +219,73 @@ async def review_card(
     try:
         cur = conn.cursor()
         
-        # Get previous review if exists
-        cur.execute("""
-            SELECT interval_days, ease_factor
-            FROM flashcard_reviews
-            WHERE card_id = %s AND user_id = %s
-            ORDER BY reviewed_at DESC
-            LIMIT 1
-        """, (request.card_id, request.user_id))
-        
-        prev_review = cur.fetchone()
-        
-        # Calculate new interval using SM-2 algorithm
-        if prev_review:
-            prev_interval, prev_ease = prev_review
-        else:
-            prev_interval, prev_ease = 1, 2.5
-        
-        # Update ease factor based on quality (0-5)
-        new_ease = max(1.3, prev_ease + (0.1 - (5 - request.quality) * (0.08 + (5 - request.quality) * 0.02)))
-        
-        # Calculate new interval
-        if request.quality < 3:
-            new_interval = 1
-        elif prev_interval == 1:
-            new_interval = 6
-        else:
-            new_interval = int(prev_interval * new_ease)
-        
-        next_review = datetime.now() + timedelta(days=new_interval)
-        
-        # Save review
-        cur.execute("""
-            INSERT INTO flashcard_reviews (card_id, user_id, quality, next_review_date, interval_days, ease_factor, reviewed_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            request.card_id,
-            request.user_id,
-            request.quality,
-            next_review,
-            new_interval,
-            new_ease,
-            datetime.now()
-        ))
+        result = record_reviews(cur, request.user_id, [
+            {"card_id": request.card_id, "quality": request.quality}
+        ])[0]
+        if result["status"] != "reviewed":
+            raise HTTPException(status_code=404, detail="Card not found")
         
-        review_id = cur.fetchone()[0]
         conn.commit()
         cur.close()
         
         return FlashcardReviewResponse(
-            id=review_id,
-            next_review_date=next_review,
-            interval_days=new_interval,
-            ease_factor=new_ease
+            id=result["review_id"],
+            next_review_date=result["next_review_date"],
+            interval_days=result["interval_days"],
+            ease_factor=result["ease_factor"]
         )
         
+    except HTTPException:
+        conn.rollback()
+        raise
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/reviews/batch", response_model=FlashcardBatchReviewResponse)
+async def review_cards_batch(
+    request: FlashcardBatchReviewRequest,
+    conn = Depends(get_db)
+):
+    """Record a whole review session in one transaction (unknown cards are rejected individually)"""
+    try:
+        cur = conn.cursor()
+        results = record_reviews(cur, request.user_id, [review.model_dump() for review in request.reviews])
+        conn.commit()
+        cur.close()
+        
+        reviewed = sum(1 for result in results if result["status"] == "reviewed")
+        return FlashcardBatchReviewResponse(
+            reviewed=reviewed,
+            rejected=len(results) - reviewed,
+            results=results
+        )
+        
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/due", response_model=List[DueFlashcardResponse])
+async def list_due_cards(
+    user_id: int,
+    deck_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    include_new: bool = True,
+    conn = Depends(get_db)
+):
+    """Cards due for review now (most overdue first), topped up with never-reviewed cards"""
+    try:
+        cur = conn.cursor()
+        cards = due_cards(cur, user_id, deck_id, limit, include_new)
+        cur.close()
+        return cards
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/decks/user/{user_id}", response_model=List[FlashcardDeckResponse])
 async def list_user_decks(user_id: int, conn = Depends(get_db)):
     """List all decks for a user"""
@@ -0,0 +1,51 @@
+"""
+Generation cache routes
+"""
+from fastapi import APIRouter, HTTPException
+
+from ..models import GenerationCacheInvalidate, GenerationCacheInvalidateResponse
+from ..services.generation_cache import content_hash, get_generation_cache
+from ..config import settings
+from lm_common.db_pool import pooled_connection
+
+router = APIRouter(prefix="/generation-cache", tags=["generation-cache"])
+
+
+@router.post("/invalidate", response_model=GenerationCacheInvalidateResponse)
+async def invalidate_generation_cache(request: GenerationCacheInvalidate):
+    """Delete cached generations so the next request regenerates them"""
+    if request.cache_key is None and request.source_material_id is None and request.generator is None:
+        raise HTTPException(status_code=400, detail="cache_key, source_material_id or generator is required")
+
+    try:
+        source_hash = None
+        if request.source_material_id is not None:
+            with pooled_connection(settings.database_url) as conn:
+                cur = conn.cursor()
+                cur.execute("SELECT content FROM study_materials WHERE id = %s", (request.source_material_id,))
+                result = cur.fetchone()
+                cur.close()
+            if not result:
+                raise HTTPException(status_code=404, detail="Source material not found")
+            source_hash = content_hash(result[0])
+
+        deleted = get_generation_cache().invalidate(
+            cache_key=request.cache_key,
+            content_hash=source_hash,
+            generator=request.generator.value if request.generator else None
+        )
+        return GenerationCacheInvalidateResponse(deleted=deleted)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def generation_cache_stats():
+    """Entries, stored bytes and hits per generator"""
+    try:
+        return get_generation_cache().stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,87 +3,87 @@ Notes generation routes
 """
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
-import psycopg2
 from datetime import datetime
 
 from ..models import NoteGenerateRequest, NoteResponse
-from ..services.ai_service import AIService
+from ..services.ai_service import AIService, get_ai_service
 from ..config import settings
+from lm_common.db_pool import get_connection, pooled_connection
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
 def get_db():
-    """Get database connection"""
-    conn = psycopg2.connect(settings.database_url)
+    """Get a pooled database connection (returned to the pool after the request)"""
+    conn = get_connection(settings.database_url)
     try:
         yield conn
     finally:
         conn.close()
 
 
-def get_ai_service():
-    """Get AI service instance"""
-    return AIService()
-
-
 @router.post("/generate", response_model=NoteResponse)
 async def generate_notes(
     request: NoteGenerateRequest,
-    conn = Depends(get_db),
     ai_service: AIService = Depends(get_ai_service)
 ):
     """Generate AI notes from source material"""
+    # No database connection is held while the model runs; the pool would
+    # otherwise drain with a few slow generations in flight.
     try:
-        cur = conn.cursor()
-        
-        # Get source content based on type
-        source_content = ""
-        if request.source_type == "recording":
-            cur.execute("SELECT transcript FROM transcriptions WHERE id = %s", (request.source_id,))
-            result = cur.fetchone()
-            if result:
-                source_content = result[0]
-        elif request.source_type == "photo":
-            cur.execute("SELECT extracted_text FROM photos WHERE id = %s", (request.source_id,))
-            result = cur.fetchone()
-            if result:
-                source_content = result[0]
-        elif request.source_type == "textbook":
-            cur.execute("SELECT content FROM textbook_chunks WHERE textbook_id = %s ORDER BY chunk_index", (request.source_id,))
-            chunks = cur.fetchall()
-            source_content = "\n\n".join([chunk[0] for chunk in chunks])
+        with pooled_connection(settings.database_url) as conn:
+            cur = conn.cursor()
+            
+            # Get source content based on type
+            source_content = ""
+            if request.source_type == "recording":
+                cur.execute("SELECT transcript FROM transcriptions WHERE id = %s", (request.source_id,))
+                result = cur.fetchone()
+                if result:
+                    source_content = result[0]
+            elif request.source_type == "photo":
+                cur.execute("SELECT extracted_text FROM photos WHERE id = %s", (request.source_id,))
+                result = cur.fetchone()
+                if result:
+                    source_content = result[0]
+            elif request.source_type == "textbook":
+                cur.execute("SELECT content FROM textbook_chunks WHERE textbook_id = %s ORDER BY chunk_index", (request.source_id,))
+                chunks = cur.fetchall()
+                source_content = "\n\n".join([chunk[0] for chunk in chunks])
+            cur.close()
         
         if not source_content:
             raise HTTPException(status_code=404, detail="Source content not found")
         
         # Generate notes using AI
-        generated = ai_service.generate_notes(source_content, request.source_type.value)
+        generated = await ai_service.generate_notes(source_content, request.source_type.value)
         
         # Save to database
-        cur.execute("""
-            INSERT INTO study_materials (user_id, title, content, is_ai_generated, class_id, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id, created_at
-        """, (
-            request.user_id,
-            generated['title'],
-            generated['content'],
-            True,
-            request.class_id,
-            datetime.now()
-        ))
-        
-        note_id, created_at = cur.fetchone()
-        
-        # Link to source
-        cur.execute("""
-            INSERT INTO note_sources (note_id, source_type, source_id)
-            VALUES (%s, %s, %s)
-        """, (note_id, request.source_type.value, request.source_id))
-        
-        conn.commit()
-        cur.close()
+        with pooled_connection(settings.database_url) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO study_materials (user_id, title, content, is_ai_generated, class_id, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id, created_at
+            """, (
+                request.user_id,
+                generated['title'],
+                generated['content'],
+                True,
+                request.class_id,
+                datetime.now()
+            ))
+            
+            note_id, created_at = cur.fetchone()
+            
+            # Link to source
+            cur.execute("""
+                INSERT INTO note_sources (note_id, source_type, source_id)
+                VALUES (%s, %s, %s)
+            """, (note_id, request.source_type.value, request.source_id))
+            
+            conn.commit()
+            cur.close()
         
         return NoteResponse(
             id=note_id,
@@ -95,7 +95,7 @@ async def generate_notes(
         )
         
     except Exception as e:
-        conn.rollback()
+        # Uncommitted work is rolled back when the connection returns to the pool
         raise HTTPException(status_code=500, detail=str(e))
 
 
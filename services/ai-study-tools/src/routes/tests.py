@@ -3,103 +3,78 @@ Test generation routes
 """
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
-import psycopg2
 import json
 from datetime import datetime
 
 from ..models import TestGenerateRequest, TestResponse, TestQuestion, TestAttemptRequest, TestAttemptResponse
-from ..services.ai_service import AIService
+from ..services.ai_service import AIService, get_ai_service
+from ..services.bulk_writer import create_test
+from ..services.generation_cache import content_hash
 from ..config import settings
+from lm_common.db_pool import get_connection, pooled_connection
 
 router = APIRouter(prefix="/tests", tags=["tests"])
 
 
 def get_db():
-    """Get database connection"""
-    conn = psycopg2.connect(settings.database_url)
+    """Get a pooled database connection (returned to the pool after the request)"""
+    conn = get_connection(settings.database_url)
     try:
         yield conn
     finally:
         conn.close()
 
 
-def get_ai_service():
-    """Get AI service instance"""
-    return AIService()
-
-
 @router.post("/generate", response_model=TestResponse)
 async def generate_test(
     request: TestGenerateRequest,
-    conn = Depends(get_db),
     ai_service: AIService = Depends(get_ai_service)
 ):
     """Generate AI test from source materials"""
+    # No database connection is held while the model runs
     try:
-        cur = conn.cursor()
-        
         # Get source content
         source_content = ""
         if request.source_material_ids:
-            placeholders = ','.join(['%s'] * len(request.source_material_ids))
-            cur.execute(f"""
-                SELECT content FROM study_materials
-                WHERE id IN ({placeholders})
-            """, request.source_material_ids)
-            materials = cur.fetchall()
+            with pooled_connection(settings.database_url) as conn:
+                cur = conn.cursor()
+                placeholders = ','.join(['%s'] * len(request.source_material_ids))
+                cur.execute(f"""
+                    SELECT content FROM study_materials
+                    WHERE id IN ({placeholders})
+                """, request.source_material_ids)
+                materials = cur.fetchall()
+                cur.close()
             source_content = "\n\n".join([m[0] for m in materials])
         
         if not source_content:
             raise HTTPException(status_code=400, detail="No source materials provided")
         
         # Generate test using AI
-        questions_data = ai_service.generate_test(
+        questions_data = await ai_service.generate_test(
             source_content,
             request.difficulty.value,
-            request.question_count
+            request.question_count,
+            source_hashes=[content_hash(m[0]) for m in materials]
         )
         
-        # Save test to database
-        cur.execute("""
-            INSERT INTO generated_tests (class_id, user_id, title, description, difficulty, question_count, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id, created_at
-        """, (
-            request.class_id,
-            request.user_id,
-            request.title,
-            request.description,
-            request.difficulty.value,
-            len(questions_data),
-            datetime.now(),
-            datetime.now()
-        ))
-        
-        test_id, created_at = cur.fetchone()
-        
-        # Save questions
-        questions = []
-        for idx, q in enumerate(questions_data):
-            cur.execute("""
-                INSERT INTO test_questions (test_id, question_text, question_type, correct_answer, options, explanation, points, order_index, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                test_id,
-                q['question_text'],
-                q['question_type'],
-                q.get('correct_answer'),
-                json.dumps(q.get('options', [])),
-                q.get('explanation'),
-                q.get('points', 1),
-                idx,
-                datetime.now()
-            ))
+        with pooled_connection(settings.database_url) as conn:
+            cur = conn.cursor()
             
-            questions.append(TestQuestion(**q))
-        
-        conn.commit()
-        cur.close()
+            # Save test and questions
+            test_id, created_at, _ = create_test(
+                cur,
+                request.user_id,
+                request.title,
+                request.difficulty.value,
+                questions_data,
+                class_id=request.class_id,
+                description=request.description
+            )
+            questions = [TestQuestion(**q) for q in questions_data]
+            
+            conn.commit()
+            cur.close()
         
         return TestResponse(
             id=test_id,
@@ -112,7 +87,7 @@ async def generate_test(
         )
         
     except Exception as e:
-        conn.rollback()
+        # Uncommitted work is rolled back when the connection returns to the pool
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1,37 +1,52 @@
 """
 AI Service for generating study materials using AWS Bedrock
+
+One AIService is shared by every request. Its provider is created once and
+reused: the Bedrock provider holds a single boto3 client, whose HTTP pool is
+sized to AI_MAX_CONCURRENCY. Generations are awaited from the route
+handlers. The blocking Converse call runs on a dedicated thread pool, so
+the event loop keeps serving other requests. A semaphore bounds how many
+calls are in flight. Identical generations requested while one is already
+running (same kind, source content and parameters) share that call instead
+of issuing another. Finished generations are stored in the generation
+cache, keyed on a hash of the content (see generation_cache), so repeat
+requests are answered without calling the provider at all. Material longer
+than AI_CHUNK_CHARS is generated chunk by chunk and merged (see map_reduce).
+
+Set AI_PROVIDER=stub to swap Bedrock for a local provider that returns
+well-formed JSON after AI_STUB_LATENCY_MS. It is meant for offline
+development and benchmarking.
 """
-import boto3
+import asyncio
+import hashlib
 import json
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from lm_common.logging import get_logger
+
 from ..config import settings
+from .generation_cache import GenerationCache, cache_key, content_hash, get_generation_cache
+from .map_reduce import (
+    ProgressCallback, chunk_content, format_partial_notes, merge_items, pack, per_chunk_count
+)
 
+logger = get_logger(__name__)
 
-class AIService:
-    """AWS Bedrock service for AI generation"""
-    
-    def __init__(self):
-        """Initialize Bedrock client"""
-        self.client = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        )
-        self.model_id = "anthropic.claude-3-5-sonnet-20241022-v2:0"
-    
-    def generate_notes(self, source_content: str, source_type: str) -> Dict[str, str]:
-        """
-        Generate study notes from source content
-        
-        Args:
-            source_content: The source material text
-            source_type: Type of source (recording, photo, textbook)
-            
-        Returns:
-            Dict with title and content
-        """
-        prompt = f"""You are an expert educational assistant. Generate comprehensive study notes from the following {source_type} content.
+# Kinds generated with map-reduce when the material exceeds AI_CHUNK_CHARS
+MAP_REDUCE_KINDS = ("notes", "test", "flashcards")
+
+
+def build_prompt(kind: str, source_content: str, params: Dict[str, Any]) -> Tuple[str, int]:
+    """
+    Build the prompt for a generation kind
+
+    Returns:
+        Tuple of (prompt, max_tokens)
+    """
+    if kind == "notes":
+        return f"""You are an expert educational assistant. Generate comprehensive study notes from the following {params['source_type']} content.
 
 Create well-organized notes with:
 - Clear title
@@ -47,29 +62,10 @@ Respond in JSON format:
 {{
     "title": "Brief descriptive title",
     "content": "Detailed markdown-formatted notes"
-}}"""
-        
-        response = self._generate(prompt)
-        return json.loads(response)
-    
-    def generate_test(
-        self,
-        source_content: str,
-        difficulty: str,
-        question_count: int
-    ) -> List[Dict]:
-        """
-        Generate test questions from source content
-        
-        Args:
-            source_content: The source material text
-            difficulty: easy, medium, or hard
-            question_count: Number of questions to generate
-            
-        Returns:
-            List of question dictionaries
-        """
-        prompt = f"""You are an expert educational assessment creator. Generate {question_count} {difficulty} difficulty test questions from the following content.
+}}""", 2048
+
+    if kind == "test":
+        return f"""You are an expert educational assessment creator. Generate {params['question_count']} {params['difficulty']} difficulty test questions from the following content.
 
 Create a mix of question types:
 - Multiple choice (with 4 options)
@@ -89,27 +85,10 @@ Respond in JSON format as an array of questions:
         "explanation": "Why this is correct",
         "points": 1
     }}
-]"""
-        
-        response = self._generate(prompt, max_tokens=4096)
-        return json.loads(response)
-    
-    def generate_flashcards(
-        self,
-        source_content: str,
-        card_count: int = 10
-    ) -> List[Dict[str, str]]:
-        """
-        Generate flashcards from source content
-        
-        Args:
-            source_content: The source material text
-            card_count: Number of flashcards to generate
-            
-        Returns:
-            List of flashcard dictionaries with front and back
-        """
-        prompt = f"""You are an expert educational content creator. Generate {card_count} flashcards from the following content.
+]""", 4096
+
+    if kind == "flashcards":
+        return f"""You are an expert educational content creator. Generate {params['card_count']} flashcards from the following content.
 
 Each flashcard should have:
 - Front: A question or key term
@@ -124,45 +103,360 @@ Respond in JSON format as an array:
         "front_text": "Question or term",
         "back_text": "Answer or definition"
     }}
-]"""
-        
-        response = self._generate(prompt, max_tokens=2048)
-        return json.loads(response)
-    
-    def _generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048) -> str:
-        """
-        Generate text using Bedrock Converse API
-        
-        Args:
-            prompt: Input prompt
-            temperature: Sampling temperature
-            max_tokens: Maximum tokens to generate
-            
-        Returns:
-            Generated text
-        """
+]""", 2048
+
+    if kind == "notes_merge":
+        return f"""You are an expert educational assistant. The following study notes were written separately for consecutive parts of one {params['source_type']}. Merge them into a single set of comprehensive study notes.
+
+- Combine overlapping points and remove repetition
+- Keep every distinct concept, definition and example
+- Keep the original order of topics
+- End with one overall summary
+
+Partial notes:
+{source_content}
+
+Respond in JSON format:
+{{
+    "title": "Brief descriptive title",
+    "content": "Detailed markdown-formatted notes"
+}}""", 4096
+
+    raise ValueError(f"Unknown generation kind: {kind}")
+
+
+class BedrockProvider:
+    """AWS Bedrock Converse API with one long-lived client"""
+
+    name = "bedrock"
+
+    def __init__(self):
+        import boto3
+        from botocore.config import Config
+
+        self.client = boto3.client(
+            service_name='bedrock-runtime',
+            region_name=settings.AWS_REGION,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            config=Config(
+                max_pool_connections=settings.AI_MAX_CONCURRENCY,
+                read_timeout=settings.AI_REQUEST_TIMEOUT,
+                retries={"max_attempts": 3, "mode": "adaptive"}
+            )
+        )
+        self.model_id = settings.AI_MODEL_ID
+
+    def complete(self, prompt: str, temperature: float, max_tokens: int,
+                 kind: str, params: Dict[str, Any]) -> str:
         try:
-            messages = [
-                {
-                    "role": "user",
-                    "content": [{"text": prompt}]
-                }
-            ]
-            
-            inference_config = {
-                "temperature": temperature,
-                "maxTokens": max_tokens,
-                "topP": 0.9
-            }
-            
             response = self.client.converse(
                 modelId=self.model_id,
-                messages=messages,
-                inferenceConfig=inference_config
+                messages=[{"role": "user", "content": [{"text": prompt}]}],
+                inferenceConfig={
+                    "temperature": temperature,
+                    "maxTokens": max_tokens,
+                    "topP": 0.9
+                }
             )
-            
-            output_message = response['output']['message']
-            return output_message['content'][0]['text'].strip()
-            
+            return response['output']['message']['content'][0]['text'].strip()
         except Exception as e:
             raise Exception(f"Bedrock generation failed: {e}")
+
+
+class StubProvider:
+    """Offline provider: fixed latency, deterministic well-formed output"""
+
+    name = "stub"
+
+    def __init__(self, latency_ms: Optional[int] = None):
+        self.latency = (settings.AI_STUB_LATENCY_MS if latency_ms is None else latency_ms) / 1000
+
+    def complete(self, prompt: str, temperature: float, max_tokens: int,
+                 kind: str, params: Dict[str, Any]) -> str:
+        time.sleep(self.latency)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+
+        if kind in ("notes", "notes_merge"):
+            return json.dumps({
+                "title": f"Study notes {digest}",
+                "content": f"# Study notes {digest}\n\n- Key concept\n- Summary"
+            })
+        if kind == "test":
+            return json.dumps([
+                {
+                    "question_text": f"Question {i + 1} ({digest})?",
+                    "question_type": "multiple_choice",
+                    "correct_answer": "A",
+                    "options": [{"text": letter, "is_correct": letter == "A"} for letter in "ABCD"],
+                    "explanation": "Stub explanation",
+                    "points": 1
+                }
+                for i in range(params.get("question_count", 5))
+            ])
+        if kind == "flashcards":
+            return json.dumps([
+                {"front_text": f"Term {i + 1} ({digest})", "back_text": f"Definition {i + 1}"}
+                for i in range(params.get("card_count", 10))
+            ])
+        raise ValueError(f"Unknown generation kind: {kind}")
+
+
+PROVIDERS = {"bedrock": BedrockProvider, "stub": StubProvider}
+
+
+class AIService:
+    """Shared, concurrency-limited AI generation with in-flight coalescing"""
+
+    def __init__(self, provider=None, max_concurrency: Optional[int] = None,
+                 cache: Optional[GenerationCache] = None):
+        self.provider = provider or PROVIDERS[settings.AI_PROVIDER]()
+        if cache is None and settings.GENERATION_CACHE_ENABLED:
+            cache = get_generation_cache()
+        self.cache = cache
+        self.max_concurrency = max_concurrency or settings.AI_MAX_CONCURRENCY
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="ai-generate"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "requests": 0, "provider_calls": 0, "coalesced": 0,
+            "cache_hits": 0, "map_reduce": 0, "failures": 0
+        }
+
+    async def generate_notes(
+        self,
+        source_content: str,
+        source_type: str,
+        progress: ProgressCallback = None
+    ) -> Dict[str, str]:
+        """
+        Generate study notes from source content
+
+        Args:
+            source_content: The source material text
+            source_type: Type of source (recording, photo, textbook)
+            progress: Optional callback(stage, done, total) for map-reduce generation
+
+        Returns:
+            Dict with title and content
+        """
+        return await self.generate("notes", source_content, {"source_type": source_type}, progress)
+
+    async def generate_test(
+        self,
+        source_content: str,
+        difficulty: str,
+        question_count: int,
+        progress: ProgressCallback = None,
+        source_hashes: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Generate test questions from source content
+
+        Args:
+            source_content: The source material text
+            difficulty: easy, medium, or hard
+            question_count: Number of questions to generate
+            progress: Optional callback(stage, done, total) for map-reduce generation
+            source_hashes: Content hashes of each source material, when
+                source_content joins several (so each can invalidate the result)
+
+        Returns:
+            List of question dictionaries
+        """
+        return await self.generate(
+            "test", source_content, {"difficulty": difficulty, "question_count": question_count},
+            progress, source_hashes=source_hashes
+        )
+
+    async def generate_flashcards(
+        self,
+        source_content: str,
+        card_count: int = 10,
+        progress: ProgressCallback = None
+    ) -> List[Dict[str, str]]:
+        """
+        Generate flashcards from source content
+
+        Args:
+            source_content: The source material text
+            card_count: Number of flashcards to generate
+            progress: Optional callback(stage, done, total) for map-reduce generation
+
+        Returns:
+            List of flashcard dictionaries with front and back
+        """
+        return await self.generate("flashcards", source_content, {"card_count": card_count}, progress)
+
+    async def generate(self, kind: str, source_content: str, params: Dict[str, Any],
+                       progress: ProgressCallback = None, source_hashes: Optional[List[str]] = None,
+                       use_cache: bool = True) -> Any:
+        """
+        Generate and parse one result (cached, or shared with an identical call in flight)
+
+        Args:
+            kind: notes, test, or flashcards
+            source_content: The source material text
+            params: Kind-specific parameters (part of the coalescing key)
+            progress: Map-reduce progress callback (only the caller that starts
+                a generation receives progress; coalesced callers just wait)
+            source_hashes: Content hashes the result derives from, for
+                invalidation (defaults to the hash of source_content)
+            use_cache: Read and write the generation cache
+
+        Returns:
+            Parsed JSON response
+        """
+        self._stats["requests"] += 1
+        source_hash = content_hash(source_content)
+        key = cache_key(kind, source_hash, params)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+        else:
+            future = asyncio.ensure_future(self._run(
+                kind, source_content, params, key, source_hash, progress,
+                source_hashes or [source_hash], use_cache
+            ))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # shield: a disconnecting caller must not cancel a call others are waiting on
+        return await asyncio.shield(future)
+
+    async def _run(self, kind: str, source_content: str, params: Dict[str, Any],
+                   key: str, source_hash: str, progress: ProgressCallback,
+                   source_hashes: List[str], use_cache: bool) -> Any:
+        use_cache = use_cache and self.cache is not None
+        if use_cache:
+            cached = await self._cache_call(self.cache.get, key)
+            if cached is not None:
+                self._stats["cache_hits"] += 1
+                return cached
+
+        chunks = None
+        if kind in MAP_REDUCE_KINDS and len(source_content) > settings.AI_CHUNK_CHARS:
+            chunks = chunk_content(source_content, settings.AI_CHUNK_CHARS)
+
+        if chunks and len(chunks) > 1:
+            result = await self._map_reduce(kind, chunks, params, progress)
+        else:
+            result = await self._complete(kind, source_content, params)
+
+        if use_cache:
+            await self._cache_call(self.cache.put, key, kind, source_hash, params, result, source_hashes)
+        return result
+
+    async def _complete(self, kind: str, source_content: str, params: Dict[str, Any]) -> Any:
+        """One provider call under the concurrency limiter"""
+        prompt, max_tokens = build_prompt(kind, source_content, params)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            self._stats["provider_calls"] += 1
+            loop = asyncio.get_running_loop()
+            try:
+                response = await loop.run_in_executor(
+                    self._executor, self.provider.complete, prompt, 0.7, max_tokens, kind, params
+                )
+                return json.loads(response)
+            except Exception:
+                self._stats["failures"] += 1
+                raise
+
+    async def _map_reduce(self, kind: str, chunks: List[str], params: Dict[str, Any],
+                          progress: ProgressCallback) -> Any:
+        """
+        Generate per chunk (at most AI_MAP_PARALLELISM at a time), then merge
+
+        Chunk and merge calls go through generate() so identical ones in flight
+        are shared, but they bypass the cache: only the final result is
+        stored, so invalidating the material really regenerates it.
+        """
+        self._stats["map_reduce"] += 1
+        limiter = asyncio.Semaphore(settings.AI_MAP_PARALLELISM)
+        done = 0
+
+        async def generate_limited(stage: str, total: int, sub_kind: str, content: str,
+                                   sub_params: Dict[str, Any]) -> Any:
+            nonlocal done
+            async with limiter:
+                result = await self.generate(sub_kind, content, sub_params, use_cache=False)
+            done += 1
+            if progress:
+                progress(stage, done, total)
+            return result
+
+        if kind == "test":
+            chunk_params = {**params, "question_count": per_chunk_count(params["question_count"], len(chunks))}
+        elif kind == "flashcards":
+            chunk_params = {**params, "card_count": per_chunk_count(params["card_count"], len(chunks))}
+        else:
+            chunk_params = params
+
+        partials = await asyncio.gather(*[
+            generate_limited("map", len(chunks), kind, chunk, chunk_params) for chunk in chunks
+        ])
+
+        if kind == "test":
+            result = merge_items(partials, "question_text", params["question_count"])
+        elif kind == "flashcards":
+            result = merge_items(partials, "front_text", params["card_count"])
+        else:
+            # Merge partial notes with the model, in rounds if they exceed one prompt
+            sections = format_partial_notes(partials)
+            while True:
+                groups = pack(sections, settings.AI_CHUNK_CHARS)
+                if len(groups) == len(sections):
+                    # Each section fills a prompt alone: merge pairwise so every round shrinks
+                    groups = ["\n\n".join(sections[i:i + 2]) for i in range(0, len(sections), 2)]
+                done = 0
+                merged = await asyncio.gather(*[
+                    generate_limited("reduce", len(groups), "notes_merge", group,
+                                     {"source_type": params["source_type"]})
+                    for group in groups
+                ])
+                if len(merged) == 1:
+                    return merged[0]
+                sections = format_partial_notes(merged)
+
+        if progress:
+            progress("reduce", 1, 1)
+        return result
+
+    @staticmethod
+    async def _cache_call(fn, *args) -> Any:
+        """Run a blocking cache operation off the event loop; a cache outage is a miss"""
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            logger.warning(f"Generation cache unavailable: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Provider, limiter and coalescing counters for /health"""
+        return {
+            "provider": self.provider.name,
+            "cache_enabled": self.cache is not None,
+            "max_concurrency": self.max_concurrency,
+            "chunk_chars": settings.AI_CHUNK_CHARS,
+            "in_flight": len(self._in_flight),
+            **self._stats
+        }
+
+
+_ai_service: Optional[AIService] = None
+
+
+def get_ai_service() -> AIService:
+    """Get the process-wide AI service (singleton pattern)"""
+    global _ai_service
+
+    if _ai_service is None:
+        _ai_service = AIService()
+
+    return _ai_service
@@ -0,0 +1,132 @@
+"""
+Set-based persistence for generated flashcards and test questions
+
+Each helper writes all of its rows with one multi-row INSERT (execute_values)
+instead of one statement per row. IDs come back in input order, matched on
+order_index, which is unique within a single call.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import Json, execute_values
+
+PAGE_SIZE = 1000
+
+
+def _ids_in_order(rows: List[Tuple[int, int]], start_index: int, count: int) -> List[int]:
+    """Map RETURNING (id, order_index) rows back to input order"""
+    by_index = dict((order_index, row_id) for row_id, order_index in rows)
+    return [by_index[start_index + i] for i in range(count)]
+
+
+def insert_flashcards(cur, deck_id: int, cards: List[Dict[str, Any]], start_index: int = 0) -> List[int]:
+    """
+    Insert cards into a deck and bump its card_count (caller commits)
+
+    Args:
+        cur: Database cursor
+        deck_id: Target deck
+        cards: Dicts with front_text and back_text
+        start_index: order_index of the first card
+
+    Returns:
+        Card IDs in input order
+    """
+    if not cards:
+        return []
+
+    now = datetime.now()
+    rows = execute_values(cur, """
+        INSERT INTO flashcards (deck_id, front_text, back_text, order_index, created_at, updated_at)
+        VALUES %s
+        RETURNING id, order_index
+    """, [
+        (deck_id, card['front_text'], card['back_text'], start_index + idx, now, now)
+        for idx, card in enumerate(cards)
+    ], page_size=PAGE_SIZE, fetch=True)
+
+    cur.execute("""
+        UPDATE flashcard_decks
+        SET card_count = card_count + %s, updated_at = %s
+        WHERE id = %s
+    """, (len(cards), now, deck_id))
+
+    return _ids_in_order(rows, start_index, len(cards))
+
+
+def create_deck(cur, user_id: int, title: str, cards: List[Dict[str, Any]],
+                class_id: Optional[int] = None, description: Optional[str] = None) -> Tuple[int, List[int]]:
+    """
+    Create a deck with its cards in two statements (caller commits)
+
+    Returns:
+        Tuple of (deck_id, card IDs in input order)
+    """
+    now = datetime.now()
+    cur.execute("""
+        INSERT INTO flashcard_decks (class_id, user_id, title, description, card_count, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+    """, (class_id, user_id, title, description, 0, now, now))
+    deck_id = cur.fetchone()[0]
+
+    return deck_id, insert_flashcards(cur, deck_id, cards)
+
+
+def insert_test_questions(cur, test_id: int, questions: List[Dict[str, Any]], start_index: int = 0) -> List[int]:
+    """
+    Insert questions (options stored inline as JSONB) into a test (caller commits)
+
+    Args:
+        cur: Database cursor
+        test_id: Target test
+        questions: Dicts with question_text, question_type, and optional
+            correct_answer, options, explanation, points
+        start_index: order_index of the first question
+
+    Returns:
+        Question IDs in input order
+    """
+    if not questions:
+        return []
+
+    now = datetime.now()
+    rows = execute_values(cur, """
+        INSERT INTO test_questions (test_id, question_text, question_type, correct_answer, options, explanation, points, order_index, created_at)
+        VALUES %s
+        RETURNING id, order_index
+    """, [
+        (
+            test_id,
+            q['question_text'],
+            q['question_type'],
+            q.get('correct_answer'),
+            Json(q.get('options', [])),
+            q.get('explanation'),
+            q.get('points', 1),
+            start_index + idx,
+            now
+        )
+        for idx, q in enumerate(questions)
+    ], page_size=PAGE_SIZE, fetch=True)
+
+    return _ids_in_order(rows, start_index, len(questions))
+
+
+def create_test(cur, user_id: int, title: str, difficulty: str, questions: List[Dict[str, Any]],
+                class_id: Optional[int] = None, description: Optional[str] = None) -> Tuple[int, datetime, List[int]]:
+    """
+    Create a test with its questions in two statements (caller commits)
+
+    Returns:
+        Tuple of (test_id, created_at, question IDs in input order)
+    """
+    now = datetime.now()
+    cur.execute("""
+        INSERT INTO generated_tests (class_id, user_id, title, description, difficulty, question_count, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id, created_at
+    """, (class_id, user_id, title, description, difficulty, len(questions), now, now))
+    test_id, created_at = cur.fetchone()
+
+    return test_id, created_at, insert_test_questions(cur, test_id, questions)
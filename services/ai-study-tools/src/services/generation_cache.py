@@ -0,0 +1,245 @@
+"""
+Persistent cache of AI generations
+
+Entries are keyed on a SHA-256 of the generator kind, its prompt version, the
+generation parameters and a hash of the source content. The same material
+generated with the same settings, by any user, is therefore one database
+read instead of a model call. PostgreSQL (generation_cache) is the store of
+record; Redis holds recently used entries for GENERATION_CACHE_REDIS_TTL.
+
+Size is bounded by GENERATION_CACHE_MAX_BYTES of stored results. Once
+exceeded, the least recently used rows are evicted. Bumping a prompt
+version in PROMPT_VERSIONS stops its old entries from matching, and they
+age out.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+import redis
+from psycopg2.extras import Json
+
+from lm_common.redis_client import get_redis_client
+from lm_common.db_pool import get_connection
+from lm_common.logging import get_logger
+
+from ..config import settings
+
+logger = get_logger(__name__)
+
+REDIS_PREFIX = "ai:generation"
+
+# Bump a kind's version whenever its prompt in ai_service.build_prompt changes
+PROMPT_VERSIONS = {"notes": "1", "notes_merge": "1", "test": "1", "flashcards": "1"}
+
+# Delete least recently used rows beyond the byte budget
+EVICT_SQL = """
+    DELETE FROM generation_cache
+    WHERE cache_key IN (
+        SELECT cache_key FROM (
+            SELECT cache_key,
+                   SUM(size_bytes) OVER (ORDER BY last_accessed_at DESC, cache_key) AS retained_bytes
+            FROM generation_cache
+        ) ranked
+        WHERE retained_bytes > %s
+    )
+    RETURNING cache_key
+"""
+
+
+def content_hash(source_content: str) -> str:
+    """SHA-256 of source content"""
+    return hashlib.sha256(source_content.encode()).hexdigest()
+
+
+def cache_key(kind: str, source_hash: str, params: Dict[str, Any]) -> str:
+    """Key for a generation of `kind` with `params` over content hashing to `source_hash`"""
+    payload = json.dumps([kind, PROMPT_VERSIONS[kind], params, source_hash], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class GenerationCache:
+    """Generation results in PostgreSQL with a Redis front"""
+
+    def __init__(self):
+        self.redis = get_redis_client()
+        self._puts = 0
+
+    def _redis_key(self, key: str) -> str:
+        return f"{REDIS_PREFIX}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached result, or None"""
+        try:
+            cached = self.redis.get(self._redis_key(key))
+            if cached is not None:
+                return json.loads(cached)
+        except redis.RedisError as e:
+            logger.warning(f"Generation cache Redis read failed: {e}")
+
+        conn = get_connection(settings.database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE generation_cache
+                    SET hit_count = hit_count + 1, last_accessed_at = NOW()
+                    WHERE cache_key = %s
+                    RETURNING result
+                """, (key,))
+                row = cur.fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        self._set_redis(key, row[0])
+        return row[0]
+
+    def put(self, key: str, kind: str, source_hash: str, params: Dict[str, Any], result: Any,
+            source_hashes: Optional[List[str]] = None):
+        """
+        Store a result (and evict past the size budget every GENERATION_CACHE_EVICT_EVERY puts)
+
+        source_hashes lists the content hashes of every source material the
+        result was generated from (e.g. each material joined into one test),
+        so invalidating any of them removes it.
+        """
+        encoded = json.dumps(result)
+        conn = get_connection(settings.database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO generation_cache
+                        (cache_key, generator, prompt_version, content_hash, source_hashes, params, result, size_bytes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET result = EXCLUDED.result,
+                        source_hashes = EXCLUDED.source_hashes,
+                        size_bytes = EXCLUDED.size_bytes,
+                        last_accessed_at = NOW()
+                """, (key, kind, PROMPT_VERSIONS[kind], source_hash, source_hashes or [source_hash],
+                      Json(params), Json(result), len(encoded)))
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._set_redis(key, result, encoded)
+
+        self._puts += 1
+        if self._puts % settings.GENERATION_CACHE_EVICT_EVERY == 0:
+            self.evict()
+
+    def _set_redis(self, key: str, result: Any, encoded: Optional[str] = None):
+        try:
+            self.redis.set(
+                self._redis_key(key),
+                encoded if encoded is not None else json.dumps(result),
+                ex=settings.GENERATION_CACHE_REDIS_TTL
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Generation cache Redis write failed: {e}")
+
+    def _delete_redis(self, keys):
+        if not keys:
+            return
+        try:
+            self.redis.delete(*[self._redis_key(key) for key in keys])
+        except redis.RedisError as e:
+            # Entries expire within GENERATION_CACHE_REDIS_TTL regardless
+            logger.warning(f"Generation cache Redis delete failed: {e}")
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries beyond GENERATION_CACHE_MAX_BYTES
+
+        Returns:
+            Number of entries evicted
+        """
+        conn = get_connection(settings.database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(EVICT_SQL, (settings.GENERATION_CACHE_MAX_BYTES,))
+                evicted = [row[0] for row in cur.fetchall()]
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._delete_redis(evicted)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} generation cache entries")
+        return len(evicted)
+
+    def invalidate(self, cache_key: Optional[str] = None, content_hash: Optional[str] = None,
+                   generator: Optional[str] = None) -> int:
+        """
+        Delete entries matching every given filter
+
+        content_hash matches entries generated from that content, alone or
+        joined with other materials.
+
+        Returns:
+            Number of entries deleted
+        """
+        filters, params = [], []
+        if cache_key is not None:
+            filters.append("cache_key = %s")
+            params.append(cache_key)
+        if content_hash is not None:
+            filters.append("(content_hash = %s OR source_hashes @> ARRAY[%s]::text[])")
+            params += [content_hash, content_hash]
+        if generator is not None:
+            filters.append("generator = %s")
+            params.append(generator)
+        if not filters:
+            raise ValueError("At least one of cache_key, content_hash or generator is required")
+
+        conn = get_connection(settings.database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"DELETE FROM generation_cache WHERE {' AND '.join(filters)} RETURNING cache_key",
+                    params
+                )
+                deleted = [row[0] for row in cur.fetchall()]
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._delete_redis(deleted)
+        return len(deleted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, stored bytes and hits per generator"""
+        conn = get_connection(settings.database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT generator, COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(hit_count), 0)
+                    FROM generation_cache
+                    GROUP BY generator
+                """)
+                generators = {
+                    generator: {"entries": entries, "bytes": size, "hits": hits}
+                    for generator, entries, size, hits in cur.fetchall()
+                }
+            return {
+                "max_bytes": settings.GENERATION_CACHE_MAX_BYTES,
+                "bytes": sum(g["bytes"] for g in generators.values()),
+                "generators": generators
+            }
+        finally:
+            conn.close()
+
+
+_generation_cache: Optional[GenerationCache] = None
+
+
+def get_generation_cache() -> GenerationCache:
+    """Get the process-wide generation cache (singleton pattern)"""
+    global _generation_cache
+
+    if _generation_cache is None:
+        _generation_cache = GenerationCache()
+
+    return _generation_cache
@@ -0,0 +1,87 @@
+"""
+Helpers for map-reduce generation over large source material
+
+Material longer than AI_CHUNK_CHARS is split on paragraph boundaries into
+chunks. Each chunk is generated on its own (the map step), and the partial
+results are merged (the reduce step). Questions and flashcards are
+de-duplicated and interleaved across chunks locally. Partial notes are
+merged by the model.
+"""
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# progress(stage, done, total), stage is "map" or "reduce"
+ProgressCallback = Optional[Callable[[str, int, int], None]]
+
+_NORMALIZE = re.compile(r"[^a-z0-9]+")
+
+
+def chunk_content(source_content: str, max_chars: int) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, preferring paragraph breaks
+
+    A paragraph longer than max_chars is split at the last whitespace before
+    the limit (or hard at the limit if there is none).
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", source_content):
+        paragraph = paragraph.strip()
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if paragraph:
+            pieces.append(paragraph)
+
+    return pack(pieces, max_chars)
+
+
+def pack(pieces: List[str], max_chars: int, separator: str = "\n\n") -> List[str]:
+    """Greedily join consecutive pieces into groups of at most max_chars"""
+    groups: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            groups.append(current)
+            current = piece
+        else:
+            current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        groups.append(current)
+    return groups
+
+
+def per_chunk_count(total: int, chunks: int) -> int:
+    """Items to request per chunk: a fair share plus headroom for de-duplication"""
+    return max(1, math.ceil(total * 1.2 / chunks))
+
+
+def merge_items(partials: List[List[Dict[str, Any]]], field: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    De-duplicate items on a normalized text field and take up to `limit`
+
+    Items are taken round-robin across chunks so the result covers the whole
+    material rather than only its beginning.
+    """
+    seen = set()
+    merged: List[Dict[str, Any]] = []
+    for rank in range(max((len(items) for items in partials), default=0)):
+        for items in partials:
+            if rank >= len(items):
+                continue
+            item = items[rank]
+            key = _NORMALIZE.sub(" ", str(item.get(field, "")).lower()).strip()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+            if len(merged) == limit:
+                return merged
+    return merged
+
+
+def format_partial_notes(partials: List[Dict[str, str]]) -> List[str]:
+    """Render partial notes as sections for the merge prompt"""
+    return [f"## {note['title']}\n\n{note['content']}" for note in partials]
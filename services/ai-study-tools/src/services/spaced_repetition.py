@@ -0,0 +1,192 @@
+"""
+Spaced repetition scheduling (SM-2)
+
+flashcard_schedule holds each user's current interval, ease and next due
+time per card, so a review reads one row instead of searching the card's
+review history, and due cards come straight off the (user_id,
+next_review_at) index. Every review is still appended to flashcard_reviews.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+DEFAULT_INTERVAL = 1
+DEFAULT_EASE = 2.5
+
+
+def sm2(prev_interval: int, prev_ease: float, quality: int) -> Tuple[int, float]:
+    """
+    Next interval and ease factor after a review
+
+    Args:
+        prev_interval: Current interval in days
+        prev_ease: Current ease factor
+        quality: Recall quality (0-5)
+
+    Returns:
+        Tuple of (interval_days, ease_factor)
+    """
+    # Update ease factor based on quality (0-5)
+    ease = max(1.3, prev_ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)))
+
+    # Calculate new interval
+    if quality < 3:
+        interval = 1
+    elif prev_interval == 1:
+        interval = 6
+    else:
+        interval = int(prev_interval * ease)
+
+    return interval, round(ease, 2)
+
+
+def record_reviews(cur, user_id: int, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply a batch of reviews for one user (caller commits)
+
+    Reviews of the same card are applied in the given order. Unknown cards are
+    rejected without failing the rest of the batch.
+
+    Args:
+        cur: Database cursor
+        user_id: Reviewing user
+        reviews: Dicts with card_id, quality and optional reviewed_at
+
+    Returns:
+        One result per review: card_id, status ("reviewed" or "rejected"),
+        and for reviewed cards review_id, next_review_date, interval_days, ease_factor
+    """
+    card_ids = sorted({review["card_id"] for review in reviews})
+    cur.execute("""
+        SELECT f.id, f.deck_id, s.interval_days, s.ease_factor, s.review_count
+        FROM flashcards f
+        LEFT JOIN flashcard_schedule s ON s.card_id = f.id AND s.user_id = %s
+        WHERE f.id = ANY(%s)
+    """, (user_id, card_ids))
+    state = {
+        card_id: {
+            "deck_id": deck_id,
+            "interval_days": interval if interval is not None else DEFAULT_INTERVAL,
+            "ease_factor": float(ease) if ease is not None else DEFAULT_EASE,
+            "review_count": count or 0
+        }
+        for card_id, deck_id, interval, ease, count in cur.fetchall()
+    }
+
+    results: List[Dict[str, Any]] = []
+    history = []
+    now = datetime.now()
+    for review in reviews:
+        card = state.get(review["card_id"])
+        if card is None:
+            results.append({"card_id": review["card_id"], "status": "rejected", "error": "Card not found"})
+            continue
+
+        reviewed_at = review.get("reviewed_at") or now
+        interval, ease = sm2(card["interval_days"], card["ease_factor"], review["quality"])
+        next_review = reviewed_at + timedelta(days=interval)
+        card.update(
+            interval_days=interval, ease_factor=ease, review_count=card["review_count"] + 1,
+            last_quality=review["quality"], last_reviewed_at=reviewed_at, next_review_at=next_review
+        )
+
+        history.append((review["card_id"], user_id, review["quality"], next_review, interval, ease, reviewed_at))
+        results.append({
+            "card_id": review["card_id"],
+            "status": "reviewed",
+            "next_review_date": next_review,
+            "interval_days": interval,
+            "ease_factor": ease
+        })
+
+    if not history:
+        return results
+
+    # Reserve IDs up front so each review maps back to its result
+    cur.execute("SELECT nextval('flashcard_reviews_id_seq') FROM generate_series(1, %s)", (len(history),))
+    review_ids = [row[0] for row in cur.fetchall()]
+    execute_values(cur, """
+        INSERT INTO flashcard_reviews (id, card_id, user_id, quality, next_review_date, interval_days, ease_factor, reviewed_at)
+        VALUES %s
+    """, [(review_id, *row) for review_id, row in zip(review_ids, history)], page_size=len(history))
+    for result, review_id in zip((r for r in results if r["status"] == "reviewed"), review_ids):
+        result["review_id"] = review_id
+
+    execute_values(cur, """
+        INSERT INTO flashcard_schedule
+            (user_id, card_id, deck_id, interval_days, ease_factor, review_count,
+             last_quality, last_reviewed_at, next_review_at)
+        VALUES %s
+        ON CONFLICT (user_id, card_id) DO UPDATE
+        SET interval_days = EXCLUDED.interval_days,
+            ease_factor = EXCLUDED.ease_factor,
+            review_count = EXCLUDED.review_count,
+            last_quality = EXCLUDED.last_quality,
+            last_reviewed_at = EXCLUDED.last_reviewed_at,
+            next_review_at = EXCLUDED.next_review_at
+    """, [
+        (user_id, card_id, card["deck_id"], card["interval_days"], card["ease_factor"], card["review_count"],
+         card["last_quality"], card["last_reviewed_at"], card["next_review_at"])
+        for card_id, card in sorted(state.items())
+        if "next_review_at" in card
+    ], page_size=len(card_ids))
+
+    return results
+
+
+def due_cards(cur, user_id: int, deck_id: Optional[int] = None, limit: int = 50,
+              include_new: bool = True) -> List[Dict[str, Any]]:
+    """
+    Cards due for review now, most overdue first, then never-reviewed cards
+
+    New cards come from the user's own decks, in deck order, and only fill
+    whatever room `limit` leaves after due cards.
+    """
+    now = datetime.now()
+    deck_filter = "AND s.deck_id = %s" if deck_id is not None else ""
+    params: List[Any] = [user_id, now] + ([deck_id] if deck_id is not None else []) + [limit]
+    cur.execute(f"""
+        SELECT f.id, f.deck_id, f.front_text, f.back_text,
+               s.interval_days, s.ease_factor, s.next_review_at
+        FROM flashcard_schedule s
+        JOIN flashcards f ON f.id = s.card_id
+        WHERE s.user_id = %s AND s.next_review_at <= %s {deck_filter}
+        ORDER BY s.next_review_at
+        LIMIT %s
+    """, params)
+    cards = [
+        {
+            "card_id": card_id, "deck_id": card_deck, "front_text": front, "back_text": back,
+            "interval_days": interval, "ease_factor": float(ease),
+            "next_review_date": next_review, "is_new": False
+        }
+        for card_id, card_deck, front, back, interval, ease, next_review in cur.fetchall()
+    ]
+
+    remaining = limit - len(cards)
+    if include_new and remaining > 0:
+        deck_filter = "AND f.deck_id = %s" if deck_id is not None else ""
+        params = [user_id] + ([deck_id] if deck_id is not None else []) + [user_id, remaining]
+        cur.execute(f"""
+            SELECT f.id, f.deck_id, f.front_text, f.back_text
+            FROM flashcards f
+            JOIN flashcard_decks d ON d.id = f.deck_id
+            WHERE d.user_id = %s {deck_filter}
+              AND NOT EXISTS (
+                  SELECT 1 FROM flashcard_schedule s
+                  WHERE s.user_id = %s AND s.card_id = f.id
+              )
+            ORDER BY f.deck_id, f.order_index
+            LIMIT %s
+        """, params)
+        cards += [
+            {
+                "card_id": card_id, "deck_id": card_deck, "front_text": front, "back_text": back,
+                "interval_days": DEFAULT_INTERVAL, "ease_factor": DEFAULT_EASE,
+                "next_review_date": None, "is_new": True
+            }
+            for card_id, card_deck, front, back in cur.fetchall()
+        ]
+
+    return cards
@@ -2,10 +2,19 @@
 E2E Tests for AI Study Tools Service
 Following zero-tolerance testing principles
 """
+import os
+import sys
+
 import requests
 import json
 
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.map_reduce import chunk_content, merge_items
+from src.services.spaced_repetition import sm2
+
 BASE_URL = "http://localhost:8009"
+UNKNOWN_CARD_ID = 2147483647
 
 def test_health():
     """Test health endpoint"""
@@ -69,6 +78,82 @@ def test_review_flashcard(card_id):
     assert data["interval_days"] > 0
     print(f"[OK] Recorded review: Next review in {data['interval_days']} days")
 
+def test_sm2_progression():
+    """Test SM-2 intervals and ease factor across consecutive reviews"""
+    assert sm2(1, 2.5, 4) == (6, 2.5)
+    assert sm2(6, 2.5, 4) == (15, 2.5)
+    assert sm2(15, 2.5, 5) == (39, 2.6)
+    # A failed recall resets the interval and lowers the ease, never below 1.3
+    assert sm2(15, 2.5, 2) == (1, 2.18)
+    assert sm2(6, 1.3, 0) == (1, 1.3)
+    print("[OK] SM-2 interval progression")
+
+def test_chunk_content():
+    """Test splitting large material into bounded chunks"""
+    paragraphs = [f"Paragraph {i} " + "word " * 40 for i in range(10)]
+    chunks = chunk_content("\n\n".join(paragraphs), 500)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert " ".join(chunks).split() == " ".join(paragraphs).split()
+    
+    # A paragraph without whitespace is cut hard at the limit
+    assert chunk_content("x" * 1200, 500) == ["x" * 500, "x" * 500, "x" * 200]
+    print(f"[OK] Chunked material into {len(chunks)} chunks")
+
+def test_merge_items():
+    """Test round-robin de-duplication of per-chunk results"""
+    partials = [
+        [{"front_text": "What is DNA?"}, {"front_text": "Define RNA"}],
+        [{"front_text": "what is  dna"}, {"front_text": "What is a gene?"}],
+        [{"front_text": ""}, {"front_text": "Define RNA."}, {"front_text": "What is a codon?"}]
+    ]
+    merged = merge_items(partials, "front_text", 3)
+    assert [item["front_text"] for item in merged] == ["What is DNA?", "Define RNA", "What is a gene?"]
+    assert len(merge_items(partials, "front_text", 10)) == 4
+    print("[OK] Merged chunk results without duplicates")
+
+def test_review_batch(deck_id):
+    """Test a batch review: results map back to their reviews, unknown cards are rejected"""
+    card_id = test_create_flashcard(deck_id)
+    payload = {
+        "user_id": 1,
+        "reviews": [
+            {"card_id": card_id, "quality": 4},
+            {"card_id": UNKNOWN_CARD_ID, "quality": 3},
+            {"card_id": card_id, "quality": 5}
+        ]
+    }
+    response = requests.post(f"{BASE_URL}/api/flashcards/reviews/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reviewed"] == 2
+    assert data["rejected"] == 1
+    
+    first, unknown, second = data["results"]
+    assert first["card_id"] == card_id and first["status"] == "reviewed"
+    assert unknown["card_id"] == UNKNOWN_CARD_ID and unknown["status"] == "rejected"
+    assert unknown["review_id"] is None
+    assert second["card_id"] == card_id and second["status"] == "reviewed"
+    # Reviews of one card apply in order, and IDs are assigned in input order
+    assert first["interval_days"] == 6
+    assert second["interval_days"] == 15
+    assert first["review_id"] < second["review_id"]
+    print(f"[OK] Batch review: IDs {first['review_id']}, {second['review_id']}")
+    return card_id
+
+def test_due_cards(deck_id, reviewed_card_ids):
+    """Test due cards: reviewed cards are scheduled out, new cards fill the list"""
+    new_card_id = test_create_flashcard(deck_id)
+    response = requests.get(f"{BASE_URL}/api/flashcards/due", params={"user_id": 1, "deck_id": deck_id})
+    assert response.status_code == 200
+    data = response.json()
+    assert all(card["deck_id"] == deck_id for card in data)
+    due_ids = {card["card_id"] for card in data}
+    assert not due_ids & set(reviewed_card_ids)
+    assert new_card_id in due_ids
+    assert all(card["is_new"] for card in data if card["card_id"] == new_card_id)
+    print(f"[OK] {len(data)} cards due in deck")
+
 def test_list_user_decks():
     """Test listing all decks for a user"""
     response = requests.get(f"{BASE_URL}/api/flashcards/decks/user/1")
@@ -103,8 +188,19 @@ def run_all_tests():
         # Test 6: List decks
         test_list_user_decks()
         
+        # Test 7-9: Scheduling and chunking logic
+        test_sm2_progression()
+        test_chunk_content()
+        test_merge_items()
+        
+        # Test 10: Batch review
+        batch_card_id = test_review_batch(deck_id)
+        
+        # Test 11: Due cards
+        test_due_cards(deck_id, [card_id, batch_card_id])
+        
         print("\n" + "="*60)
-        print("[SUCCESS] ALL TESTS PASSED (6/6)")
+        print("[SUCCESS] ALL TESTS PASSED (11/11)")
         print("="*60 + "\n")
         return True
         
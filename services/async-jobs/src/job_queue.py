@@ -0,0 +1,278 @@
+"""
+Async Jobs Service - Reliable Job Queue
+At-least-once delivery on top of the plain Redis lists producers already use
+(lm_common.queue_push): a claimed job is atomically moved into an in-flight
+hash with a lease, and only removed once acknowledged
+
+Redis layout:
+    {queue}                  producer list (RPUSH), one per job type
+    jobs:inflight            hash token -> {"queue", "payload", "attempt"}
+    jobs:leases              sorted set token -> lease deadline (visibility timeout)
+    jobs:delayed             sorted set of retry/deferred envelopes -> due time
+    jobs:dead                dead-letter list of jobs that exhausted their retries
+
+Queues are claimed in priority order, so a backlog of low-priority work never
+delays a higher-priority job type.
+"""
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from lm_common.redis_client import get_redis_client
+
+INFLIGHT_KEY = "jobs:inflight"
+LEASES_KEY = "jobs:leases"
+DELAYED_KEY = "jobs:delayed"
+DEAD_LETTER_KEY = "jobs:dead"
+
+VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))  # seconds before an unacked job is redelivered
+MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "3"))
+RETRY_BACKOFF_BASE = float(os.getenv("JOB_RETRY_BACKOFF_BASE", "10"))  # seconds, doubled per attempt
+RETRY_BACKOFF_MAX = float(os.getenv("JOB_RETRY_BACKOFF_MAX", "900"))  # seconds
+
+# Pop from the first non-empty queue and lease it, atomically
+_CLAIM_SCRIPT = """
+for i, queue in ipairs(KEYS) do
+    local raw = redis.call('LPOP', queue)
+    if raw then
+        local entry = cjson.encode({queue = queue, payload = raw, attempt = 0})
+        local ok, envelope = pcall(cjson.decode, raw)
+        if ok and type(envelope) == 'table' and envelope['_retry'] then
+            entry = cjson.encode({queue = queue, payload = envelope['payload'], attempt = envelope['attempt']})
+        end
+        redis.call('HSET', ARGV[1], ARGV[3], entry)
+        redis.call('ZADD', ARGV[2], ARGV[4], ARGV[3])
+        return {ARGV[3], entry}
+    end
+end
+return nil
+"""
+
+# Return expired leases to the head of their queue; a lease that expires counts
+# as an attempt, so a job that keeps killing its worker ends up dead-lettered.
+# Returns {requeued count, dead-letter record...} so callers can settle dead jobs.
+_REQUEUE_EXPIRED_SCRIPT = """
+local tokens = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, 100)
+local result = {#tokens}
+for _, token in ipairs(tokens) do
+    local entry = redis.call('HGET', KEYS[1], token)
+    if entry then
+        local job = cjson.decode(entry)
+        local attempt = tonumber(job['attempt']) + 1
+        if attempt > tonumber(ARGV[2]) then
+            local record = cjson.encode({
+                queue = job['queue'], payload = job['payload'], attempts = attempt,
+                error = 'visibility timeout expired', failed_at = tonumber(ARGV[1])
+            })
+            redis.call('RPUSH', KEYS[3], record)
+            table.insert(result, record)
+        else
+            local envelope = cjson.encode({_retry = true, payload = job['payload'], attempt = attempt})
+            redis.call('LPUSH', job['queue'], envelope)
+        end
+        redis.call('HDEL', KEYS[1], token)
+    end
+    redis.call('ZREM', KEYS[2], token)
+end
+return result
+"""
+
+# Move retries whose backoff has elapsed back onto their queue
+_PROMOTE_DELAYED_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, raw in ipairs(due) do
+    local envelope = cjson.decode(raw)
+    redis.call('RPUSH', envelope['queue'], raw)
+    redis.call('ZREM', KEYS[1], raw)
+end
+return #due
+"""
+
+
+class ClaimedJob:
+    """A job leased to this worker until acked, retried or dead-lettered"""
+
+    def __init__(self, token: str, queue: str, payload: Any, attempt: int):
+        self.token = token
+        self.queue = queue
+        self.payload = payload
+        self.attempt = attempt
+
+    def __repr__(self):
+        return f"<ClaimedJob(queue='{self.queue}', attempt={self.attempt})>"
+
+
+class ReliableQueue:
+    """Leased, retrying consumer for a priority-ordered set of Redis list queues"""
+
+    def __init__(self, queues: List[str], visibility_timeout: int = VISIBILITY_TIMEOUT):
+        self.queues = queues
+        self.visibility_timeout = visibility_timeout
+        self.client = get_redis_client()
+        self._claim = self.client.register_script(_CLAIM_SCRIPT)
+        self._requeue_expired = self.client.register_script(_REQUEUE_EXPIRED_SCRIPT)
+        self._promote_delayed = self.client.register_script(_PROMOTE_DELAYED_SCRIPT)
+
+    def claim(self, timeout: float = 5.0, poll_interval: float = 0.5) -> Optional[ClaimedJob]:
+        """
+        Lease the next job from the highest-priority non-empty queue
+
+        Args:
+            timeout: Seconds to wait for a job
+            poll_interval: Seconds between empty polls
+
+        Returns:
+            ClaimedJob, or None if nothing arrived within the timeout
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            token = uuid.uuid4().hex
+            result = self._claim(
+                keys=self.queues,
+                args=[INFLIGHT_KEY, LEASES_KEY, token, time.time() + self.visibility_timeout]
+            )
+            if result:
+                token, entry = result
+                entry = json.loads(entry)
+                return ClaimedJob(token, entry["queue"], _decode(entry["payload"]), int(entry["attempt"]))
+
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def extend(self, tokens: List[str]) -> None:
+        """Push lease deadlines out for jobs that are still running (heartbeat)"""
+        if tokens:
+            deadline = time.time() + self.visibility_timeout
+            self.client.zadd(LEASES_KEY, {token: deadline for token in tokens}, xx=True)
+
+    def ack(self, job: ClaimedJob) -> None:
+        """Job finished; drop it from the in-flight set"""
+        pipe = self.client.pipeline()
+        pipe.hdel(INFLIGHT_KEY, job.token)
+        pipe.zrem(LEASES_KEY, job.token)
+        pipe.execute()
+
+    def defer(self, job: ClaimedJob, delay: float) -> None:
+        """
+        Release a job that has more work to do later, e.g. one waiting on
+        uploads; it comes back with its (updated) payload after `delay`
+        seconds without counting as a failed attempt
+        """
+        envelope = json.dumps({
+            "_retry": True,
+            "queue": job.queue,
+            "payload": json.dumps(job.payload),
+            "attempt": job.attempt,
+            "id": job.token
+        })
+        pipe = self.client.pipeline()
+        pipe.zadd(DELAYED_KEY, {envelope: time.time() + delay})
+        pipe.hdel(INFLIGHT_KEY, job.token)
+        pipe.zrem(LEASES_KEY, job.token)
+        pipe.execute()
+
+    def fail(self, job: ClaimedJob, error: str, max_retries: int = MAX_RETRIES) -> bool:
+        """
+        Retry with exponential backoff, or dead-letter once retries are exhausted
+
+        Returns:
+            True if the job will be retried
+        """
+        attempt = job.attempt + 1
+        pipe = self.client.pipeline()
+
+        if attempt <= max_retries:
+            delay = min(RETRY_BACKOFF_BASE * (2 ** (attempt - 1)), RETRY_BACKOFF_MAX)
+            envelope = json.dumps({
+                "_retry": True,
+                "queue": job.queue,
+                "payload": json.dumps(job.payload),
+                "attempt": attempt,
+                "id": job.token
+            })
+            pipe.zadd(DELAYED_KEY, {envelope: time.time() + delay})
+        else:
+            pipe.rpush(DEAD_LETTER_KEY, json.dumps({
+                "queue": job.queue,
+                "payload": job.payload,
+                "attempts": attempt,
+                "error": error,
+                "failed_at": time.time()
+            }))
+
+        pipe.hdel(INFLIGHT_KEY, job.token)
+        pipe.zrem(LEASES_KEY, job.token)
+        pipe.execute()
+
+        return attempt <= max_retries
+
+    def maintain(self) -> Dict[str, Any]:
+        """
+        Redeliver expired leases and release due retries (safe to run from every worker)
+
+        Returns:
+            Dict with requeued and retried counts, and dead: the payloads and
+            errors of jobs dead-lettered because their last lease expired
+            (nothing else records their failure)
+        """
+        now = time.time()
+        requeued, *dead = self._requeue_expired(
+            keys=[INFLIGHT_KEY, LEASES_KEY, DEAD_LETTER_KEY],
+            args=[now, MAX_RETRIES]
+        )
+        dead = [json.loads(record) for record in dead]
+        return {
+            "requeued": requeued - len(dead),
+            "retried": self._promote_delayed(keys=[DELAYED_KEY], args=[now]),
+            "dead": [{"payload": _decode(record["payload"]), "error": record["error"]} for record in dead]
+        }
+
+    def pending_payloads(self, queue: str) -> List[Any]:
+        """Payloads for a queue that are waiting, in flight or scheduled for retry"""
+        raw_items = list(self.client.lrange(queue, 0, -1))
+
+        for entry in self.client.hvals(INFLIGHT_KEY):
+            entry = json.loads(entry)
+            if entry["queue"] == queue:
+                raw_items.append(entry["payload"])
+
+        for envelope in self.client.zrange(DELAYED_KEY, 0, -1):
+            envelope = json.loads(envelope)
+            if envelope["queue"] == queue:
+                raw_items.append(envelope["payload"])
+
+        payloads = []
+        for raw in raw_items:
+            payload = _decode(raw)
+            if isinstance(payload, dict) and payload.get("_retry"):
+                payload = _decode(payload["payload"])
+            payloads.append(payload)
+        return payloads
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depths for monitoring"""
+        pipe = self.client.pipeline()
+        for queue in self.queues:
+            pipe.llen(queue)
+        pipe.hlen(INFLIGHT_KEY)
+        pipe.zcard(DELAYED_KEY)
+        pipe.llen(DEAD_LETTER_KEY)
+        results = pipe.execute()
+
+        return {
+            "queues": dict(zip(self.queues, results[:len(self.queues)])),
+            "in_flight": results[-3],
+            "delayed": results[-2],
+            "dead": results[-1]
+        }
+
+
+def _decode(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except (TypeError, json.JSONDecodeError):
+        return raw
@@ -1,16 +1,58 @@
 """
 Async Jobs Service - Background Worker
-Processes jobs from Redis queue
+Processes jobs from Redis queues with leased (at-least-once) delivery,
+retries with backoff and a dead-letter queue
 Extracted from POC 08 - Adapted for transcription
+
+Scaling: WORKER_PROCESSES processes, each running WORKER_CONCURRENCY jobs on
+a thread pool; every process claims from the same priority-ordered queues.
 """
+import asyncio
 import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from sqlalchemy.orm import Session
 from lm_common.database import get_db_session
-from lm_common.redis_client import queue_pop
+from lm_common.redis_client import queue_push
 import sys
 sys.path.insert(0, '/app')
 from src.models import Job
+from src.job_queue import ClaimedJob, ReliableQueue, MAX_RETRIES
+
+# Queues consumed by this worker, highest priority first
+TRANSCRIPTION_QUEUE = "transcription_jobs"
+TEXTBOOK_QUEUE = os.getenv("TEXTBOOK_JOB_QUEUE", "textbook_jobs")
+QUEUES = [
+    queue.strip()
+    for queue in os.getenv("JOB_QUEUES", f"{TRANSCRIPTION_QUEUE},{TEXTBOOK_QUEUE}").split(",")
+    if queue.strip()
+]
+
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+MAINTENANCE_INTERVAL = 5  # seconds between lease/retry sweeps
+
+
+class UnknownJobTypeError(ValueError):
+    """Job type has no handler; retrying cannot help"""
+
+
+class JobDeferred(Exception):
+    """Job made what progress it could and should run again after `delay` seconds"""
+
+    def __init__(self, delay: float):
+        super().__init__(f"Deferred for {delay}s")
+        self.delay = delay
+
+# Content capture sources (textbook processing pipeline)
+CONTENT_CAPTURE_SRC = os.getenv("CONTENT_CAPTURE_SRC", "../../content-capture/src")
+# Same value as content-capture's textbook_processor.TEXTBOOK_JOB_TYPE; kept
+# here so code that only routes or recovers jobs never imports the pipeline
+TEXTBOOK_JOB_TYPE = "textbook_processing"
 
 
 class JobWorker:
@@ -19,85 +61,485 @@ class JobWorker:
     def __init__(self):
         """Initialize worker"""
         self.running = False
+        self._textbook_processor = None
+        self._whisper = None
+        self.queue = ReliableQueue(QUEUES)
+        self._active_tokens = set()
+        self._active_lock = threading.Lock()
     
-    def process_transcription_job(self, job: Job, payload: dict, db: Session):
-        """Process transcription job"""
-        # Import here to avoid circular dependencies
-        import sys
-        sys.path.insert(0, "../../speech-to-text/src")
-        from services.whisper_service import WhisperService
-        
-        whisper = WhisperService()
-        result = whisper.transcribe(payload['file_path'], payload.get('language'))
-        
-        # Store result
-        from ..models import Transcription, TranscriptionJob
-        transcription = Transcription(
-            job_id=payload['job_id'],
-            user_id=job.user_id or 1,
-            text=result['text'],
-            confidence=result.get('confidence'),
-            language=result.get('language')
+    def _get_whisper(self):
+        """Shared Whisper service; the model is loaded once and reused by every job"""
+        if self._whisper is None:
+            from speech_to_text.services.whisper_service import WhisperService
+            self._whisper = WhisperService()
+            self._whisper.load_model()
+        return self._whisper
+    
+    def _get_parallel_transcriber(self):
+        """Split-and-merge transcriber with its own persistent process pool"""
+        from speech_to_text.services.parallel_transcriber import get_parallel_transcriber
+        return get_parallel_transcriber()
+    
+    def _get_concurrency(self) -> int:
+        """Jobs run at once in this process: WORKER_CONCURRENCY, else what the Whisper pool supports
+        
+        The default comes from this process's share of the cores (cores /
+        WORKER_PROCESSES), so a multi-process worker does not oversubscribe.
+        """
+        configured = int(os.getenv("WORKER_CONCURRENCY", "0"))
+        if configured > 0:
+            return configured
+        from speech_to_text.services.whisper_service import get_concurrency
+        return get_concurrency()
+    
+    def _get_textbook_processor(self):
+        """Load the textbook pipeline once; the embedding model is expensive to load"""
+        if self._textbook_processor is None:
+            if CONTENT_CAPTURE_SRC not in sys.path:
+                sys.path.insert(0, CONTENT_CAPTURE_SRC)
+            from services.textbook_processor import TextbookProcessor
+            self._textbook_processor = TextbookProcessor()
+        return self._textbook_processor
+    
+    def process_textbook_job(self, job: Job, payload: dict, db: Session):
+        """Process textbook extraction and embedding job
+        
+        Chunks are checkpointed as they are embedded, so re-running a job
+        for the same textbook resumes after the last committed chunk.
+        """
+        processor = self._get_textbook_processor()
+        textbook_id = payload['textbook_id']
+        
+        def report_progress(pages_processed: int, page_count: int):
+            print(f"Textbook {textbook_id}: {pages_processed}/{page_count} pages processed")
+        
+        return asyncio.run(
+            processor.process(db, textbook_id, progress_callback=report_progress)
         )
-        db.add(transcription)
+    
+    def recover_textbook_jobs(self):
+        """Re-queue textbooks left in 'processing' with no job queued or in flight
+        
+        Jobs claimed by a crashed worker come back through lease expiry; this
+        only catches books whose queue entry was lost altogether.
+        """
+        # Only the models: the supervisor must not load the embedding pipeline
+        if CONTENT_CAPTURE_SRC not in sys.path:
+            sys.path.insert(0, CONTENT_CAPTURE_SRC)
+        from models import TextbookDownload
+        
+        pending = {
+            payload.get('textbook_id')
+            for payload in self.queue.pending_payloads(TEXTBOOK_QUEUE)
+            if isinstance(payload, dict)
+        }
+        
+        with get_db_session() as db:
+            stalled = db.query(TextbookDownload).filter(
+                TextbookDownload.embedding_status == 'processing'
+            ).all()
+            
+            for textbook in stalled:
+                if textbook.id in pending:
+                    continue
+                print(f"Resuming textbook {textbook.id} from page {textbook.pages_processed}")
+                queue_push(TEXTBOOK_QUEUE, {
+                    "job_type": TEXTBOOK_JOB_TYPE,
+                    "textbook_id": textbook.id,
+                    "user_id": textbook.user_id
+                })
+    
+    def process_transcription_job(self, job: Job, payload: dict, db: Session):
+        """Process transcription job
+        
+        Segments are persisted to transcription_segments and published as
+        they decode, so long lectures are viewable while still running.
+        Multi-part uploads ("chunked" payloads) are queued when their first
+        part lands. Each run transcribes the parts that are ready, records the
+        next part and time offset in the payload, and defers the job until
+        more parts arrive, so waiting on a slow client never holds a worker.
+        """
+        from speech_to_text.config import settings as stt_settings
+        from speech_to_text.models import Transcription, TranscriptionJob, TranscriptionSegment
+        from speech_to_text.services.progress_service import publish_progress
+        from speech_to_text.services.upload_service import ready_parts
+        
+        whisper = self._get_whisper()
+        language = payload.get('language')
+        vad_filter = payload.get('vad_filter')
+        job_id = payload['job_id']
+        resume = payload.get('resume') or {}
+        
+        trans_job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+        created_at = trans_job.created_at.isoformat() if trans_job and trans_job.created_at else None
+        
+        def publish(status: str, percent=None, text=None, **extra):
+            try:
+                publish_progress(job_id, status, percent=percent, text=text, created_at=created_at, **extra)
+            except Exception as e:
+                print(f"Progress publish failed for job {job_id}: {e}")
+        
+        # A redelivered job starts over from its last recorded part; drop
+        # segments written after it by the earlier attempt
+        db.query(TranscriptionSegment).filter(
+            TranscriptionSegment.job_id == job_id,
+            TranscriptionSegment.segment_index >= resume.get('segments', 0)
+        ).delete(synchronize_session=False)
+        if trans_job and not resume:
+            trans_job.status = 'processing'
+            trans_job.started_at = datetime.utcnow()
+        db.commit()
+        if not resume:
+            publish('processing', percent=0)
+        
+        texts = []
+        pending = []
+        segment_count = resume.get('segments', 0)
+        
+        def consume(details: dict, segments, offset: float = 0.0, whole_file: bool = True):
+            """Persist and publish segments of one audio file, numbered across parts"""
+            nonlocal segment_count
+            duration = details['duration']
+            
+            for segment in segments:
+                start = round(offset + segment['start'], 2)
+                end = round(offset + segment['end'], 2)
+                pending.append(TranscriptionSegment(
+                    job_id=job_id,
+                    segment_index=segment_count,
+                    start_time=start,
+                    end_time=end,
+                    text=segment['text']
+                ))
+                segment_count += 1
+                if segment['text']:
+                    texts.append(segment['text'])
+                
+                # Commit in small batches: visible quickly without a commit per segment
+                if len(pending) >= stt_settings.SEGMENT_FLUSH_SIZE:
+                    db.add_all(pending)
+                    db.commit()
+                    pending.clear()
+                
+                percent = round(min(segment['end'] / duration, 1.0) * 100, 1) if whole_file and duration else None
+                publish('processing', percent=percent, text=segment['text'], start=start, end=end)
+            
+            if pending:
+                db.add_all(pending)
+                db.commit()
+                pending.clear()
+        
+        try:
+            if payload.get('chunked'):
+                next_part = resume.get('next_part', 0)
+                offset = resume.get('offset', 0.0)
+                paths, complete = ready_parts(job_id, next_part)
+                for path in paths:
+                    details, segments = whisper.stream(path, language, vad_filter)
+                    consume(details, segments, offset, whole_file=False)
+                    next_part += 1
+                    offset += details['duration']
+                    # Segments up to here are committed; a retry resumes after this part
+                    resume = payload['resume'] = {
+                        'next_part': next_part,
+                        'offset': offset,
+                        'segments': segment_count,
+                        'confidence_sum': resume.get('confidence_sum', 0.0) + details['confidence'],
+                        'language': resume.get('language') or details['language']
+                    }
+                
+                if not complete:
+                    raise JobDeferred(stt_settings.UPLOAD_POLL_INTERVAL)
+                
+                result = {
+                    'language': resume.get('language') or language,
+                    'confidence': round(resume['confidence_sum'] / next_part, 2) if next_part else None,
+                    'duration': round(offset, 2),
+                    'parts': next_part
+                }
+                # Earlier runs' text is only in the stored segments
+                texts = [
+                    text for (text,) in db.query(TranscriptionSegment.text).filter(
+                        TranscriptionSegment.job_id == job_id
+                    ).order_by(TranscriptionSegment.segment_index) if text
+                ]
+            else:
+                # Long recordings can be split at silence and transcribed across a process pool
+                transcriber = self._get_parallel_transcriber() if stt_settings.PARALLEL_TRANSCRIPTION else whisper
+                details, segments = transcriber.stream(payload['file_path'], language, vad_filter)
+                consume(details, segments)
+                result = dict(details)
+            
+            result['segments'] = segment_count
+        except JobDeferred:
+            raise
+        except Exception as e:
+            db.rollback()
+            status = 'retrying' if (job.retry_count or 0) < (job.max_retries or 0) else 'failed'
+            if trans_job:
+                trans_job.status = status
+                trans_job.error_message = str(e)
+                db.commit()
+            publish(status, error=str(e))
+            raise
+        
+        text = " ".join(texts)
+        
+        # Store result (a redelivered job may already have stored it)
+        transcription = db.query(Transcription).filter(Transcription.job_id == job_id).first()
+        if not transcription:
+            transcription = Transcription(job_id=job_id, user_id=job.user_id or 1)
+            db.add(transcription)
+        transcription.text = text
+        transcription.confidence = result.get('confidence')
+        transcription.language = result.get('language')
         
         # Update job
-        trans_job = db.query(TranscriptionJob).filter(TranscriptionJob.id == payload['job_id']).first()
         if trans_job:
             trans_job.status = 'completed'
+            trans_job.audio_duration = result.get('duration')
             trans_job.completed_at = datetime.utcnow()
+        db.commit()
+        
+        # Published after the commit so clients can fetch the result immediately
+        publish('completed', percent=100, duration=result.get('duration'))
         
         return result
     
-    def process_job(self, job_data: dict):
-        """Process a single job"""
+    def process_job(self, job_data: dict, attempt: int = 0):
+        """Process a single job, raising if it failed
+        
+        One Job row tracks a job across retries; its id travels in the
+        payload as `_record_id`.
+        """
         with get_db_session() as db:
-            job_id = job_data.get('job_id')
+            record_id = job_data.get('_record_id')
             job_type = job_data.get('job_type', 'transcription')
             
             # Get or create job
-            job = db.query(Job).filter(Job.id == job_id).first() if job_id else None
+            job = db.query(Job).filter(Job.id == record_id).first() if record_id else None
             if not job:
                 job = Job(
+                    user_id=job_data.get('user_id'),
                     job_type=job_type,
-                    status='processing',
                     payload=json.dumps(job_data),
-                    started_at=datetime.utcnow()
+                    max_retries=MAX_RETRIES
                 )
                 db.add(job)
-                db.commit()
+            job.status = 'processing'
+            job.started_at = datetime.utcnow()
+            job.retry_count = attempt
+            db.commit()
+            job_data['_record_id'] = job.id
             
             try:
                 # Route to handler
                 if job_type == 'transcription':
                     result = self.process_transcription_job(job, job_data, db)
+                elif job_type == TEXTBOOK_JOB_TYPE:
+                    result = self.process_textbook_job(job, job_data, db)
                 else:
-                    result = {"error": "Unknown job type"}
+                    raise UnknownJobTypeError(f"Unknown job type: {job_type}")
                 
                 # Update job
                 job.status = 'completed'
                 job.result = json.dumps(result)
+                job.error_message = None
                 job.completed_at = datetime.utcnow()
                 db.commit()
                 
+            except JobDeferred:
+                job.status = 'waiting'
+                job.payload = json.dumps(job_data)
+                db.commit()
+                raise
             except Exception as e:
-                job.status = 'failed'
+                db.rollback()
+                retrying = attempt < job.max_retries and not isinstance(e, UnknownJobTypeError)
+                job.status = 'retrying' if retrying else 'failed'
                 job.error_message = str(e)
-                job.retry_count += 1
+                job.retry_count = attempt + 1
                 db.commit()
+                raise
+    
+    def handle(self, claimed: ClaimedJob):
+        """Run a claimed job and settle its lease: ack, retry or dead-letter"""
+        job_data = claimed.payload if isinstance(claimed.payload, dict) else {"value": claimed.payload}
+        
+        with self._active_lock:
+            self._active_tokens.add(claimed.token)
+        
+        try:
+            self.process_job(job_data, claimed.attempt)
+            self.queue.ack(claimed)
+        except JobDeferred as e:
+            claimed.payload = job_data
+            self.queue.defer(claimed, e.delay)
+        except Exception as e:
+            max_retries = 0 if isinstance(e, UnknownJobTypeError) else MAX_RETRIES
+            claimed.payload = job_data
+            if self.queue.fail(claimed, str(e), max_retries=max_retries):
+                print(f"Job failed (attempt {claimed.attempt + 1}), retrying: {e}")
+            else:
+                print(f"Job failed permanently, moved to dead-letter queue: {e}")
+        finally:
+            with self._active_lock:
+                self._active_tokens.discard(claimed.token)
     
-    def run(self):
+    def fail_expired(self, dead: list):
+        """Record failure of jobs dead-lettered by lease expiry
+        
+        Their worker died mid-job, so no exception path marked them failed
+        or published their terminal progress event; do both here.
+        """
+        for entry in dead:
+            job_data = entry['payload'] if isinstance(entry['payload'], dict) else {}
+            error = entry['error']
+            try:
+                with get_db_session() as db:
+                    record_id = job_data.get('_record_id')
+                    job = db.query(Job).filter(Job.id == record_id).first() if record_id else None
+                    if job:
+                        job.status = 'failed'
+                        job.error_message = error
+                        job.completed_at = datetime.utcnow()
+                    
+                    job_id = job_data.get('job_id')
+                    if job_data.get('job_type', 'transcription') == 'transcription' and job_id:
+                        from speech_to_text.models import TranscriptionJob
+                        from speech_to_text.services.progress_service import publish_progress
+                        
+                        trans_job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+                        if trans_job:
+                            trans_job.status = 'failed'
+                            trans_job.error_message = error
+                        db.commit()
+                        created_at = trans_job.created_at.isoformat() if trans_job and trans_job.created_at else None
+                        publish_progress(job_id, 'failed', created_at=created_at, error=error)
+                    else:
+                        db.commit()
+                print(f"Job dead-lettered after lease expiry: {job_data}")
+            except Exception as e:
+                print(f"Recording expired job failure failed for {job_data}: {e}")
+    
+    def _heartbeat(self):
+        """Keep leases of running jobs alive; long transcriptions outlive one visibility timeout"""
+        interval = max(1, self.queue.visibility_timeout // 3)
+        while True:  # Daemon thread: also covers jobs draining after stop()
+            time.sleep(interval)
+            with self._active_lock:
+                tokens = list(self._active_tokens)
+            try:
+                self.queue.extend(tokens)
+            except Exception as e:
+                print(f"Lease heartbeat failed: {e}")
+    
+    def stop(self, *_):
+        """Stop claiming new jobs; running jobs finish first"""
+        self.running = False
+    
+    def run(self, recover: bool = True):
         """Main worker loop"""
         self.running = True
-        print("Job Worker Started - Listening on transcription_jobs queue")
+        signal.signal(signal.SIGTERM, self.stop)
+        
+        if recover:
+            try:
+                self.recover_textbook_jobs()
+            except Exception as e:
+                print(f"Textbook recovery skipped: {e}")
+        
+        try:
+            self._get_whisper()
+        except Exception as e:
+            print(f"Whisper preload skipped: {e}")
+        
+        concurrency = self._get_concurrency()
+        slots = threading.BoundedSemaphore(concurrency)
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+        
+        def run_job(claimed: ClaimedJob):
+            try:
+                self.handle(claimed)
+            finally:
+                slots.release()
         
-        while self.running:
-            job = queue_pop("transcription_jobs", timeout=5)
-            if job:
-                print(f"Processing job: {job}")
-                self.process_job(job)
+        print(f"Job Worker Started (pid {os.getpid()}) - Listening on {', '.join(QUEUES)} queues ({concurrency} concurrent jobs)")
+        
+        last_maintenance = 0.0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while self.running:
+                if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                    try:
+                        self.fail_expired(self.queue.maintain()['dead'])
+                    except Exception as e:
+                        print(f"Queue maintenance failed: {e}")
+                    last_maintenance = time.monotonic()
+                
+                # Only claim a job when a slot is free to run it
+                if not slots.acquire(timeout=1):
+                    continue
+                try:
+                    claimed = self.queue.claim(timeout=MAINTENANCE_INTERVAL)
+                except Exception as e:
+                    slots.release()
+                    print(f"Claim failed: {e}")
+                    time.sleep(1)
+                    continue
+                
+                if claimed:
+                    print(f"Processing job: {claimed.payload}")
+                    executor.submit(run_job, claimed)
+                else:
+                    slots.release()
+
+
+def _run_worker_process():
+    JobWorker().run(recover=False)
+
+
+def main():
+    """Start WORKER_PROCESSES worker processes and restart any that exit"""
+    if WORKER_PROCESSES <= 1:
+        JobWorker().run()
+        return
+    
+    try:
+        JobWorker().recover_textbook_jobs()
+    except Exception as e:
+        print(f"Textbook recovery skipped: {e}")
+    
+    # Spawn rather than fork so no database or Redis connections are shared
+    context = multiprocessing.get_context("spawn")
+    stopping = False
+    
+    def shutdown(*_):
+        nonlocal stopping
+        stopping = True
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # SIGTERM: each worker drains its running jobs
+    
+    processes = []
+    for _ in range(WORKER_PROCESSES):
+        process = context.Process(target=_run_worker_process)
+        process.start()
+        processes.append(process)
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    
+    while not stopping:
+        for i, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                print(f"Worker process {process.pid} exited ({process.exitcode}), restarting")
+                processes[i] = context.Process(target=_run_worker_process)
+                processes[i].start()
+        time.sleep(1)
+    
+    for process in processes:
+        process.join()
 
 
 if __name__ == "__main__":
-    worker = JobWorker()
-    worker.run()
+    main()
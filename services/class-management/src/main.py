@@ -7,6 +7,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import sys
 import os
 
+from lm_common.db_pool import pool_stats
+
 from .config import settings
 from .routes import classes_router, assignments_router
 
@@ -32,7 +34,8 @@ async def health_check():
     return {
         "status": "healthy",
         "service": settings.SERVICE_NAME,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "db_pools": pool_stats()
     }
 
 
@@ -9,6 +9,7 @@ from psycopg2.extras import RealDictCursor
 
 from ..models import Assignment, AssignmentCreate, AssignmentUpdate
 from ..config import settings
+from lm_common.db_pool import get_connection
 # REMOVED: Auth not used in current system design (matches Chat, Flashcards, Groups pattern)
 # from lm_common.auth.jwt_utils import get_current_user
 
@@ -16,8 +17,8 @@ router = APIRouter(prefix="/assignments", tags=["assignments"])
 
 
 def get_db_connection():
-    """Get database connection"""
-    return psycopg2.connect(settings.database_url, cursor_factory=RealDictCursor)
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return get_connection(settings.database_url, cursor_factory=RealDictCursor)
 
 
 @router.post("", response_model=Assignment, status_code=status.HTTP_201_CREATED)
@@ -8,6 +8,7 @@ from psycopg2.extras import RealDictCursor
 
 from ..models import Class, ClassCreate, ClassUpdate
 from ..config import settings
+from lm_common.db_pool import get_connection
 # REMOVED: Auth not used in current system design (matches Chat, Flashcards, Groups pattern)
 # from lm_common.auth.jwt_utils import get_current_user
 
@@ -15,8 +16,8 @@ router = APIRouter(prefix="/classes", tags=["classes"])
 
 
 def get_db_connection():
-    """Get database connection"""
-    return psycopg2.connect(settings.database_url, cursor_factory=RealDictCursor)
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return get_connection(settings.database_url, cursor_factory=RealDictCursor)
 
 
 @router.post("", response_model=Class, status_code=status.HTTP_201_CREATED)
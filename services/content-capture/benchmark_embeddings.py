@@ -0,0 +1,103 @@
+"""
+Content Capture Service - Embedding Benchmark
+Compares per-chunk create_embedding against batched create_embeddings
+
+Usage:
+    python benchmark_embeddings.py [--chunks 500] [--batch-size 64]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from services.vector_service import VectorService
+
+BENCHMARK_COLLECTION = "benchmark_embeddings"
+
+WORDS = (
+    "photosynthesis chlorophyll energy light reaction glucose cell membrane "
+    "mitochondria enzyme protein molecule equation derivative integral vector "
+    "matrix history revolution economy market supply demand theorem proof"
+).split()
+
+
+def make_chunks(count: int, words_per_chunk: int = 180):
+    """Generate synthetic textbook-sized chunks"""
+    rng = random.Random(42)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(words_per_chunk))
+        for _ in range(count)
+    ]
+
+
+def make_metadata(index: int):
+    return {
+        "type": "benchmark",
+        "textbook_id": 0,
+        "chunk_id": index,
+        "page_number": index // 3 + 1
+    }
+
+
+async def run_single(service: VectorService, chunks):
+    """Baseline: one encode pass and one Chroma add per chunk"""
+    start = time.perf_counter()
+    for i, text in enumerate(chunks):
+        await service.create_embedding(text=text, metadata=make_metadata(i))
+    return time.perf_counter() - start
+
+
+async def run_batched(service: VectorService, chunks, batch_size: int):
+    """Batched encode passes with bulk Chroma upserts"""
+    start = time.perf_counter()
+    await service.create_embeddings(
+        texts=chunks,
+        metadatas=[make_metadata(i) for i in range(len(chunks))],
+        batch_size=batch_size
+    )
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark textbook embedding throughput")
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Content Capture: Embedding Throughput Benchmark")
+    print("=" * 70)
+
+    service = VectorService()
+
+    # Isolate benchmark vectors from real content
+    service.collection = service.chroma_client.get_or_create_collection(name=BENCHMARK_COLLECTION)
+
+    chunks = make_chunks(args.chunks)
+    print(f"\n[INFO] Chunks: {len(chunks)}")
+    print(f"[INFO] Batch size: {args.batch_size}")
+
+    # Warm up the model so load time is not counted
+    service.embedding_model.encode(chunks[:2])
+
+    try:
+        single_time = await run_single(service, chunks)
+        batched_time = await run_batched(service, chunks, args.batch_size)
+    finally:
+        service.chroma_client.delete_collection(name=BENCHMARK_COLLECTION)
+
+    single_rate = len(chunks) / single_time
+    batched_rate = len(chunks) / batched_time
+
+    print(f"\n[RESULTS]")
+    print(f"  Per-chunk create_embedding: {single_time:8.2f}s  {single_rate:8.1f} chunks/sec")
+    print(f"  Batched create_embeddings:  {batched_time:8.2f}s  {batched_rate:8.1f} chunks/sec")
+    print(f"  Speedup: {batched_rate / single_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
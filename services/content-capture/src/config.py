@@ -23,6 +23,9 @@ class Settings:
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
+    # Background processing queue (consumed by the async-jobs worker)
+    TEXTBOOK_JOB_QUEUE: str = os.getenv("TEXTBOOK_JOB_QUEUE", "textbook_jobs")
+    
     # JWT Configuration
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-secret-key-here")
     JWT_ALGORITHM: str = "HS256"
@@ -58,5 +61,7 @@ class Settings:
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # chunks per encode pass
+    VECTOR_UPSERT_BATCH_SIZE: int = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "500"))  # records per Chroma upsert
 
 settings = Settings()
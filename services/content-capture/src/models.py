@@ -40,6 +40,8 @@ class TextbookDownload(Base):
     page_count = Column(Integer, nullable=True)
     total_chunks = Column(Integer, default=0)
     embedding_status = Column(String(20), default="pending")  # pending, processing, completed, failed
+    pages_processed = Column(Integer, default=0)  # progress reported by the background job
+    error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
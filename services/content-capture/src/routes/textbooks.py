@@ -18,9 +18,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 from lm_common.database import get_db
 from lm_common.auth.jwt_utils import decode_token
+from lm_common.redis_client import queue_push
 from models import TextbookDownload, TextbookChunk
 from services.vector_service import VectorService
 from services.pdf_processor import PDFProcessor
+from services.textbook_processor import TEXTBOOK_JOB_TYPE
 from config import settings
 
 router = APIRouter()
@@ -30,6 +32,14 @@ security = HTTPBearer()
 vector_service = VectorService()
 pdf_processor = PDFProcessor()
 
+def _enqueue_processing(textbook: TextbookDownload) -> None:
+    """Hand textbook extraction and embedding to the async-jobs worker"""
+    queue_push(settings.TEXTBOOK_JOB_QUEUE, {
+        "job_type": TEXTBOOK_JOB_TYPE,
+        "textbook_id": textbook.id,
+        "user_id": textbook.user_id
+    })
+
 @router.post("/textbooks/upload")
 async def upload_textbook(
     file: UploadFile = File(...),
@@ -97,53 +107,8 @@ async def upload_textbook(
         db.commit()
         db.refresh(textbook)
         
-        # Start processing asynchronously
-        try:
-            # Extract and chunk text
-            chunks = await pdf_processor.extract_and_chunk(file_path)
-            
-            # Create vector embeddings for each chunk
-            chunk_records = []
-            for i, chunk_data in enumerate(chunks):
-                # Create chunk record
-                chunk = TextbookChunk(
-                    textbook_id=textbook.id,
-                    chunk_index=i,
-                    page_number=chunk_data.get("page_number"),
-                    content=chunk_data["content"]
-                )
-                
-                # Create vector embedding
-                if chunk_data["content"].strip():
-                    vector_id = await vector_service.create_embedding(
-                        text=chunk_data["content"],
-                        metadata={
-                            "type": "textbook",
-                            "textbook_id": textbook.id,
-                            "chunk_id": chunk.id,
-                            "class_id": class_id,
-                            "user_id": user_id,
-                            "title": title,
-                            "page_number": chunk_data.get("page_number")
-                        }
-                    )
-                    chunk.vector_id = vector_id
-                
-                chunk_records.append(chunk)
-            
-            # Save all chunks
-            db.add_all(chunk_records)
-            
-            # Update textbook status
-            textbook.total_chunks = len(chunk_records)
-            textbook.embedding_status = "completed"
-            
-            db.commit()
-            
-        except Exception as processing_error:
-            textbook.embedding_status = "failed"
-            db.commit()
-            print(f"Textbook processing failed: {processing_error}")
+        # Extraction and embedding run in the background worker
+        _enqueue_processing(textbook)
         
         return {
             "id": textbook.id,
@@ -153,6 +118,7 @@ async def upload_textbook(
             "file_url": textbook.file_url,
             "page_count": textbook.page_count,
             "total_chunks": textbook.total_chunks,
+            "pages_processed": textbook.pages_processed,
             "embedding_status": textbook.embedding_status,
             "class_id": textbook.class_id,
             "created_at": textbook.created_at
@@ -197,6 +163,7 @@ async def get_textbooks(
                 "file_url": textbook.file_url,
                 "page_count": textbook.page_count,
                 "total_chunks": textbook.total_chunks,
+                "pages_processed": textbook.pages_processed,
                 "embedding_status": textbook.embedding_status,
                 "class_id": textbook.class_id,
                 "created_at": textbook.created_at
@@ -242,7 +209,9 @@ async def get_textbook(
         "file_size_bytes": textbook.file_size_bytes,
         "page_count": textbook.page_count,
         "total_chunks": textbook.total_chunks,
+        "pages_processed": textbook.pages_processed,
         "embedding_status": textbook.embedding_status,
+        "error_message": textbook.error_message,
         "class_id": textbook.class_id,
         "created_at": textbook.created_at,
         "updated_at": textbook.updated_at
@@ -402,13 +371,13 @@ async def delete_textbook(
         print(f"Failed to delete file: {e}")
     
     # Delete vector embeddings for all chunks
-    chunks = db.query(TextbookChunk).filter(TextbookChunk.textbook_id == textbook_id).all()
-    for chunk in chunks:
-        if chunk.vector_id:
-            try:
-                await vector_service.delete_embedding(chunk.vector_id)
-            except Exception as e:
-                print(f"Failed to delete vector: {e}")
+    vector_ids = [
+        vector_id for (vector_id,) in db.query(TextbookChunk.vector_id).filter(
+            TextbookChunk.textbook_id == textbook_id,
+            TextbookChunk.vector_id.isnot(None)
+        )
+    ]
+    await vector_service.delete_embeddings(vector_ids)
     
     # Delete from database (cascades to chunks)
     db.delete(textbook)
@@ -440,67 +409,37 @@ async def reprocess_textbook(
     if not textbook:
         raise HTTPException(status_code=404, detail="Textbook not found")
     
+    if textbook.embedding_status == "processing":
+        raise HTTPException(status_code=409, detail="Textbook is already being processed")
+    
     try:
-        # Update status
-        textbook.embedding_status = "processing"
-        db.commit()
-        
         # Delete existing chunks and their vectors
-        existing_chunks = db.query(TextbookChunk).filter(TextbookChunk.textbook_id == textbook_id).all()
-        for chunk in existing_chunks:
-            if chunk.vector_id:
-                await vector_service.delete_embedding(chunk.vector_id)
+        existing_vector_ids = [
+            vector_id for (vector_id,) in db.query(TextbookChunk.vector_id).filter(
+                TextbookChunk.textbook_id == textbook_id,
+                TextbookChunk.vector_id.isnot(None)
+            )
+        ]
+        await vector_service.delete_embeddings(existing_vector_ids)
         
-        # Delete chunk records
+        # Delete chunk records and reset progress
         db.query(TextbookChunk).filter(TextbookChunk.textbook_id == textbook_id).delete()
+        textbook.total_chunks = 0
+        textbook.pages_processed = 0
+        textbook.error_message = None
+        textbook.embedding_status = "pending"
         db.commit()
         
-        # Reprocess PDF
-        chunks = await pdf_processor.extract_and_chunk(textbook.file_url)
-        
-        # Create new chunks and embeddings
-        chunk_records = []
-        for i, chunk_data in enumerate(chunks):
-            chunk = TextbookChunk(
-                textbook_id=textbook.id,
-                chunk_index=i,
-                page_number=chunk_data.get("page_number"),
-                content=chunk_data["content"]
-            )
-            
-            if chunk_data["content"].strip():
-                vector_id = await vector_service.create_embedding(
-                    text=chunk_data["content"],
-                    metadata={
-                        "type": "textbook",
-                        "textbook_id": textbook.id,
-                        "chunk_id": chunk.id,
-                        "class_id": textbook.class_id,
-                        "user_id": user_id,
-                        "title": textbook.title,
-                        "page_number": chunk_data.get("page_number")
-                    }
-                )
-                chunk.vector_id = vector_id
-            
-            chunk_records.append(chunk)
-        
-        # Save new chunks
-        db.add_all(chunk_records)
-        
-        # Update textbook
-        textbook.total_chunks = len(chunk_records)
-        textbook.embedding_status = "completed"
-        
-        db.commit()
+        # Re-extract and re-embed in the background worker
+        _enqueue_processing(textbook)
         
         return {
             "id": textbook.id,
             "total_chunks": textbook.total_chunks,
+            "pages_processed": textbook.pages_processed,
             "embedding_status": textbook.embedding_status
         }
         
     except Exception as e:
-        textbook.embedding_status = "failed"
-        db.commit()
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Reprocessing failed: {str(e)}")
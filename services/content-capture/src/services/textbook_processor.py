@@ -0,0 +1,151 @@
+"""
+Textbook Processor - Extract, chunk and embed textbooks outside the request path
+Runs inside the async-jobs worker and checkpoints every chunk so a crashed
+worker resumes where it stopped instead of re-embedding the whole book
+"""
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from models import TextbookDownload, TextbookChunk
+from services.vector_service import VectorService
+from services.pdf_processor import PDFProcessor
+from config import settings
+
+TEXTBOOK_JOB_TYPE = "textbook_processing"
+
+
+def textbook_vector_id(textbook_id: int, chunk_index: int) -> str:
+    """Deterministic vector ID so re-running a batch overwrites instead of duplicating"""
+    return f"textbook-{textbook_id}-{chunk_index}"
+
+
+class TextbookProcessor:
+    """Resumable textbook processing pipeline"""
+
+    def __init__(
+        self,
+        vector_service: Optional[VectorService] = None,
+        pdf_processor: Optional[PDFProcessor] = None
+    ):
+        self.vector_service = vector_service or VectorService()
+        self.pdf_processor = pdf_processor or PDFProcessor()
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
+
+    async def process(
+        self,
+        db: Session,
+        textbook_id: int,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """Process a textbook, skipping chunks that were checkpointed by an earlier run
+
+        Args:
+            db: Database session
+            textbook_id: Textbook to process
+            progress_callback: Called with (pages_processed, page_count) after each checkpoint
+        """
+        textbook = db.query(TextbookDownload).filter(TextbookDownload.id == textbook_id).first()
+        if not textbook:
+            raise ValueError(f"Textbook {textbook_id} not found")
+
+        if textbook.embedding_status == "completed":
+            return self._summary(textbook, resumed_from=textbook.total_chunks)
+
+        textbook.embedding_status = "processing"
+        textbook.error_message = None
+        db.commit()
+
+        try:
+            # Chunk indexes already committed by a previous run
+            done = {
+                chunk_index for (chunk_index,) in db.query(TextbookChunk.chunk_index).filter(
+                    TextbookChunk.textbook_id == textbook.id
+                )
+            }
+
+            pages = await self.pdf_processor.extract_text(textbook.file_url)
+
+            chunk_index = 0
+            pending: List[TextbookChunk] = []
+
+            for page in pages:
+                for chunk_data in self.pdf_processor.chunk_text(page["content"], page["page_number"]):
+                    if chunk_index not in done:
+                        pending.append(TextbookChunk(
+                            textbook_id=textbook.id,
+                            chunk_index=chunk_index,
+                            page_number=page["page_number"],
+                            content=chunk_data["content"]
+                        ))
+                    chunk_index += 1
+
+                # Checkpoint on page boundaries so pages_processed is always exact
+                if len(pending) >= self.batch_size:
+                    await self._checkpoint(db, textbook, pending, page["page_number"], progress_callback)
+                    pending = []
+
+            await self._checkpoint(db, textbook, pending, textbook.page_count or 0, progress_callback)
+
+            textbook.total_chunks = chunk_index
+            textbook.embedding_status = "completed"
+            db.commit()
+
+            return self._summary(textbook, resumed_from=len(done))
+
+        except Exception as e:
+            db.rollback()
+            textbook.embedding_status = "failed"
+            textbook.error_message = str(e)
+            db.commit()
+            raise
+
+    async def _checkpoint(
+        self,
+        db: Session,
+        textbook: TextbookDownload,
+        chunks: List[TextbookChunk],
+        pages_processed: int,
+        progress_callback: Optional[Callable[[int, int], None]]
+    ):
+        """Embed a batch of chunks and commit them together with page progress"""
+
+        if chunks:
+            vector_ids = [textbook_vector_id(textbook.id, chunk.chunk_index) for chunk in chunks]
+
+            # Vectors are written before the rows; deterministic IDs make a replay idempotent
+            await self.vector_service.create_embeddings(
+                texts=[chunk.content for chunk in chunks],
+                metadatas=[
+                    {
+                        "type": "textbook",
+                        "textbook_id": textbook.id,
+                        "chunk_index": chunk.chunk_index,
+                        "class_id": textbook.class_id,
+                        "user_id": textbook.user_id,
+                        "title": textbook.title,
+                        "page_number": chunk.page_number
+                    }
+                    for chunk in chunks
+                ],
+                ids=vector_ids
+            )
+
+            for chunk, vector_id in zip(chunks, vector_ids):
+                chunk.vector_id = vector_id
+
+            db.add_all(chunks)
+
+        textbook.pages_processed = max(textbook.pages_processed or 0, pages_processed)
+        db.commit()
+
+        if progress_callback:
+            progress_callback(textbook.pages_processed, textbook.page_count or 0)
+
+    def _summary(self, textbook: TextbookDownload, resumed_from: int) -> Dict[str, Any]:
+        return {
+            "textbook_id": textbook.id,
+            "total_chunks": textbook.total_chunks,
+            "pages_processed": textbook.pages_processed,
+            "page_count": textbook.page_count,
+            "resumed_from_chunk": resumed_from,
+            "embedding_status": textbook.embedding_status
+        }
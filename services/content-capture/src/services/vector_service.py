@@ -117,14 +117,71 @@ class VectorService:
             print(f"Failed to create embedding: {e}")
             raise
     
+    async def create_embeddings(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Create vector embeddings for many texts using batched encoding and bulk upserts
+        
+        Returns vector IDs in the same order as the input texts. Pass ids to
+        make the write idempotent; existing vectors with those IDs are replaced.
+        """
+        
+        if len(texts) != len(metadatas) or (ids is not None and len(ids) != len(texts)):
+            raise ValueError("texts, metadatas and ids must have the same length")
+        
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Text content cannot be empty")
+        
+        if not texts:
+            return []
+        
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        upsert_size = max(settings.VECTOR_UPSERT_BATCH_SIZE, batch_size)
+        
+        try:
+            vector_ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+            loop = asyncio.get_event_loop()
+            
+            # Encode and flush in windows so memory stays bounded on very large books
+            for start in range(0, len(texts), upsert_size):
+                end = start + upsert_size
+                window_texts = texts[start:end]
+                
+                embeddings = await loop.run_in_executor(
+                    None,
+                    lambda: self.embedding_model.encode(
+                        window_texts,
+                        batch_size=batch_size,
+                        show_progress_bar=False
+                    )
+                )
+                
+                if self.db_type == "chroma":
+                    await self._upsert_in_chroma(
+                        vector_ids[start:end],
+                        window_texts,
+                        embeddings.tolist(),
+                        metadatas[start:end]
+                    )
+            
+            return vector_ids
+            
+        except Exception as e:
+            print(f"Failed to create embeddings: {e}")
+            raise
+    
+    def _prepare_metadata(self, metadata: Dict[str, Any]) -> Dict[str, str]:
+        """Prepare metadata for storage (ChromaDB requires string values)"""
+        return {key: str(value) for key, value in metadata.items() if value is not None}
+    
     async def _store_in_chroma(self, vector_id: str, text: str, embedding: List[float], metadata: Dict[str, Any]):
         """Store embedding in ChromaDB"""
         
-        # Prepare metadata (ChromaDB requires string values)
-        chroma_metadata = {}
-        for key, value in metadata.items():
-            if value is not None:
-                chroma_metadata[key] = str(value)
+        chroma_metadata = self._prepare_metadata(metadata)
         
         # Add the embedding
         loop = asyncio.get_event_loop()
@@ -138,6 +195,22 @@ class VectorService:
             )
         )
     
+    async def _upsert_in_chroma(self, vector_ids: List[str], texts: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]]):
+        """Store many embeddings in ChromaDB with a single upsert"""
+        
+        chroma_metadatas = [self._prepare_metadata(metadata) for metadata in metadatas]
+        
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None,
+            lambda: self.collection.upsert(
+                ids=vector_ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=chroma_metadatas
+            )
+        )
+    
     async def search_similar(self, query_text: str, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Search for similar content using vector similarity"""
         
@@ -205,6 +278,26 @@ class VectorService:
             print(f"Failed to delete embedding: {e}")
             return False
     
+    async def delete_embeddings(self, vector_ids: List[str]) -> bool:
+        """Delete many embeddings from the vector database in one call"""
+        
+        if not vector_ids:
+            return True
+        
+        try:
+            if self.db_type == "chroma":
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(
+                    None,
+                    lambda: self.collection.delete(ids=vector_ids)
+                )
+            
+            return True
+            
+        except Exception as e:
+            print(f"Failed to delete embeddings: {e}")
+            return False
+    
     async def update_embedding(self, vector_id: str, text: str, metadata: Dict[str, Any]) -> bool:
         """Update an existing embedding"""
         
@@ -4,8 +4,11 @@ FastAPI service for points, achievements, and leaderboards
 """
 from fastapi import FastAPI
 
+from lm_common.db_pool import pool_stats
+
 from .config import settings
 from .routes import points_router, achievements_router, leaderboards_router
+from .services.point_consumer import get_point_consumer
 
 # Create FastAPI app
 app = FastAPI(
@@ -31,10 +34,26 @@ async def health_check():
     return {
         "status": "healthy",
         "service": settings.SERVICE_NAME,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "db_pools": pool_stats(),
+        "point_events": get_point_consumer().stats() if settings.POINT_CONSUMER_ENABLED else None
     }
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start applying point events from the Redis stream"""
+    if settings.POINT_CONSUMER_ENABLED:
+        get_point_consumer().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the point event consumer (unacknowledged events are redelivered)"""
+    if settings.POINT_CONSUMER_ENABLED:
+        get_point_consumer().stop()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -6,6 +6,8 @@ from typing import List, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from lm_common.db_pool import get_connection
+
 from ..config import settings
 from ..models import Achievement, AchievementCreate
 
@@ -13,8 +15,8 @@ router = APIRouter(prefix="/achievements", tags=["achievements"])
 
 
 def get_db():
-    """Get database connection"""
-    return psycopg2.connect(settings.DATABASE_URL)
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return get_connection(settings.DATABASE_URL)
 
 
 @router.get("", response_model=List[dict])
@@ -5,20 +5,45 @@ from fastapi import APIRouter, HTTPException, Header
 from typing import List, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import redis
+
+from lm_common.db_pool import get_connection
+from lm_common.logging import get_logger
 
 from ..config import settings
+from ..services.leaderboard_service import LeaderboardNotReady, get_leaderboard_service
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/leaderboards", tags=["leaderboards"])
 
+PERIOD_BOARDS = ("weekly", "monthly")
+
 
 def get_db():
-    """Get database connection"""
-    return psycopg2.connect(settings.DATABASE_URL)
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return get_connection(settings.DATABASE_URL)
+
+
+def _around(board: str, user_id: int, window: int, class_id: Optional[int] = None) -> dict:
+    """A user's rank and neighbors, from Redis or else PostgreSQL"""
+    service = get_leaderboard_service()
+    try:
+        return service.around(board, user_id, window, class_id=class_id)
+    except (redis.RedisError, LeaderboardNotReady) as e:
+        logger.warning(f"Leaderboard cache unavailable, querying PostgreSQL: {e}")
+
+    return service.around_from_db(board, user_id, window, class_id=class_id)
 
 
 @router.get("/global", response_model=List[dict])
 async def get_global_leaderboard(limit: int = 10):
     """Get global leaderboard"""
+    try:
+        return get_leaderboard_service().top("global", limit)
+    except (redis.RedisError, LeaderboardNotReady) as e:
+        logger.warning(f"Leaderboard cache unavailable, querying PostgreSQL: {e}")
+
     conn = get_db()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -30,20 +55,34 @@ async def get_global_leaderboard(limit: int = 10):
                 ORDER BY up.total_points DESC
                 LIMIT %s
             """, (limit,))
-            
+
             results = cur.fetchall()
             # Add rank
             for i, row in enumerate(results, 1):
+                row['score'] = row['total_points']
                 row['rank'] = i
-            
+
             return [dict(row) for row in results]
     finally:
         conn.close()
 
 
+@router.get("/global/me", response_model=dict)
+async def get_global_rank(window: int = settings.LEADERBOARD_WINDOW, authorization: Optional[str] = Header(None)):
+    """Get user's global rank and the users ranked around them"""
+    user_id = 1  # Placeholder
+
+    return _around("global", user_id, window)
+
+
 @router.get("/class/{class_id}", response_model=List[dict])
 async def get_class_leaderboard(class_id: int, limit: int = 10):
     """Get class-specific leaderboard"""
+    try:
+        return get_leaderboard_service().top("class", limit, class_id=class_id)
+    except (redis.RedisError, LeaderboardNotReady) as e:
+        logger.warning(f"Leaderboard cache unavailable, querying PostgreSQL: {e}")
+
     conn = get_db()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -56,11 +95,66 @@ async def get_class_leaderboard(class_id: int, limit: int = 10):
                 ORDER BY up.total_points DESC
                 LIMIT %s
             """, (class_id, limit))
-            
+
             results = cur.fetchall()
             for i, row in enumerate(results, 1):
+                row['score'] = row['total_points']
                 row['rank'] = i
-            
+
             return [dict(row) for row in results]
     finally:
         conn.close()
+
+
+@router.get("/class/{class_id}/me", response_model=dict)
+async def get_class_rank(
+    class_id: int,
+    window: int = settings.LEADERBOARD_WINDOW,
+    authorization: Optional[str] = Header(None)
+):
+    """Get user's rank in a class and the users ranked around them"""
+    user_id = 1  # Placeholder
+
+    return _around("class", user_id, window, class_id=class_id)
+
+
+@router.get("/{period}", response_model=List[dict])
+async def get_period_leaderboard(period: str, limit: int = 10):
+    """Get weekly or monthly leaderboard (points earned in the current period)"""
+    if period not in PERIOD_BOARDS:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+
+    service = get_leaderboard_service()
+    try:
+        return service.top(period, limit)
+    except (redis.RedisError, LeaderboardNotReady) as e:
+        logger.warning(f"Leaderboard cache unavailable, querying PostgreSQL: {e}")
+
+    return service.top_from_db(period, limit)
+
+
+@router.get("/{period}/me", response_model=dict)
+async def get_period_rank(
+    period: str,
+    window: int = settings.LEADERBOARD_WINDOW,
+    authorization: Optional[str] = Header(None)
+):
+    """Get user's weekly or monthly rank and the users ranked around them"""
+    if period not in PERIOD_BOARDS:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+
+    user_id = 1  # Placeholder
+
+    return _around(period, user_id, window)
+
+
+@router.post("/rebuild", response_model=dict)
+async def rebuild_leaderboard(board: str = "global", class_id: Optional[int] = None):
+    """Rebuild a leaderboard from PostgreSQL (cold start or repair)"""
+    if board not in ("global", "class") + PERIOD_BOARDS:
+        raise HTTPException(status_code=400, detail="board must be global, class, weekly or monthly")
+    if board == "class" and class_id is None:
+        raise HTTPException(status_code=400, detail="class_id is required for class leaderboards")
+
+    users = get_leaderboard_service().rebuild(board, class_id)
+    return {"message": "Leaderboard rebuilt", "board": board, "class_id": class_id, "users": users}
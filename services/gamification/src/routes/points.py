@@ -5,16 +5,23 @@ from fastapi import APIRouter, HTTPException, Header
 from typing import List, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import redis
+
+from lm_common.db_pool import get_connection
+from lm_common.logging import get_logger
 
 from ..config import settings
 from ..models import PointAward
+from ..services.leaderboard_service import get_leaderboard_service
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/points", tags=["points"])
 
 
 def get_db():
-    """Get database connection"""
-    return psycopg2.connect(settings.DATABASE_URL)
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return get_connection(settings.DATABASE_URL)
 
 
 @router.get("", response_model=dict)
@@ -63,8 +70,18 @@ async def award_points(
             # Get updated points
             cur.execute("SELECT * FROM user_points WHERE user_id = %s", (user_id,))
             result = cur.fetchone()
-            
-            return {"message": "Points awarded", "user_points": dict(result)}
+        
+        # Leaderboards are caches; after a failed update they are rebuilt on next read
+        try:
+            get_leaderboard_service().record_award(conn, user_id, result['total_points'])
+        except Exception as e:
+            logger.warning(f"Leaderboard update failed for user {user_id}, invalidating boards: {e}")
+            try:
+                get_leaderboard_service().invalidate()
+            except redis.RedisError as redis_error:
+                logger.error(f"Leaderboard invalidation failed: {redis_error}")
+        
+        return {"message": "Points awarded", "user_points": dict(result)}
     finally:
         conn.close()
 
@@ -0,0 +1,7 @@
+"""
+Gamification Service - Services
+"""
+from .leaderboard_service import LeaderboardService, get_leaderboard_service
+from .point_consumer import PointEventConsumer, get_point_consumer
+
+__all__ = ["LeaderboardService", "get_leaderboard_service", "PointEventConsumer", "get_point_consumer"]
@@ -0,0 +1,463 @@
+"""
+Gamification Service - Leaderboard Service
+Leaderboards kept in Redis sorted sets instead of sorted in PostgreSQL per read
+
+Every award writes the user's absolute scores (total points, points this
+week/month) to each board they appear on, so updates are idempotent and a
+missed one is corrected by the user's next award. Top-N, rank and the window
+around a user are then O(log N) sorted-set reads. A board that does not exist
+yet (cold start or expired board) is rebuilt from PostgreSQL on first read.
+While a rebuild reads PostgreSQL, awards are also written to its staging key,
+so none committed during the read are lost when the new board is swapped in.
+Every board expires (global after LEADERBOARD_GLOBAL_TTL) so drift is repaired
+by a periodic rebuild. Readers that find a board still being built fall back
+to PostgreSQL.
+
+Redis layout:
+    leaderboard:global                 total points, all users
+    leaderboard:class:{class_id}       total points, class members
+    leaderboard:weekly:{YYYY-Www}      points earned in the ISO week
+    leaderboard:monthly:{YYYY-MM}      points earned in the month
+    leaderboard:ready:{board}          set once the board has been built
+    leaderboard:building:{board}       set while a rebuild reads PostgreSQL
+    {board}:rebuild                    staging key of a rebuild in progress
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from lm_common.redis_client import get_redis_client
+from lm_common.db_pool import get_connection
+from lm_common.logging import get_logger
+
+from ..config import settings
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "leaderboard"
+
+REBUILD_TIMEOUT = 60  # seconds a rebuild may hold its lock and building marker
+
+# ZADD only to boards that have been built; a partial board would be served as
+# complete. Boards being rebuilt also get the score in their staging key.
+# KEYS[i] is a board, ARGV[2i + 1] / ARGV[2i + 2] the member and score written to it
+_UPDATE_SCRIPT = """
+for i, board in ipairs(KEYS) do
+    local member, score = ARGV[2 * i + 1], ARGV[2 * i + 2]
+    local ready = ARGV[1] .. board
+    if redis.call('EXISTS', ready) == 1 then
+        redis.call('ZADD', board, score, member)
+        -- A board rebuilt empty has no key yet; give it the marker's expiry
+        local ttl = redis.call('PTTL', ready)
+        if ttl > 0 and redis.call('PTTL', board) == -1 then
+            redis.call('PEXPIRE', board, ttl)
+        end
+    end
+    local building = redis.call('PTTL', ARGV[2] .. board)
+    if building > 0 then
+        redis.call('ZADD', board .. ':rebuild', score, member)
+        redis.call('PEXPIRE', board .. ':rebuild', building)
+    end
+end
+return 1
+"""
+
+# Swap a staged board in and mark it ready, atomically with respect to updates
+# KEYS: staging, board, ready marker, building marker; ARGV: built at, TTL (0 = none)
+_SWAP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+else
+    redis.call('DEL', KEYS[2])
+end
+redis.call('SET', KEYS[3], ARGV[1])
+-- The staging key expires with its building marker; replace that expiry
+if tonumber(ARGV[2]) > 0 then
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    redis.call('EXPIRE', KEYS[3], ARGV[2])
+else
+    redis.call('PERSIST', KEYS[2])
+end
+redis.call('DEL', KEYS[4])
+return redis.call('ZCARD', KEYS[2])
+"""
+
+
+class LeaderboardNotReady(RuntimeError):
+    """Board is being built by another reader; serve it from PostgreSQL instead"""
+
+
+USER_COLUMNS = """
+    SELECT up.user_id, up.total_points, up.level, up.streak_days, u.username, u.email
+    FROM user_points up
+    JOIN users u ON up.user_id = u.id
+"""
+
+
+def period_start(period: str, today: Optional[date] = None) -> date:
+    """First day of the current week (Monday) or month"""
+    today = today or datetime.utcnow().date()
+    if period == "weekly":
+        return today - timedelta(days=today.weekday())
+    if period == "monthly":
+        return today.replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def board_key(board: str, class_id: Optional[int] = None, today: Optional[date] = None) -> str:
+    """Redis key for a board: global, class (needs class_id), weekly or monthly"""
+    if board == "global":
+        return f"{KEY_PREFIX}:global"
+    if board == "class":
+        if class_id is None:
+            raise ValueError("class_id is required for class leaderboards")
+        return f"{KEY_PREFIX}:class:{class_id}"
+    if board == "weekly":
+        year, week, _ = period_start("weekly", today).isocalendar()
+        return f"{KEY_PREFIX}:weekly:{year}-W{week:02d}"
+    if board == "monthly":
+        return f"{KEY_PREFIX}:monthly:{period_start('monthly', today):%Y-%m}"
+    raise ValueError(f"Unknown leaderboard: {board}")
+
+
+def _ready_key(key: str) -> str:
+    return f"{KEY_PREFIX}:ready:{key}"
+
+
+def _building_key(key: str) -> str:
+    return f"{KEY_PREFIX}:building:{key}"
+
+
+class LeaderboardService:
+    """Redis sorted-set leaderboards with a PostgreSQL rebuild path"""
+
+    def __init__(self):
+        self.redis = get_redis_client()
+        self._update = self.redis.register_script(_UPDATE_SCRIPT)
+        self._swap = self.redis.register_script(_SWAP_SCRIPT)
+
+    def _ttl(self, board: str) -> Optional[int]:
+        """Boards expire so they are periodically rebuilt"""
+        if board == "global":
+            return settings.LEADERBOARD_GLOBAL_TTL
+        if board == "class":
+            return settings.LEADERBOARD_CLASS_TTL
+        if board == "weekly":
+            return 14 * 86400
+        if board == "monthly":
+            return 62 * 86400
+        return None
+
+    def _scores_query(self, board: str, class_id: Optional[int] = None) -> Tuple[str, tuple]:
+        """SQL (and parameters) selecting user_id, score for every user on a board"""
+        if board == "global":
+            return "SELECT user_id, total_points AS score FROM user_points", ()
+        if board == "class":
+            if class_id is None:
+                raise ValueError("class_id is required for class leaderboards")
+            return """
+                SELECT up.user_id, up.total_points AS score
+                FROM user_points up
+                JOIN class_enrollments ce ON up.user_id = ce.user_id
+                WHERE ce.class_id = %s
+            """, (class_id,)
+        return """
+            SELECT user_id, SUM(points_change) AS score
+            FROM point_transactions
+            WHERE created_at >= %s
+            GROUP BY user_id
+        """, (period_start(board),)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record_award(self, conn, user_id: int, total_points: int):
+        """Push one user's current scores to every board they appear on"""
+        self.record_awards(conn, {user_id: total_points})
+
+    def record_awards(self, conn, totals: Dict[int, int]):
+        """
+        Push users' current scores to every board they appear on
+
+        Called after points are committed. Period totals and class
+        memberships are read on the same connection (indexed per-user lookups).
+
+        Args:
+            conn: Database connection
+            totals: user_id -> total points after the award
+        """
+        if not totals:
+            return
+
+        today = datetime.utcnow().date()
+        weekly_start = period_start("weekly", today)
+        monthly_start = period_start("monthly", today)
+        user_ids = list(totals)
+
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT user_id,
+                       COALESCE(SUM(points_change) FILTER (WHERE created_at >= %s), 0),
+                       COALESCE(SUM(points_change) FILTER (WHERE created_at >= %s), 0)
+                FROM point_transactions
+                WHERE user_id = ANY(%s) AND created_at >= %s
+                GROUP BY user_id
+            """, (weekly_start, monthly_start, user_ids, min(weekly_start, monthly_start)))
+            periods = {user_id: (weekly, monthly) for user_id, weekly, monthly in cur.fetchall()}
+        conn.rollback()
+
+        weekly_key = board_key("weekly", today=today)
+        monthly_key = board_key("monthly", today=today)
+        boards = []
+        for user_id, total_points in totals.items():
+            weekly, monthly = periods.get(user_id, (0, 0))
+            boards += [
+                (board_key("global"), user_id, total_points),
+                (weekly_key, user_id, weekly),
+                (monthly_key, user_id, monthly),
+            ]
+        self._apply(boards)
+
+        # Class boards last, so a failed membership lookup cannot hold back the others
+        with conn.cursor() as cur:
+            cur.execute("SELECT user_id, class_id FROM class_enrollments WHERE user_id = ANY(%s)", (user_ids,))
+            enrollments = cur.fetchall()
+        conn.rollback()
+        self._apply([(board_key("class", class_id), user_id, totals[user_id]) for user_id, class_id in enrollments])
+
+    def invalidate(self, boards: Tuple[str, ...] = ("global", "weekly", "monthly")):
+        """
+        Repair after a failed update: drop the boards' ready markers so the
+        next read rebuilds them from PostgreSQL instead of serving stale scores
+
+        Class boards are not listed here; they expire after LEADERBOARD_CLASS_TTL.
+        """
+        self.redis.delete(*[_ready_key(board_key(board)) for board in boards])
+
+    def _apply(self, boards: List[Tuple[str, int, int]]):
+        """Write (board key, user_id, score) entries through _UPDATE_SCRIPT"""
+        if not boards:
+            return
+        args = [f"{KEY_PREFIX}:ready:", f"{KEY_PREFIX}:building:"]
+        for _, user_id, score in boards:
+            args += [user_id, score]
+        self._update(keys=[key for key, _, _ in boards], args=args)
+
+    def rebuild(self, board: str, class_id: Optional[int] = None) -> int:
+        """
+        Rebuild a board from PostgreSQL (cold start or repair)
+
+        The board is built under a staging key and swapped in atomically.
+        The building marker is set before PostgreSQL is read, so awards
+        committed meanwhile also land in the staging key; rows from the read
+        are added with NX and never overwrite those newer scores.
+
+        Returns:
+            Number of users on the board
+        """
+        key = board_key(board, class_id)
+        staging = f"{key}:rebuild"
+        building = _building_key(key)
+        query, params = self._scores_query(board, class_id)
+
+        pipe = self.redis.pipeline()
+        pipe.delete(staging)
+        pipe.set(building, 1, ex=REBUILD_TIMEOUT)
+        pipe.execute()
+
+        try:
+            conn = get_connection(settings.DATABASE_URL)
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    rows = cur.fetchall()
+            finally:
+                conn.close()
+
+            pipe = self.redis.pipeline()
+            for i in range(0, len(rows), 1000):
+                pipe.zadd(staging, {str(user_id): score for user_id, score in rows[i:i + 1000]}, nx=True)
+            pipe.expire(staging, REBUILD_TIMEOUT)
+            pipe.execute()
+
+            users = self._swap(
+                keys=[staging, key, _ready_key(key), building],
+                args=[int(time.time()), self._ttl(board) or 0]
+            )
+        except BaseException:
+            self.redis.delete(building, staging)
+            raise
+
+        logger.info(f"Rebuilt {key} with {users} users")
+        return users
+
+    def _ensure(self, board: str, class_id: Optional[int]) -> str:
+        """
+        Board key, rebuilding the board first if it has not been built
+
+        Raises:
+            LeaderboardNotReady: Another reader is rebuilding the board; rather
+                than wait (callers run on the event loop), serve from PostgreSQL
+        """
+        key = board_key(board, class_id)
+        if self.redis.exists(_ready_key(key)):
+            return key
+
+        # One rebuild per board at a time
+        lock = f"{KEY_PREFIX}:lock:{key}"
+        if not self.redis.set(lock, 1, nx=True, ex=REBUILD_TIMEOUT):
+            raise LeaderboardNotReady(f"{key} is being built")
+        try:
+            self.rebuild(board, class_id)
+        finally:
+            self.redis.delete(lock)
+        return key
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _hydrate(self, entries: List[Tuple[str, float]], first_rank: int) -> List[Dict[str, Any]]:
+        """Attach user details to (user_id, score) pairs, preserving rank order"""
+        if not entries:
+            return []
+
+        user_ids = [int(member) for member, _ in entries]
+        conn = get_connection(settings.DATABASE_URL)
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(USER_COLUMNS + " WHERE up.user_id = ANY(%s)", (user_ids,))
+                users = {row['user_id']: dict(row) for row in cur.fetchall()}
+        finally:
+            conn.close()
+
+        results = []
+        for offset, (user_id, (_, score)) in enumerate(zip(user_ids, entries)):
+            row = users.get(user_id, {'user_id': user_id})
+            row['score'] = int(score)
+            row['rank'] = first_rank + offset
+            results.append(row)
+        return results
+
+    def top(self, board: str, limit: int = 10, class_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Top `limit` users, highest score first (ranks start at 1)"""
+        key = self._ensure(board, class_id)
+        entries = self.redis.zrevrange(key, 0, max(0, limit - 1), withscores=True)
+        return self._hydrate(entries, 1)
+
+    def around(
+        self,
+        board: str,
+        user_id: int,
+        window: int = 5,
+        class_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        A user's rank plus the `window` users directly above and below
+
+        Returns:
+            Dict with user_id, rank and score (None if not ranked) and neighbors
+        """
+        key = self._ensure(board, class_id)
+        pipe = self.redis.pipeline()
+        pipe.zrevrank(key, user_id)
+        pipe.zscore(key, user_id)
+        pipe.zcard(key)
+        position, score, size = pipe.execute()
+
+        if position is None:
+            return {'user_id': user_id, 'rank': None, 'score': None, 'total': size, 'neighbors': []}
+
+        start = max(0, position - window)
+        entries = self.redis.zrevrange(key, start, position + window, withscores=True)
+        return {
+            'user_id': user_id,
+            'rank': position + 1,
+            'score': int(score),
+            'total': size,
+            'neighbors': self._hydrate(entries, start + 1)
+        }
+
+    # ------------------------------------------------------------------
+    # PostgreSQL fallbacks (Redis unavailable or board not ready)
+    # ------------------------------------------------------------------
+
+    def top_from_db(self, board: str, limit: int = 10, class_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Same as top(), ranked in PostgreSQL"""
+        query, params = self._scores_query(board, class_id)
+        conn = get_connection(settings.DATABASE_URL)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT user_id, score FROM ({query}) board
+                    ORDER BY score DESC, user_id::text DESC
+                    LIMIT %s
+                """, params + (limit,))
+                entries = cur.fetchall()
+        finally:
+            conn.close()
+        return self._hydrate(entries, 1)
+
+    def around_from_db(
+        self,
+        board: str,
+        user_id: int,
+        window: int = 5,
+        class_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Same as around(), ranked in PostgreSQL"""
+        query, params = self._scores_query(board, class_id)
+        # Ties ordered as ZREVRANGE orders them: by member, descending
+        ranked = f"""
+            WITH ranked AS (
+                SELECT user_id, score,
+                       ROW_NUMBER() OVER (ORDER BY score DESC, user_id::text DESC) AS rank
+                FROM ({query}) board
+            )
+        """
+        conn = get_connection(settings.DATABASE_URL)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(ranked + """
+                    SELECT (SELECT COUNT(*) FROM ranked), me.rank, me.score
+                    FROM (SELECT 1) one
+                    LEFT JOIN ranked me ON me.user_id = %s
+                """, params + (user_id,))
+                size, rank, score = cur.fetchone()
+
+                if rank is None:
+                    return {'user_id': user_id, 'rank': None, 'score': None, 'total': size, 'neighbors': []}
+
+                start = max(1, rank - window)
+                cur.execute(ranked + """
+                    SELECT user_id, score FROM ranked
+                    WHERE rank BETWEEN %s AND %s
+                    ORDER BY rank
+                """, params + (start, rank + window))
+                entries = cur.fetchall()
+        finally:
+            conn.close()
+
+        return {
+            'user_id': user_id,
+            'rank': rank,
+            'score': int(score),
+            'total': size,
+            'neighbors': self._hydrate(entries, start)
+        }
+
+
+_leaderboard_service: Optional[LeaderboardService] = None
+
+
+def get_leaderboard_service() -> LeaderboardService:
+    """Get the leaderboard service (singleton pattern)"""
+    global _leaderboard_service
+
+    if _leaderboard_service is None:
+        _leaderboard_service = LeaderboardService()
+
+    return _leaderboard_service
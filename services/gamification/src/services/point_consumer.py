@@ -0,0 +1,300 @@
+"""
+Gamification Service - Point Event Consumer
+Applies point awards published to a Redis stream in batches
+
+Producers (e.g. study-analytics ending a session) append an event with
+lm_common.redis_client.stream_publish instead of calling POST /points/award
+synchronously. This consumer reads them through a consumer group and applies
+each batch in one transaction: one multi-row insert into point_transactions,
+then one upsert of user_points with the per-user sums.
+
+Delivery is at least once. Each event's idempotency key (reference_type,
+reference_id and user_id, or the stream entry ID when there is no reference)
+is stored in point_transactions.event_key under a unique index, so a
+redelivered event is skipped. Entries are acknowledged only after commit;
+entries left pending by a crashed consumer are reclaimed after
+POINT_CLAIM_IDLE_MS. Producers publish without a length cap; after each
+batch the consumer trims only entries every group has read and acknowledged.
+
+Event fields:
+    user_id, points, reason, reference_type (optional), reference_id (optional),
+    event_key (optional, overrides the derived key)
+"""
+import json
+import os
+import socket
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+import redis
+from psycopg2.extras import execute_values
+
+from lm_common.redis_client import get_redis_client
+from lm_common.db_pool import get_connection
+from lm_common.logging import get_logger
+
+from ..config import settings
+from .leaderboard_service import get_leaderboard_service
+
+logger = get_logger(__name__)
+
+INSERT_TRANSACTIONS = """
+    INSERT INTO point_transactions (user_id, points_change, reason, reference_type, reference_id, event_key)
+    VALUES %s
+    ON CONFLICT (event_key) DO NOTHING
+    RETURNING user_id, points_change
+"""
+
+UPSERT_USER_POINTS = """
+    INSERT INTO user_points (user_id, total_points, level, last_activity_date)
+    SELECT t.user_id, t.points, points_level(t.points), CURRENT_DATE
+    FROM unnest(%s::int[], %s::int[]) AS t(user_id, points)
+    ON CONFLICT (user_id) DO UPDATE
+    SET total_points = user_points.total_points + EXCLUDED.total_points,
+        level = points_level(user_points.total_points + EXCLUDED.total_points),
+        last_activity_date = CURRENT_DATE,
+        updated_at = NOW()
+    RETURNING user_id, total_points
+"""
+
+
+def _id_key(entry_id: str) -> Tuple[int, int]:
+    """Sortable form of a stream entry ID"""
+    milliseconds, sequence = str(entry_id).split("-")
+    return int(milliseconds), int(sequence)
+
+
+class InvalidPointEvent(ValueError):
+    """Event payload cannot be applied and will never succeed on retry"""
+
+
+def parse_event(entry_id: str, fields: Dict[str, str]) -> Tuple:
+    """
+    Validate a stream entry into a point_transactions row
+
+    Returns:
+        Tuple of (user_id, points, reason, reference_type, reference_id, event_key)
+    """
+    try:
+        event = json.loads(fields["data"])
+        user_id = int(event["user_id"])
+        points = int(event["points"])
+        reason = str(event["reason"])[:100]
+        reference_type = event.get("reference_type")
+        reference_id = event.get("reference_id")
+        reference_id = int(reference_id) if reference_id is not None else None
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidPointEvent(f"Malformed point event {entry_id}: {e}") from e
+
+    if event.get("event_key"):
+        event_key = str(event["event_key"])
+    elif reference_type and reference_id is not None:
+        event_key = f"{reference_type}:{reference_id}:{user_id}"
+    else:
+        event_key = f"stream:{entry_id}"
+
+    return (user_id, points, reason, reference_type and str(reference_type)[:50], reference_id, event_key[:200])
+
+
+class PointEventConsumer:
+    """Consumer-group reader that applies point events in batches"""
+
+    def __init__(self, consumer_name: Optional[str] = None):
+        self.redis = get_redis_client()
+        self.stream = settings.POINT_EVENTS_STREAM
+        self.group = settings.POINT_EVENTS_GROUP
+        self.dead_letter = f"{self.stream}:dead"
+        self.consumer = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = settings.POINT_BATCH_SIZE
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.leaderboard_failures = 0
+
+    def ensure_group(self):
+        """Create the consumer group (and stream) if missing"""
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def poll(self) -> List[Tuple[str, Dict[str, str]]]:
+        """Next batch: stale entries from dead consumers first, then new ones"""
+        _, claimed, *_ = self.redis.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=settings.POINT_CLAIM_IDLE_MS,
+            count=self.batch_size
+        )
+        entries = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        if entries:
+            return entries
+
+        response = self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"},
+            count=self.batch_size,
+            block=settings.POINT_BATCH_WAIT_MS
+        )
+        return response[0][1] if response else []
+
+    def _apply(self, conn, rows: List[Tuple]) -> Dict[int, int]:
+        """Insert rows and fold new ones into user_points; returns user_id -> new total"""
+        with conn.cursor() as cur:
+            applied = execute_values(cur, INSERT_TRANSACTIONS, rows, page_size=len(rows), fetch=True)
+
+            points = defaultdict(int)
+            for user_id, points_change in applied:
+                points[user_id] += points_change
+            if not points:
+                return {}
+
+            # Sorted so concurrent consumers lock user_points rows in the same order
+            user_ids = sorted(points)
+            cur.execute(UPSERT_USER_POINTS, (user_ids, [points[user_id] for user_id in user_ids]))
+            return dict(cur.fetchall())
+
+    def process(self, entries: List[Tuple[str, Dict[str, str]]]) -> int:
+        """
+        Apply a batch of stream entries in one transaction
+
+        Returns:
+            Number of users whose points changed
+        """
+        rows: Dict[str, Tuple] = {}
+        entries_by_key: Dict[str, List] = defaultdict(list)
+        dead = []
+        for entry_id, fields in entries:
+            try:
+                row = parse_event(entry_id, fields)
+            except InvalidPointEvent as e:
+                logger.warning(str(e))
+                dead.append((entry_id, fields))
+                continue
+            rows.setdefault(row[-1], row)  # duplicate keys within the batch
+            entries_by_key[row[-1]].append((entry_id, fields))
+
+        totals: Dict[int, int] = {}
+        conn = get_connection(settings.DATABASE_URL)
+        try:
+            if rows:
+                try:
+                    totals = self._apply(conn, list(rows.values()))
+                    conn.commit()
+                except (psycopg2.DataError, psycopg2.IntegrityError):
+                    # e.g. an unknown user_id: isolate the bad events, apply the rest
+                    conn.rollback()
+                    totals, rejected = self._apply_individually(conn, list(rows.values()))
+                    for event_key in rejected:
+                        dead += entries_by_key[event_key]
+
+            self._dead_letter(dead)
+            self.redis.xack(self.stream, self.group, *[entry_id for entry_id, _ in entries])
+            self._trim()
+
+            try:
+                get_leaderboard_service().record_awards(conn, totals)
+            except Exception as e:
+                # The events are acked; have the boards rebuilt rather than stay stale
+                self.leaderboard_failures += 1
+                logger.warning(f"Leaderboard update failed for {len(totals)} users, invalidating boards: {e}")
+                try:
+                    get_leaderboard_service().invalidate()
+                except redis.RedisError as redis_error:
+                    logger.error(f"Leaderboard invalidation failed: {redis_error}")
+        finally:
+            conn.close()
+
+        return len(totals)
+
+    def _apply_individually(self, conn, rows: List[Tuple]) -> Tuple[Dict[int, int], set]:
+        """Fallback after a failed batch: one transaction per event"""
+        totals, rejected = {}, set()
+        for row in rows:
+            try:
+                totals.update(self._apply(conn, [row]))
+                conn.commit()
+            except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                conn.rollback()
+                logger.warning(f"Rejected point event {row[-1]}: {e}")
+                rejected.add(row[-1])
+        return totals, rejected
+
+    def _trim(self):
+        """
+        Drop stream entries older than anything a group still needs: its
+        oldest pending entry, or its last delivered entry when none is pending
+        """
+        try:
+            floor = None
+            for group in self.redis.xinfo_groups(self.stream):
+                pending = self.redis.xpending(self.stream, group["name"])
+                needed = pending["min"] if pending["pending"] else group["last-delivered-id"]
+                if floor is None or _id_key(needed) < _id_key(floor):
+                    floor = needed
+            if floor is not None:
+                self.redis.xtrim(self.stream, minid=floor, approximate=True)
+        except redis.RedisError as e:
+            # Trimming is housekeeping; the next batch tries again
+            logger.warning(f"Point event stream trim failed: {e}")
+
+    def _dead_letter(self, entries: List[Tuple[str, Dict[str, str]]]):
+        """Keep events that can never apply for inspection instead of retrying them forever"""
+        if not entries:
+            return
+        pipe = self.redis.pipeline()
+        for entry_id, fields in entries:
+            pipe.xadd(self.dead_letter, {"entry_id": entry_id, **fields}, maxlen=10000, approximate=True)
+        pipe.execute()
+
+    def run(self):
+        """Consume until stop() is called"""
+        logger.info(f"Point event consumer {self.consumer} reading {self.stream}")
+        while not self._stop.is_set():
+            try:
+                self.ensure_group()
+                while not self._stop.is_set():
+                    entries = self.poll()
+                    if entries:
+                        applied = self.process(entries)
+                        logger.debug(f"Applied {applied} of {len(entries)} point events")
+            except Exception as e:
+                # Redis or database outage: entries stay pending and are retried
+                logger.error(f"Point event consumer error: {e}")
+                self._stop.wait(1.0)
+
+    def start(self):
+        """Run in a daemon thread"""
+        self._thread = threading.Thread(target=self.run, name="point-event-consumer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Stream length and pending count for /health"""
+        try:
+            pending = self.redis.xpending(self.stream, self.group)
+            return {
+                "stream_length": self.redis.xlen(self.stream),
+                "pending": pending["pending"],
+                "dead_letter": self.redis.xlen(self.dead_letter),
+                "leaderboard_failures": self.leaderboard_failures
+            }
+        except redis.RedisError as e:
+            return {"error": str(e)}
+
+
+_point_consumer: Optional[PointEventConsumer] = None
+
+
+def get_point_consumer() -> PointEventConsumer:
+    """Get the process-wide point event consumer (singleton pattern)"""
+    global _point_consumer
+
+    if _point_consumer is None:
+        _point_consumer = PointEventConsumer()
+
+    return _point_consumer
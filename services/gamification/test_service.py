@@ -1,9 +1,16 @@
 """
 Test script for Gamification Service
 """
+import os
+import sys
+
 import requests
 import json
 
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.point_consumer import InvalidPointEvent, parse_event
+
 BASE_URL = "http://localhost:8011"
 
 def test_health():
@@ -71,6 +78,66 @@ def test_leaderboard():
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     return response.status_code == 200
 
+def test_leaderboard_me():
+    """Test period leaderboards and the rank-around-me views"""
+    print("\n=== Testing Leaderboard Ranks ===")
+    passed = True
+    for path in ("weekly", "monthly"):
+        response = requests.get(f"{BASE_URL}/api/leaderboards/{path}")
+        print(f"{path}: Status {response.status_code}")
+        passed = passed and response.status_code == 200 and isinstance(response.json(), list)
+    
+    for path in ("global/me", "weekly/me", "monthly/me", "class/1/me"):
+        response = requests.get(f"{BASE_URL}/api/leaderboards/{path}", params={"window": 2})
+        print(f"{path}: Status {response.status_code}")
+        if response.status_code != 200:
+            passed = False
+            continue
+        data = response.json()
+        print(f"Response: {json.dumps(data, indent=2)}")
+        neighbors = data["neighbors"]
+        if data["rank"] is None:
+            passed = passed and neighbors == []
+        else:
+            # The user is among their neighbors, at their own rank, and ranks are consecutive
+            ranks = [row["rank"] for row in neighbors]
+            passed = (
+                passed
+                and len(neighbors) <= 5
+                and ranks == list(range(ranks[0], ranks[0] + len(ranks)))
+                and any(row["user_id"] == data["user_id"] and row["rank"] == data["rank"] for row in neighbors)
+            )
+    return passed
+
+def test_parse_event():
+    """Test point event validation and idempotency keys"""
+    print("\n=== Testing Point Event Parsing ===")
+    explicit = parse_event("1-0", {"data": json.dumps({
+        "user_id": "5", "points": 10, "reason": "Quiz", "event_key": "quiz:9:5"
+    })})
+    by_reference = parse_event("1-1", {"data": json.dumps({
+        "user_id": 5, "points": 3, "reason": "Note", "reference_type": "note", "reference_id": "12"
+    })})
+    by_entry = parse_event("1-2", {"data": json.dumps({"user_id": 5, "points": -2, "reason": "x" * 150})})
+    print(f"Parsed: {explicit}, {by_reference}, {by_entry}")
+    
+    passed = (
+        explicit == (5, 10, "Quiz", None, None, "quiz:9:5")
+        and by_reference == (5, 3, "Note", "note", 12, "note:12:5")
+        and by_entry[5] == "stream:1-2"
+        and len(by_entry[2]) == 100
+    )
+    
+    for fields in ({}, {"data": "not json"}, {"data": json.dumps({"user_id": 5, "reason": "No points"})},
+                   {"data": json.dumps({"user_id": "abc", "points": 1, "reason": "Bad user"})}):
+        try:
+            parse_event("1-3", fields)
+            print(f"Accepted malformed event: {fields}")
+            passed = False
+        except InvalidPointEvent:
+            pass
+    return passed
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -84,7 +151,9 @@ def main():
             "Award Points": test_award_points(),
             "Transactions": test_transactions(),
             "Achievements": test_achievements(),
-            "Leaderboard": test_leaderboard()
+            "Leaderboard": test_leaderboard(),
+            "Leaderboard Ranks": test_leaderboard_me(),
+            "Point Event Parsing": test_parse_event()
         }
         
         print("\n" + "=" * 60)
@@ -41,6 +41,29 @@ class Settings(BaseSettings):
     # ChromaDB Configuration (Vector Database for RAG)
     CHROMADB_HOST: str = os.getenv("CHROMADB_HOST", "localhost")
     CHROMADB_PORT: int = int(os.getenv("CHROMADB_PORT", "8000"))
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))  # local query embeddings kept (LRU)
+    
+    # Provider connection pool and concurrency limits (per worker process)
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "300"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    OLLAMA_MAX_CONCURRENCY: int = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+    BEDROCK_MAX_CONCURRENCY: int = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+    CHROMADB_MAX_CONCURRENCY: int = int(os.getenv("CHROMADB_MAX_CONCURRENCY", "8"))
+    
+    # Conversation history (bounded tail plus rolling summary of older turns)
+    HISTORY_WINDOW_MESSAGES: int = int(os.getenv("HISTORY_WINDOW_MESSAGES", "6"))  # recent messages sent verbatim
+    HISTORY_SUMMARY_MIN_MESSAGES: int = int(os.getenv("HISTORY_SUMMARY_MIN_MESSAGES", "4"))  # fold older turns in batches of at least this many
+    HISTORY_SUMMARY_MAX_MESSAGES: int = int(os.getenv("HISTORY_SUMMARY_MAX_MESSAGES", "20"))  # per summary update
+    HISTORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+    
+    # Semantic response cache (near-duplicate questions over the same RAG chunks)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+    SEMANTIC_CACHE_TTL: int = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))  # seconds
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))  # LRU bound
+    SEMANTIC_CACHE_MAX_SCOPE_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_SCOPE_ENTRIES", "256"))  # entries scored per lookup
     
     class Config:
         env_file = ".env"
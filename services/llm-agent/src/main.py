@@ -10,6 +10,7 @@ from lm_common.logging import setup_logging, get_logger
 
 from .config import settings
 from .routes import chat, content
+from .services.provider_pool import close_http_client
 
 # Setup logging
 setup_logging(service_name=settings.SERVICE_NAME, level=settings.LOG_LEVEL)
@@ -69,6 +70,7 @@ async def startup_event():
 async def shutdown_event():
     """Shutdown event handler"""
     logger.info(f"{settings.SERVICE_NAME} shutting down...")
+    await close_http_client()
 
 
 if __name__ == "__main__":
@@ -15,6 +15,9 @@ class Conversation(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)  # FK constraint exists at DB level
     title = Column(String(500))
+    summary = Column(Text)  # Rolling summary of turns older than the history window
+    summary_message_id = Column(Integer)  # Last message folded into summary
+    message_count = Column(Integer, nullable=False, default=0)  # Maintained with every message insert
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
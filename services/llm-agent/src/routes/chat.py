@@ -2,11 +2,17 @@
 LLM Agent Service - Chat Routes
 API endpoints for AI chat interactions
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import AsyncIterator, List, Dict, Optional
+import asyncio
+import json
 
-from lm_common.database import get_db
+from lm_common.database import get_db, get_db_session
 
 from ..models import Conversation, Message, StudyMaterial
 from ..schemas import (
@@ -22,12 +28,16 @@ from ..schemas import (
 )
 from ..services import RAGService, LLMService
 from ..services.agent_service import AgentService
+from ..services.history_service import HistoryService
+from ..services.response_cache import get_response_cache
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 # Initialize services (singleton pattern)
 rag_service = RAGService()
 llm_service = LLMService()
+history_service = HistoryService(llm_service)
+response_cache = get_response_cache()
 
 # Initialize agent service (with error handling for graceful fallback)
 try:
@@ -40,19 +50,8 @@ except Exception as e:
     USE_AGENT = False
 
 
-@router.post("/message", response_model=ChatMessageResponse)
-async def send_message(
-    request: ChatMessageRequest,
-    db: Session = Depends(get_db)
-):
-    """
-    Send a message to the AI tutor
-    
-    - **conversation_id**: Optional conversation ID (creates new if not provided)
-    - **message**: User message
-    - **use_rag**: Whether to use RAG context retrieval
-    """
-    # Get or create conversation
+def _get_or_create_conversation(request: ChatMessageRequest, db: Session) -> Conversation:
+    """Load the requested conversation or start a new one"""
     if request.conversation_id:
         conversation = db.query(Conversation).filter(
             Conversation.id == request.conversation_id
@@ -62,39 +61,95 @@ async def send_message(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
-    else:
-        # Create new conversation
-        conversation = Conversation(
-            user_id=1,  # TODO: Get from JWT token
-            title=request.message[:50] + "..." if len(request.message) > 50 else request.message
-        )
-        db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
+        return conversation
+    
+    # Create new conversation
+    conversation = Conversation(
+        user_id=1,  # TODO: Get from JWT token
+        title=request.message[:50] + "..." if len(request.message) > 50 else request.message
+    )
+    db.add(conversation)
+    db.commit()
+    db.refresh(conversation)
+    return conversation
+
+
+def _add_user_message(conversation: Conversation, content: str, db: Session) -> List[Dict[str, str]]:
+    """Store the user message and return the prompt history that precedes it"""
+    # Bounded tail plus rolling summary, read before the new message is added
+    conversation_history = history_service.load_history(db, conversation)
     
-    # Store user message
     user_message = Message(
         conversation_id=conversation.id,
         role="user",
-        content=request.message
+        content=content
     )
     db.add(user_message)
+    _increment_message_count(db, conversation.id)
     
-    # Get conversation history
-    history_messages = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).order_by(Message.created_at).all()
+    return conversation_history
+
+
+def _increment_message_count(db: Session, conversation_id: int, count: int = 1) -> None:
+    """Bump the denormalized counter in the same transaction as the message insert"""
+    db.query(Conversation).filter(Conversation.id == conversation_id).update(
+        {Conversation.message_count: Conversation.message_count + count},
+        synchronize_session=False
+    )
+
+
+def _conversation_response(conversation: Conversation) -> ConversationResponse:
+    return ConversationResponse(
+        id=conversation.id,
+        title=conversation.title,
+        message_count=conversation.message_count or 0,
+        created_at=conversation.created_at,
+        updated_at=conversation.updated_at
+    )
+
+
+def _cache_scope(conversation_history: List[Dict[str, str]], sources: List[Dict]) -> Optional[List[str]]:
+    """
+    Chunk IDs that scope a cacheable answer, or None when the turn must not be cached
+    
+    Only opening questions are cached; follow-ups depend on earlier turns
+    that the cache key does not capture.
+    """
+    if any(msg["role"] == "assistant" for msg in conversation_history):
+        return None
+    return [s["id"] for s in sources if s.get("id")]
+
+
+async def _cached_tokens(answer: str) -> AsyncIterator[str]:
+    yield answer
+
+
+def _sse(event: dict) -> str:
+    """Format a server-sent event"""
+    return f"data: {json.dumps(event, default=str)}\n\n"
+
+
+@router.post("/message", response_model=ChatMessageResponse)
+async def send_message(
+    request: ChatMessageRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Send a message to the AI tutor
     
-    conversation_history = [
-        {"role": msg.role, "content": msg.content}
-        for msg in history_messages
-    ]
+    - **conversation_id**: Optional conversation ID (creates new if not provided)
+    - **message**: User message
+    - **use_rag**: Whether to use RAG context retrieval
+    """
+    conversation = _get_or_create_conversation(request, db)
+    conversation_history = _add_user_message(conversation, request.message, db)
     
     # Generate response using agent service (with fallback to basic LLM)
     try:
         if USE_AGENT and agent_service:
             # Use agent with tool capabilities
-            response_text = agent_service.chat(
+            response_text = await agent_service.chat(
                 message=request.message,
                 conversation_history=conversation_history,
                 use_rag=request.use_rag
@@ -106,15 +161,23 @@ async def send_message(
             sources = []
             if request.use_rag:
                 try:
-                    context, sources = rag_service.get_context_for_query(request.message, n_results=3)
+                    context, sources = await rag_service.get_context_for_query(request.message, n_results=3)
                 except Exception as e:
                     print(f"RAG retrieval failed: {e}")
             
-            response_text = llm_service.chat_with_context(
-                message=request.message,
-                context=context,
-                conversation_history=conversation_history
-            )
+            cache_scope = _cache_scope(conversation_history, sources)
+            cached = await response_cache.lookup(request.message, cache_scope) if cache_scope is not None else None
+            
+            if cached:
+                response_text = cached["answer"]
+            else:
+                response_text = await llm_service.chat_with_context(
+                    message=request.message,
+                    context=context,
+                    conversation_history=conversation_history
+                )
+                if cache_scope is not None:
+                    await response_cache.store(request.message, cache_scope, response_text, sources)
     except Exception as e:
         import traceback
         print(f"Error generating response: {str(e)}")
@@ -131,6 +194,7 @@ async def send_message(
         content=response_text
     )
     db.add(assistant_message)
+    _increment_message_count(db, conversation.id)
     
     # Update conversation timestamp
     conversation.updated_at = datetime.utcnow()
@@ -138,6 +202,11 @@ async def send_message(
     db.commit()
     db.refresh(assistant_message)
     
+    # Fold turns that left the history window into the summary after responding
+    # (the agent does not use the history, so it needs no summary)
+    if not (USE_AGENT and agent_service):
+        background_tasks.add_task(history_service.refresh_summary, conversation.id)
+    
     # Format sources
     source_list = [s['source'] for s in sources] if sources else None
     
@@ -150,31 +219,161 @@ async def send_message(
     )
 
 
+@router.post("/message/stream")
+async def send_message_stream(
+    request: ChatMessageRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Send a message to the AI tutor and stream the reply as server-sent events
+    
+    Events are JSON objects on `data:` lines:
+    - `{"type": "start", "conversation_id": ...}` once the user message is stored
+    - `{"type": "token", "content": "..."}` for each generated fragment
+    - `{"type": "done", "message_id": ..., "sources": [...], "created_at": ...}` after the reply is saved
+    - `{"type": "error", "detail": "..."}` if generation fails
+    """
+    conversation = _get_or_create_conversation(request, db)
+    conversation_history = _add_user_message(conversation, request.message, db)
+    db.commit()
+    
+    conversation_id = conversation.id
+    sources = []
+    cache_scope = None
+    
+    if USE_AGENT and agent_service:
+        # Agent handles RAG internally
+        tokens = agent_service.chat_stream(
+            message=request.message,
+            conversation_history=conversation_history,
+            use_rag=request.use_rag
+        )
+    else:
+        context = ""
+        if request.use_rag:
+            try:
+                context, sources = await rag_service.get_context_for_query(request.message, n_results=3)
+            except Exception as e:
+                print(f"RAG retrieval failed: {e}")
+        
+        cache_scope = _cache_scope(conversation_history, sources)
+        cached = await response_cache.lookup(request.message, cache_scope) if cache_scope is not None else None
+        
+        if cached:
+            tokens = _cached_tokens(cached["answer"])
+            cache_scope = None  # Already cached
+        else:
+            tokens = llm_service.chat_with_context_stream(
+                message=request.message,
+                context=context,
+                conversation_history=conversation_history
+            )
+    
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse({"type": "start", "conversation_id": conversation_id})
+        
+        parts = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield _sse({"type": "token", "content": token})
+        except Exception as e:
+            print(f"Error streaming response: {str(e)}")
+            yield _sse({"type": "error", "detail": f"Failed to generate response: {str(e)}"})
+            return
+        
+        response_text = "".join(parts)
+        if cache_scope is not None:
+            await response_cache.store(request.message, cache_scope, response_text, sources)
+        
+        # The request-scoped session may already be closed; persist with our own
+        with get_db_session() as stream_db:
+            assistant_message = Message(
+                conversation_id=conversation_id,
+                role="assistant",
+                content=response_text
+            )
+            stream_db.add(assistant_message)
+            stream_db.query(Conversation).filter(
+                Conversation.id == conversation_id
+            ).update({
+                Conversation.updated_at: datetime.utcnow(),
+                Conversation.message_count: Conversation.message_count + 1
+            }, synchronize_session=False)
+            stream_db.flush()
+            message_id = assistant_message.id
+            created_at = assistant_message.created_at
+        
+        yield _sse({
+            "type": "done",
+            "conversation_id": conversation_id,
+            "message_id": message_id,
+            "sources": [s['source'] for s in sources] if sources else None,
+            "created_at": created_at
+        })
+    
+    # The agent does not use the history, so it needs no summary
+    summary_refresh = None if USE_AGENT and agent_service else BackgroundTask(
+        history_service.refresh_summary, conversation_id
+    )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        background=summary_refresh,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx buffering so tokens flush immediately
+        }
+    )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Semantic response cache metrics (hits, misses, hit rate, entries)
+    
+    Use the hit rate to tune SEMANTIC_CACHE_THRESHOLD.
+    """
+    try:
+        return await asyncio.to_thread(response_cache.get_stats)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Cache unavailable: {str(e)}"
+        )
+
+
 @router.get("/conversations", response_model=list[ConversationResponse])
 async def list_conversations(
+    limit: int = Query(50, ge=1, le=100),
+    before: Optional[datetime] = Query(None, description="updated_at of the last conversation on the previous page"),
+    before_id: Optional[int] = Query(None, description="id of the last conversation on the previous page"),
     db: Session = Depends(get_db)
 ):
-    """List user's conversations"""
+    """
+    List user's conversations, most recently updated first
+    
+    Keyset pagination: pass the `updated_at` and `id` of the last item as
+    `before` and `before_id` to fetch the next page.
+    """
     # TODO: Filter by user_id from JWT token
-    conversations = db.query(Conversation).order_by(
-        Conversation.updated_at.desc()
-    ).limit(50).all()
+    query = db.query(Conversation)
     
-    result = []
-    for conv in conversations:
-        message_count = db.query(Message).filter(
-            Message.conversation_id == conv.id
-        ).count()
-        
-        result.append(ConversationResponse(
-            id=conv.id,
-            title=conv.title,
-            message_count=message_count,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at
-        ))
+    if before is not None:
+        if before_id is not None:
+            query = query.filter(
+                tuple_(Conversation.updated_at, Conversation.id) < tuple_(before, before_id)
+            )
+        else:
+            query = query.filter(Conversation.updated_at < before)
     
-    return result
+    conversations = query.order_by(
+        Conversation.updated_at.desc(),
+        Conversation.id.desc()
+    ).limit(limit).all()
+    
+    return [_conversation_response(conv) for conv in conversations]
 
 
 @router.post("/conversations", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
@@ -232,17 +431,7 @@ async def update_conversation(
     db.commit()
     db.refresh(conversation)
     
-    message_count = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).count()
-    
-    return ConversationResponse(
-        id=conversation.id,
-        title=conversation.title,
-        message_count=message_count,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at
-    )
+    return _conversation_response(conversation)
 
 
 @router.delete("/conversations/{conversation_id}", response_model=MessageResponse)
@@ -332,7 +521,7 @@ async def upload_study_material(
             "subject": material.subject or "general",
             "source": material.title
         }
-        rag_service.add_document(
+        await rag_service.add_document(
             text=request.content,
             metadata=metadata
         )
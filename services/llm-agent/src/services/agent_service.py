@@ -5,12 +5,13 @@ Uses native tool calling instead of LangChain agents for compatibility
 """
 from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage, SystemMessage
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 import os
 import json
 
 from ..tools import list_user_classes, create_class_tool
 from .rag_service import RAGService
+from .provider_pool import get_limiter
 from lm_common.logging import get_logger
 
 logger = get_logger(__name__)
@@ -72,7 +73,58 @@ class AgentService:
         
         logger.info("AgentService initialized successfully with tool binding")
     
-    def chat(
+    async def _build_messages(self, message: str, use_rag: bool) -> List[Any]:
+        """Build system + user messages, folding RAG context into the user turn"""
+        # Get RAG context if enabled
+        if use_rag:
+            try:
+                context, sources = await self.rag_service.get_context_for_query(message, n_results=3)
+                if context:
+                    logger.info(f"Retrieved RAG context from {len(sources)} sources")
+                    message = f"{message}\n\n[Context from study materials: {context[:500]}...]"
+            except Exception as e:
+                logger.warning(f"RAG retrieval failed: {e}")
+        
+        return [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=message)
+        ]
+    
+    async def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[str]:
+        """Execute tool calls requested by the model and collect their results"""
+        logger.info(f"Tool calls detected: {len(tool_calls)}")
+        
+        tool_results = []
+        for tool_call in tool_calls:
+            tool_name = tool_call.get('name')
+            tool_args = tool_call.get('args', {})
+            
+            logger.info(f"Executing tool: {tool_name}")
+            
+            # Find and execute tool
+            for tool in self.tools:
+                if tool.name == tool_name:
+                    try:
+                        result = await tool.ainvoke(tool_args)
+                        tool_results.append(result)
+                    except Exception as e:
+                        tool_results.append(f"Error executing {tool_name}: {str(e)}")
+                    break
+        
+        return tool_results
+    
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """Extract text from a streamed message chunk (string or content blocks)"""
+        content = getattr(chunk, 'content', '')
+        if isinstance(content, str):
+            return content
+        return "".join(
+            block.get('text', '') for block in content
+            if isinstance(block, dict) and block.get('type') == 'text'
+        )
+    
+    async def chat(
         self,
         message: str,
         conversation_history: List[Dict[str, str]] = None,
@@ -92,48 +144,16 @@ class AgentService:
         try:
             logger.info(f"Processing message: {message[:100]}...")
             
-            # Get RAG context if enabled
-            context = ""
-            if use_rag:
-                try:
-                    context, sources = self.rag_service.get_context_for_query(message, n_results=3)
-                    if context:
-                        logger.info(f"Retrieved RAG context from {len(sources)} sources")
-                        message = f"{message}\n\n[Context from study materials: {context[:500]}...]"
-                except Exception as e:
-                    logger.warning(f"RAG retrieval failed: {e}")
-            
-            # Build messages
-            messages = [
-                SystemMessage(content=SYSTEM_PROMPT),
-                HumanMessage(content=message)
-            ]
+            messages = await self._build_messages(message, use_rag)
             
             # Invoke LLM with tools
             logger.info("Invoking LLM with tool binding...")
-            response = self.llm_with_tools.invoke(messages)
+            async with get_limiter("bedrock"):
+                response = await self.llm_with_tools.ainvoke(messages)
             
             # Check if tool calls were made
             if hasattr(response, 'tool_calls') and response.tool_calls:
-                logger.info(f"Tool calls detected: {len(response.tool_calls)}")
-                
-                # Execute tool calls
-                tool_results = []
-                for tool_call in response.tool_calls:
-                    tool_name = tool_call.get('name')
-                    tool_args = tool_call.get('args', {})
-                    
-                    logger.info(f"Executing tool: {tool_name}")
-                    
-                    # Find and execute tool
-                    for tool in self.tools:
-                        if tool.name == tool_name:
-                            try:
-                                result = tool.invoke(tool_args)
-                                tool_results.append(result)
-                            except Exception as e:
-                                tool_results.append(f"Error executing {tool_name}: {str(e)}")
-                            break
+                tool_results = await self._execute_tool_calls(response.tool_calls)
                 
                 # If we executed tools, return their results
                 if tool_results:
@@ -149,6 +169,40 @@ class AgentService:
             logger.error(f"Error in agent chat: {str(e)}", exc_info=True)
             return f"I encountered an error processing your request: {str(e)}\n\nPlease try again or rephrase your question."
     
+    async def chat_stream(
+        self,
+        message: str,
+        conversation_history: List[Dict[str, str]] = None,
+        use_rag: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Process user message with tool calling, yielding text as it is generated
+        
+        Tool calls are assembled from the streamed chunks and executed once the
+        model finishes; their results are yielded as a final fragment.
+        """
+        try:
+            logger.info(f"Streaming message: {message[:100]}...")
+            
+            messages = await self._build_messages(message, use_rag)
+            
+            response = None
+            async with get_limiter("bedrock"):
+                async for chunk in self.llm_with_tools.astream(messages):
+                    response = chunk if response is None else response + chunk
+                    text = self._chunk_text(chunk)
+                    if text:
+                        yield text
+            
+            if response is not None and getattr(response, 'tool_calls', None):
+                tool_results = await self._execute_tool_calls(response.tool_calls)
+                if tool_results:
+                    yield "\n\n".join(tool_results)
+            
+        except Exception as e:
+            logger.error(f"Error in agent chat stream: {str(e)}", exc_info=True)
+            yield f"I encountered an error processing your request: {str(e)}\n\nPlease try again or rephrase your question."
+    
     def get_available_tools(self) -> List[str]:
         """Get list of available tool names"""
         return [tool.name for tool in self.tools]
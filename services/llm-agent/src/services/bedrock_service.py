@@ -4,7 +4,8 @@ Fast cloud LLM alternative for testing
 Uses Claude 3.5 Sonnet with Converse API for <10 second responses
 """
 import boto3
-from typing import Optional, List, Dict
+from botocore.config import Config
+from typing import Optional, List, Dict, Iterator
 
 from ..config import settings
 
@@ -18,7 +19,9 @@ class BedrockService:
             service_name='bedrock-runtime',
             region_name=settings.AWS_REGION,
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            # One pooled connection per concurrent generation
+            config=Config(max_pool_connections=settings.BEDROCK_MAX_CONCURRENCY)
         )
         self.model_id = settings.BEDROCK_MODEL
     
@@ -69,30 +72,63 @@ class BedrockService:
         except Exception as e:
             raise Exception(f"Bedrock generation failed: {e}")
     
-    def chat_with_context(
+    def generate_stream(
         self,
-        message: str,
-        context: str = "",
-        conversation_history: Optional[List[Dict]] = None
-    ) -> str:
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
         """
-        Generate chat response with optional context and history
+        Stream text using Bedrock ConverseStream API
         
         Args:
-            message: User message
-            context: Retrieved context from RAG
-            conversation_history: Previous messages
+            prompt: Input prompt
+            temperature: Sampling temperature (0-1)
+            max_tokens: Maximum tokens to generate
             
-        Returns:
-            Assistant response
+        Yields:
+            Text deltas as the model produces them
         """
+        try:
+            response = self.client.converse_stream(
+                modelId=self.model_id,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [{"text": prompt}]
+                    }
+                ],
+                inferenceConfig={
+                    "temperature": temperature,
+                    "maxTokens": max_tokens or 2048,
+                    "topP": 0.9
+                }
+            )
+            
+            for event in response['stream']:
+                delta = event.get('contentBlockDelta', {}).get('delta', {})
+                if delta.get('text'):
+                    yield delta['text']
+                    
+        except Exception as e:
+            raise Exception(f"Bedrock streaming failed: {e}")
+    
+    def build_chat_prompt(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> str:
+        """Build the Claude tutor prompt from context and history"""
         # Build conversation history
         history_text = ""
         if conversation_history:
-            for msg in conversation_history[-5:]:
+            for msg in conversation_history:  # Already bounded by HistoryService
                 role = msg.get("role", "user")
                 content = msg.get("content", "")
-                if role == "user":
+                if role == "system":
+                    history_text += f"{content}\n\n"
+                elif role == "user":
                     history_text += f"Human: {content}\n\n"
                 else:
                     history_text += f"Assistant: {content}\n\n"
@@ -104,4 +140,32 @@ class BedrockService:
         else:
             prompt_text = f"You are a helpful educational tutor.\n\n{history_text}Student: {message}\n\nTutor:"
         
-        return self.generate(prompt_text)
+        return prompt_text
+    
+    def chat_with_context(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Generate chat response with optional context and history
+        
+        Args:
+            message: User message
+            context: Retrieved context from RAG
+            conversation_history: Previous messages
+            
+        Returns:
+            Assistant response
+        """
+        return self.generate(self.build_chat_prompt(message, context, conversation_history))
+    
+    def chat_with_context_stream(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> Iterator[str]:
+        """Stream chat response with optional context and history"""
+        yield from self.generate_stream(self.build_chat_prompt(message, context, conversation_history))
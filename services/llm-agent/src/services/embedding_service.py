@@ -0,0 +1,103 @@
+"""
+LLM Agent Service - Embedding Service
+Local sentence embeddings using Chroma's default model (all-MiniLM-L6-v2, ONNX)
+Same model Chroma applies to query_texts, so vectors are comparable with the collection
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from chromadb.utils import embedding_functions
+
+from ..config import settings
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a question so trivially different phrasings share one key"""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" ?!.")
+
+
+class EmbeddingService:
+    """Lazy-loaded local embedding model with an LRU cache for query embeddings"""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self._embedding_function: Optional[embedding_functions.DefaultEmbeddingFunction] = None
+        self._cache_size = cache_size if cache_size is not None else settings.QUERY_EMBEDDING_CACHE_SIZE
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _get_function(self) -> embedding_functions.DefaultEmbeddingFunction:
+        if self._embedding_function is None:
+            self._embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        return self._embedding_function
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts (blocking, CPU-bound; call from a worker thread)
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per input text
+        """
+        if not texts:
+            return []
+        return [list(map(float, vector)) for vector in self._get_function()(texts)]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries through the LRU cache keyed on normalized text
+        (blocking; call from a worker thread)
+
+        Cache misses are embedded together in a single model pass.
+
+        Args:
+            queries: Raw query texts
+
+        Returns:
+            One embedding per query, in input order
+        """
+        keys = [normalize_text(query) for query in queries]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[i] = self._cache[key]
+                    self.cache_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.cache_misses += 1
+
+        if missing:
+            vectors = self.embed(list(missing.keys()))
+            with self._lock:
+                for (key, positions), vector in zip(missing.items(), vectors):
+                    for i in positions:
+                        results[i] = vector
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        return results
+
+
+_embedding_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide embedding service (singleton pattern)"""
+    global _embedding_service
+
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService()
+
+    return _embedding_service
@@ -0,0 +1,157 @@
+"""
+LLM Agent Service - History Service
+Bounded conversation history with a rolling summary of older turns
+Each turn loads only the messages newer than the summary (about
+HISTORY_WINDOW_MESSAGES rows); everything older is folded into
+Conversation.summary in the background, so prompt size and database load
+stay flat as conversations grow
+"""
+import asyncio
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from lm_common.database import get_db_session
+from lm_common.logging import get_logger
+
+from ..config import settings
+from ..models import Conversation, Message
+from .llm_service import LLMService
+
+logger = get_logger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a tutoring conversation between a student and an AI tutor.
+
+Current summary:
+{summary}
+
+New messages to fold in:
+{messages}
+
+Rewrite the summary so it covers everything above. Keep the topics studied, questions asked, key explanations and anything the student struggled with. Use at most a short paragraph.
+
+Updated summary:"""
+
+
+class HistoryService:
+    """Loads the recent history window and keeps the rolling summary current"""
+
+    def __init__(self, llm_service: Optional[LLMService] = None):
+        self.llm_service = llm_service or LLMService()
+        self.window = settings.HISTORY_WINDOW_MESSAGES
+
+    def load_history(self, db: Session, conversation: Conversation) -> List[Dict[str, str]]:
+        """
+        Get the prompt history for a conversation
+
+        Args:
+            db: Database session
+            conversation: Conversation being continued
+
+        Returns:
+            The rolling summary (as a system message, if any) followed by every
+            message after it, in chronological order
+        """
+        # Every message after the summary is sent: the window plus the older
+        # ones still waiting to be folded in, of which there are fewer than
+        # HISTORY_SUMMARY_MIN_MESSAGES unless a refresh failed; the limit
+        # caps that backlog
+        query = db.query(Message.role, Message.content).filter(
+            Message.conversation_id == conversation.id
+        )
+        if conversation.summary_message_id is not None:
+            query = query.filter(Message.id > conversation.summary_message_id)
+        tail = query.order_by(Message.id.desc()).limit(
+            self.window + settings.HISTORY_SUMMARY_MIN_MESSAGES
+        ).all()
+
+        history = []
+        if conversation.summary:
+            history.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {conversation.summary}"
+            })
+        history.extend({"role": role, "content": content} for role, content in reversed(tail))
+        return history
+
+    async def refresh_summary(self, conversation_id: int) -> None:
+        """
+        Fold messages that have left the history window into the summary
+
+        Runs after the reply is sent. Messages are folded in batches of at
+        least HISTORY_SUMMARY_MIN_MESSAGES so most turns skip the LLM call.
+        """
+        try:
+            pending = await asyncio.to_thread(self._pending_messages, conversation_id)
+            if not pending:
+                return
+
+            previous_summary, previous_message_id, messages = pending
+            transcript = "\n".join(
+                f"{role.capitalize()}: {content}" for _, role, content in messages
+            )
+            summary = await self.llm_service.generate(
+                SUMMARY_PROMPT.format(summary=previous_summary or "(none yet)", messages=transcript),
+                temperature=0.3,
+                max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS
+            )
+
+            await asyncio.to_thread(
+                self._save_summary,
+                conversation_id,
+                previous_message_id,
+                summary.strip(),
+                messages[-1][0]
+            )
+        except Exception as e:
+            logger.warning(f"Summary refresh failed for conversation {conversation_id}: {e}")
+
+    def _pending_messages(self, conversation_id: int):
+        """Read the current summary and the unsummarized messages outside the window"""
+        with get_db_session() as db:
+            conversation = db.query(
+                Conversation.summary, Conversation.summary_message_id
+            ).filter(Conversation.id == conversation_id).first()
+            if not conversation:
+                return None
+
+            summary, summary_message_id = conversation
+
+            # Newest message that has dropped out of the window
+            boundary = db.query(Message.id).filter(
+                Message.conversation_id == conversation_id
+            ).order_by(Message.id.desc()).offset(self.window).limit(1).scalar()
+
+            if boundary is None or boundary <= (summary_message_id or 0):
+                return None
+
+            messages = db.query(Message.id, Message.role, Message.content).filter(
+                Message.conversation_id == conversation_id,
+                Message.id > (summary_message_id or 0),
+                Message.id <= boundary
+            ).order_by(Message.id).limit(settings.HISTORY_SUMMARY_MAX_MESSAGES).all()
+
+            if len(messages) < settings.HISTORY_SUMMARY_MIN_MESSAGES:
+                return None
+
+            return summary, summary_message_id, [tuple(m) for m in messages]
+
+    def _save_summary(
+        self,
+        conversation_id: int,
+        previous_message_id: Optional[int],
+        summary: str,
+        last_message_id: int
+    ) -> None:
+        """Store the new summary unless a concurrent refresh already advanced it"""
+        with get_db_session() as db:
+            query = db.query(Conversation).filter(Conversation.id == conversation_id)
+            if previous_message_id is None:
+                query = query.filter(Conversation.summary_message_id.is_(None))
+            else:
+                query = query.filter(Conversation.summary_message_id == previous_message_id)
+
+            query.update({
+                Conversation.summary: summary,
+                Conversation.summary_message_id: last_message_id
+            }, synchronize_session=False)
@@ -2,11 +2,16 @@
 LLM Agent Service - LLM Service
 Unified LLM interface supporting both Ollama and AWS Bedrock
 Switches between providers based on LLM_PROVIDER environment variable
+All calls are async: Ollama goes through the shared keep-alive HTTP pool,
+Bedrock's blocking boto3 calls run in worker threads, and each provider is
+capped by its own concurrency limiter
 """
-import requests
-from typing import List, Dict, Optional
+import asyncio
+import json
+from typing import List, Dict, Optional, AsyncIterator
 from ..config import settings
 from .bedrock_service import BedrockService
+from .provider_pool import get_http_client, get_limiter, iterate_in_thread
 
 
 class LLMService:
@@ -27,7 +32,22 @@ class LLMService:
             self.bedrock_service = None
             print(f"[LLM] Using Ollama ({self.model})")
     
-    def generate(
+    def _ollama_payload(self, prompt: str, temperature: float, max_tokens: Optional[int], stream: bool) -> dict:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": temperature
+            }
+        }
+        
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        
+        return payload
+    
+    async def generate(
         self,
         prompt: str,
         temperature: float = 0.7,
@@ -45,68 +65,100 @@ class LLMService:
             Generated text response
         """
         if self.provider == "bedrock":
-            # Use Bedrock
-            return self.bedrock_service.generate(prompt, temperature, max_tokens)
-        else:
-            # Use Ollama
-            try:
-                payload = {
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature
-                    }
-                }
-                
-                if max_tokens:
-                    payload["options"]["num_predict"] = max_tokens
-                
-                response = requests.post(
+            # Use Bedrock (boto3 is blocking, keep it off the event loop)
+            async with get_limiter("bedrock"):
+                return await asyncio.to_thread(
+                    self.bedrock_service.generate, prompt, temperature, max_tokens
+                )
+        
+        # Use Ollama
+        try:
+            async with get_limiter("ollama"):
+                response = await get_http_client().post(
                     self.ollama_url,
-                    json=payload,
-                    timeout=300
+                    json=self._ollama_payload(prompt, temperature, max_tokens, stream=False)
                 )
                 response.raise_for_status()
                 
                 return response.json().get("response", "")
-                
-            except Exception as e:
-                raise Exception(f"LLM generation failed: {e}")
+            
+        except Exception as e:
+            raise Exception(f"LLM generation failed: {e}")
     
-    def chat_with_context(
+    async def generate_stream(
         self,
-        message: str,
-        context: str = "",
-        conversation_history: Optional[List[Dict]] = None
-    ) -> str:
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
         """
-        Generate chat response with optional context and history (provider-agnostic)
+        Stream response tokens from LLM as they are produced (provider-agnostic)
         
         Args:
-            message: User message
-            context: Retrieved context from RAG
-            conversation_history: Previous messages
+            prompt: Input prompt
+            temperature: Sampling temperature (0-1)
+            max_tokens: Maximum tokens to generate
             
-        Returns:
-            Assistant response
+        Yields:
+            Text fragments in generation order
         """
         if self.provider == "bedrock":
-            # Use Bedrock service's chat_with_context method
-            return self.bedrock_service.chat_with_context(message, context, conversation_history)
-        else:
-            # Use Ollama with formatted prompt
-            # Build conversation history
-            history_text = ""
-            if conversation_history:
-                for msg in conversation_history[-5:]:  # Last 5 messages
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    history_text += f"{role.capitalize()}: {content}\n"
-            
-            # Build prompt
-            if context:
-                prompt = f"""You are a helpful educational tutor. Answer the student's question using the information provided in the context below.
+            async with get_limiter("bedrock"):
+                async for token in iterate_in_thread(
+                    self.bedrock_service.generate_stream(prompt, temperature, max_tokens)
+                ):
+                    yield token
+            return
+        
+        try:
+            async with get_limiter("ollama"):
+                # Ollama streams newline-delimited JSON objects
+                async with get_http_client().stream(
+                    "POST",
+                    self.ollama_url,
+                    json=self._ollama_payload(prompt, temperature, max_tokens, stream=True)
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("response"):
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            break
+        except Exception as e:
+            raise Exception(f"LLM streaming failed: {e}")
+    
+    def build_chat_prompt(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> str:
+        """Build the provider-specific tutor prompt from context and history"""
+        if self.provider == "bedrock":
+            return self.bedrock_service.build_chat_prompt(message, context, conversation_history)
+        return self._build_chat_prompt(message, context, conversation_history)
+    
+    def _build_chat_prompt(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> str:
+        """Build the Ollama tutor prompt from context and history"""
+        # Build conversation history
+        history_text = ""
+        if conversation_history:
+            for msg in conversation_history:  # Already bounded by HistoryService
+                role = msg.get("role", "user")
+                content = msg.get("content", "")
+                history_text += f"{role.capitalize()}: {content}\n"
+        
+        # Build prompt
+        if context:
+            return f"""You are a helpful educational tutor. Answer the student's question using the information provided in the context below.
 
 Context:
 {context}
@@ -115,12 +167,51 @@ Context:
 Student: {message}
 
 Tutor:"""
-            else:
-                prompt = f"""You are a helpful educational tutor.
+        
+        return f"""You are a helpful educational tutor.
 
 {history_text}
 Student: {message}
 
 Tutor:"""
+    
+    async def chat_with_context_stream(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream chat response tokens with optional context and history (provider-agnostic)
+        
+        Args:
+            message: User message
+            context: Retrieved context from RAG
+            conversation_history: Previous messages
             
-            return self.generate(prompt)
+        Yields:
+            Assistant response fragments
+        """
+        async for token in self.generate_stream(
+            self.build_chat_prompt(message, context, conversation_history)
+        ):
+            yield token
+    
+    async def chat_with_context(
+        self,
+        message: str,
+        context: str = "",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Generate chat response with optional context and history (provider-agnostic)
+        
+        Args:
+            message: User message
+            context: Retrieved context from RAG
+            conversation_history: Previous messages
+            
+        Returns:
+            Assistant response
+        """
+        return await self.generate(self.build_chat_prompt(message, context, conversation_history))
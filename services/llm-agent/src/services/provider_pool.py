@@ -0,0 +1,74 @@
+"""
+LLM Agent Service - Provider Pool
+Shared async HTTP connection pool and per-provider concurrency limits
+One slow generation must not hold the event loop or starve other requests
+"""
+import asyncio
+from typing import AsyncIterator, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from ..config import settings
+
+T = TypeVar("T")
+
+_http_client: Optional[httpx.AsyncClient] = None
+_limiters: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client (singleton pattern)
+
+    Connections are kept alive between requests so Ollama calls skip the
+    TCP handshake.
+    """
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=10.0)
+        )
+
+    return _http_client
+
+
+def get_limiter(provider: str) -> asyncio.Semaphore:
+    """
+    Get the concurrency limiter for a provider
+
+    Args:
+        provider: "ollama", "bedrock" or "chromadb"
+    """
+    if provider not in _limiters:
+        limits = {
+            "ollama": settings.OLLAMA_MAX_CONCURRENCY,
+            "bedrock": settings.BEDROCK_MAX_CONCURRENCY,
+            "chromadb": settings.CHROMADB_MAX_CONCURRENCY,
+        }
+        _limiters[provider] = asyncio.Semaphore(limits.get(provider, 4))
+    return _limiters[provider]
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Drive a blocking iterator (e.g. a boto3 event stream) from a worker thread"""
+    sentinel = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, sentinel)
+        if item is sentinel:
+            break
+        yield item
+
+
+async def close_http_client() -> None:
+    """Close pooled connections on shutdown"""
+    global _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
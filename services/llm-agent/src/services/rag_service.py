@@ -2,11 +2,19 @@
 LLM Agent Service - RAG Service
 Retrieval Augmented Generation using ChromaDB
 Extracted from POC 00 - Tested and Validated
+The Chroma client is blocking, so calls run in worker threads under the
+chromadb concurrency limiter instead of on the event loop
 """
+import asyncio
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from ..config import settings
+from .embedding_service import get_embedding_service
+from .provider_pool import get_limiter
+
+
+EMPTY_RESULTS = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
 
 
 class RAGService:
@@ -16,6 +24,8 @@ class RAGService:
         """Initialize ChromaDB client (lazy connection)"""
         self.client = None
         self.collection_name = "education"
+        self._collections: Dict[str, Any] = {}
+        self.embedding_service = get_embedding_service()
     
     def _get_client(self):
         """Lazy load ChromaDB client"""
@@ -31,7 +41,13 @@ class RAGService:
                 return None
         return self.client
     
-    def search_content(
+    def _get_collection(self, client, collection_name: str):
+        """Get a collection handle, resolving it against the server only once"""
+        if collection_name not in self._collections:
+            self._collections[collection_name] = client.get_or_create_collection(collection_name)
+        return self._collections[collection_name]
+    
+    async def search_content(
         self,
         query: str,
         collection_name: Optional[str] = None,
@@ -46,47 +62,71 @@ class RAGService:
             n_results: Number of results to return
             
         Returns:
-            Dictionary with documents, metadatas, distances
+            Dictionary with ids, documents, metadatas, distances
         """
-        try:
-            client = self._get_client()
-            if not client:
-                return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
-            
-            coll_name = collection_name or self.collection_name
-            collection = client.get_or_create_collection(coll_name)
-            
-            results = collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            return results
-        except Exception as e:
-            print(f"Error searching content: {e}")
-            return {
-                "documents": [[]],
-                "metadatas": [[]],
-                "distances": [[]]
-            }
+        return (await self.search_batch([query], collection_name, n_results))[0]
     
-    def get_context_for_query(
+    async def search_batch(
         self,
-        query: str,
+        queries: List[str],
+        collection_name: Optional[str] = None,
         n_results: int = 3
-    ) -> tuple[str, List[Dict]]:
+    ) -> List[Dict]:
         """
-        Get formatted context and sources for a query
+        Search for several queries with a single Chroma round trip
+        
+        Query embeddings are computed locally (and cached), so Chroma does
+        not re-embed the query text on every call.
         
         Args:
-            query: User question
-            n_results: Number of context chunks to retrieve
+            queries: Search queries
+            collection_name: Collection to search (default: education)
+            n_results: Number of results per query
             
         Returns:
-            Tuple of (context_text, sources_list)
+            One result dictionary per query, each shaped like search_content's
         """
-        search_results = self.search_content(query, n_results=n_results)
+        if not queries:
+            return []
+        
+        empty = [EMPTY_RESULTS] * len(queries)
         
+        try:
+            client = self._get_client()
+            if not client:
+                return empty
+            
+            coll_name = collection_name or self.collection_name
+            
+            def query_collection():
+                embeddings = self.embedding_service.embed_queries(queries)
+                collection = self._get_collection(client, coll_name)
+                return collection.query(
+                    query_embeddings=embeddings,
+                    n_results=n_results
+                )
+            
+            async with get_limiter("chromadb"):
+                results = await asyncio.to_thread(query_collection)
+            
+            # Split the batched response into per-query results
+            return [
+                {
+                    key: [results[key][i]] if results.get(key) else [[]]
+                    for key in ("ids", "documents", "metadatas", "distances")
+                }
+                for i in range(len(queries))
+            ]
+        except Exception as e:
+            print(f"Error searching content: {e}")
+            # Drop cached handles in case the collection was recreated
+            self._collections.pop(collection_name or self.collection_name, None)
+            return empty
+    
+    @staticmethod
+    def _format_context(search_results: Dict) -> Tuple[str, List[Dict]]:
+        """Format one query's search results as context text and sources"""
+        ids = search_results['ids'][0] if search_results.get('ids') else []
         documents = search_results['documents'][0] if search_results['documents'] else []
         metadatas = search_results['metadatas'][0] if search_results['metadatas'] else []
         distances = search_results['distances'][0] if search_results['distances'] else []
@@ -101,6 +141,7 @@ class RAGService:
         sources = []
         for i, metadata in enumerate(metadatas):
             sources.append({
+                "id": ids[i] if i < len(ids) else None,
                 "source": metadata.get("source", "Unknown"),
                 "relevance_score": 1 - distances[i] if i < len(distances) else 0,
                 "chunk_index": metadata.get("chunk_index", i)
@@ -108,7 +149,42 @@ class RAGService:
         
         return context, sources
     
-    def add_document(
+    async def get_context_for_query(
+        self,
+        query: str,
+        n_results: int = 3
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Get formatted context and sources for a query
+        
+        Args:
+            query: User question
+            n_results: Number of context chunks to retrieve
+            
+        Returns:
+            Tuple of (context_text, sources_list)
+        """
+        return self._format_context(await self.search_content(query, n_results=n_results))
+    
+    async def get_context_for_queries(
+        self,
+        queries: List[str],
+        n_results: int = 3
+    ) -> List[Tuple[str, List[Dict]]]:
+        """
+        Get formatted context and sources for several queries in one round trip
+        
+        Args:
+            queries: User questions (e.g. every question of a quiz)
+            n_results: Number of context chunks to retrieve per question
+            
+        Returns:
+            One (context_text, sources_list) tuple per query
+        """
+        results = await self.search_batch(queries, n_results=n_results)
+        return [self._format_context(result) for result in results]
+    
+    async def add_document(
         self,
         text: str,
         metadata: Dict,
@@ -131,16 +207,20 @@ class RAGService:
                 raise Exception("ChromaDB not available")
             
             coll_name = collection_name or self.collection_name
-            collection = client.get_or_create_collection(coll_name)
             
             # Generate ID
             doc_id = f"doc_{metadata.get('user_id', 'unknown')}_{metadata.get('material_id', 0)}"
             
-            collection.add(
-                documents=[text],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            def add_to_collection():
+                collection = self._get_collection(client, coll_name)
+                collection.add(
+                    documents=[text],
+                    metadatas=[metadata],
+                    ids=[doc_id]
+                )
+            
+            async with get_limiter("chromadb"):
+                await asyncio.to_thread(add_to_collection)
             
             return doc_id
         except Exception as e:
@@ -0,0 +1,250 @@
+"""
+LLM Agent Service - Semantic Response Cache
+Reuses tutor answers for near-duplicate questions about the same material
+
+Entries are scoped by the set of RAG chunk IDs retrieved for the question, so
+only answers grounded in the same context are candidates. Within a scope the
+normalized question embedding must reach SEMANTIC_CACHE_THRESHOLD cosine
+similarity to count as a hit.
+
+A lookup reads only the scope's packed embeddings, scores them in one matrix
+product and then fetches the single best entry. Each scope keeps at most
+SEMANTIC_CACHE_MAX_SCOPE_ENTRIES entries (oldest dropped first), so a busy
+scope such as the no-RAG one (no chunk IDs) cannot make lookups grow with
+the whole cache.
+
+Redis layout:
+    llm:semcache:entry:{scope}:{id}  JSON entry, expires after SEMANTIC_CACHE_TTL
+    llm:semcache:scope:{scope}       sorted set of entry IDs in the scope by creation time
+    llm:semcache:vectors:{scope}     hash of entry ID -> base64 float32 question embedding
+    llm:semcache:lru                 sorted set of entry IDs by last access
+    llm:semcache:metrics             hash of hit/miss/store/eviction counters
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from lm_common.redis_client import get_redis_client, cache_set
+from lm_common.logging import get_logger
+
+from ..config import settings
+from .embedding_service import get_embedding_service, normalize_text
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "llm:semcache"
+LRU_KEY = f"{KEY_PREFIX}:lru"
+METRICS_KEY = f"{KEY_PREFIX}:metrics"
+
+
+def _scope_hash(chunk_ids: List[str]) -> str:
+    """Stable hash of the retrieved chunk set (order-independent)"""
+    joined = "|".join(sorted(chunk_ids))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:32]
+
+
+def _entry_key(entry_id: str) -> str:
+    return f"{KEY_PREFIX}:entry:{entry_id}"
+
+
+def _scope_key(scope: str) -> str:
+    return f"{KEY_PREFIX}:scope:{scope}"
+
+
+def _vectors_key(scope: str) -> str:
+    return f"{KEY_PREFIX}:vectors:{scope}"
+
+
+def _pack(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _unpack(packed: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(packed), dtype=np.float32)
+
+
+class SemanticResponseCache:
+    """Redis-backed semantic cache for tutor answers"""
+
+    def __init__(self):
+        self.enabled = settings.SEMANTIC_CACHE_ENABLED
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD
+        self.ttl = settings.SEMANTIC_CACHE_TTL
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.max_scope_entries = settings.SEMANTIC_CACHE_MAX_SCOPE_ENTRIES
+
+    async def lookup(self, question: str, chunk_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent question
+
+        Args:
+            question: Raw user question
+            chunk_ids: IDs of the RAG chunks retrieved for the question
+
+        Returns:
+            Dict with answer, sources and similarity, or None on miss
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return await asyncio.to_thread(self._lookup, question, chunk_ids)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+    async def store(
+        self,
+        question: str,
+        chunk_ids: List[str],
+        answer: str,
+        sources: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Cache an answer for the question and retrieved chunk set"""
+        if not self.enabled or not answer:
+            return
+
+        try:
+            await asyncio.to_thread(self._store, question, chunk_ids, answer, sources or [])
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+
+    def _embed_question(self, question: str) -> np.ndarray:
+        vector = np.asarray(get_embedding_service().embed_queries([question])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _lookup(self, question: str, chunk_ids: List[str]) -> Optional[Dict[str, Any]]:
+        client = get_redis_client()
+        scope = _scope_hash(chunk_ids)
+
+        pipe = client.pipeline()
+        pipe.zrangebyscore(_scope_key(scope), "-inf", time.time() - self.ttl)
+        pipe.hgetall(_vectors_key(scope))
+        expired, vectors = pipe.execute()
+
+        if expired:
+            self._remove(client, expired)
+            for entry_id in expired:
+                vectors.pop(entry_id, None)
+
+        if vectors:
+            entry_ids = list(vectors)
+            matrix = np.stack([_unpack(vectors[entry_id]) for entry_id in entry_ids])
+            scores = matrix @ self._embed_question(question)
+
+            # Best candidates first; one may have been evicted since the hash was read
+            for index in np.argsort(scores)[::-1]:
+                score = float(scores[index])
+                if score < self.threshold:
+                    break
+                raw = client.get(_entry_key(entry_ids[index]))
+                if raw is None:
+                    self._remove(client, [entry_ids[index]])
+                    continue
+
+                entry = json.loads(raw)
+                pipe = client.pipeline()
+                pipe.zadd(LRU_KEY, {entry_ids[index]: time.time()})
+                pipe.hincrby(METRICS_KEY, "hits", 1)
+                pipe.execute()
+                return {
+                    "answer": entry["answer"],
+                    "sources": entry.get("sources", []),
+                    "similarity": score
+                }
+
+        client.hincrby(METRICS_KEY, "misses", 1)
+        return None
+
+    def _store(self, question: str, chunk_ids: List[str], answer: str, sources: List[Dict[str, Any]]) -> None:
+        client = get_redis_client()
+        scope = _scope_hash(chunk_ids)
+        entry_id = f"{scope}:{uuid.uuid4().hex[:12]}"
+        now = time.time()
+
+        cache_set(_entry_key(entry_id), {
+            "question": normalize_text(question),
+            "answer": answer,
+            "sources": sources,
+            "created_at": now
+        }, expire=self.ttl)
+
+        pipe = client.pipeline()
+        pipe.hset(_vectors_key(scope), entry_id, _pack(self._embed_question(question)))
+        pipe.expire(_vectors_key(scope), self.ttl)
+        pipe.zadd(_scope_key(scope), {entry_id: now})
+        pipe.expire(_scope_key(scope), self.ttl)
+        pipe.zadd(LRU_KEY, {entry_id: now})
+        pipe.hincrby(METRICS_KEY, "stores", 1)
+        pipe.zcard(_scope_key(scope))
+        pipe.zcard(LRU_KEY)
+        scope_size, size = pipe.execute()[-2:]
+
+        if scope_size > self.max_scope_entries:
+            oldest = client.zrange(_scope_key(scope), 0, scope_size - self.max_scope_entries - 1)
+            self._remove(client, oldest, evicted=True)
+            size -= len(oldest)
+
+        if size > self.max_entries:
+            self._evict(client, size - self.max_entries)
+
+    def _evict(self, client, count: int) -> None:
+        """Drop the least recently used entries"""
+        victims = [entry_id for entry_id, _ in client.zpopmin(LRU_KEY, count)]
+        self._remove(client, victims, evicted=True)
+
+    def _remove(self, client, entry_ids: List[str], evicted: bool = False) -> None:
+        """Delete entries with their embeddings and index memberships"""
+        if not entry_ids:
+            return
+
+        pipe = client.pipeline()
+        for entry_id in entry_ids:
+            scope = entry_id.split(":", 1)[0]
+            pipe.delete(_entry_key(entry_id))
+            pipe.hdel(_vectors_key(scope), entry_id)
+            pipe.zrem(_scope_key(scope), entry_id)
+            pipe.zrem(LRU_KEY, entry_id)
+        if evicted:
+            pipe.hincrby(METRICS_KEY, "evictions", len(entry_ids))
+        pipe.execute()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for tuning the similarity threshold"""
+        client = get_redis_client()
+        metrics = client.hgetall(METRICS_KEY)
+        hits = int(metrics.get("hits", 0))
+        misses = int(metrics.get("misses", 0))
+        lookups = hits + misses
+
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "max_scope_entries": self.max_scope_entries,
+            "entries": client.zcard(LRU_KEY),
+            "hits": hits,
+            "misses": misses,
+            "stores": int(metrics.get("stores", 0)),
+            "evictions": int(metrics.get("evictions", 0)),
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+
+_response_cache: Optional[SemanticResponseCache] = None
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Get singleton SemanticResponseCache instance"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = SemanticResponseCache()
+    return _response_cache
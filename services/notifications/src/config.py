@@ -5,6 +5,13 @@ class Settings(BaseSettings):
     jwt_secret: str
     jwt_algorithm: str = "HS256"
     service_port: int = 8013
+
+    # Unread counters (Redis)
+    unread_count_ttl: int = 86400
+    unread_reconcile_interval: int = 300
+
+    # Bulk fan-out
+    fanout_max_recipients: int = 10000
     
     class Config:
         env_file = ".env"
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
+from lm_common.db_pool import pool_stats
 from .config import settings
 from .routes import notifications, messages
+from .services.unread_counter import get_unread_counter
 
 app = FastAPI(
     title="Notifications Service",
@@ -16,12 +18,22 @@ app = FastAPI(
 app.include_router(notifications.router)
 app.include_router(messages.router)
 
+@app.on_event("startup")
+async def start_unread_reconciler():
+    get_unread_counter().start()
+
+@app.on_event("shutdown")
+async def stop_unread_reconciler():
+    get_unread_counter().stop()
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "service": "notifications",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "db_pools": pool_stats(),
+        "unread_counters": get_unread_counter().stats()
     }
 
 if __name__ == "__main__":
@@ -12,6 +12,20 @@ class NotificationCreate(BaseModel):
     related_type: Optional[str] = None
     action_url: Optional[str] = None
 
+class NotificationBulkCreate(BaseModel):
+    user_ids: List[int] = []
+    study_group_id: Optional[int] = None
+    type: str
+    title: str
+    message: str
+    related_id: Optional[int] = None
+    related_type: Optional[str] = None
+    action_url: Optional[str] = None
+
+class NotificationBulkResponse(BaseModel):
+    created: int
+    skipped: int
+
 class NotificationResponse(BaseModel):
     id: int
     user_id: int
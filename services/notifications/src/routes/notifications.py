@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 from ..models import (
     NotificationResponse, NotificationMarkRead, NotificationPreferences,
-    NotificationPreferencesResponse
+    NotificationPreferencesResponse, NotificationBulkCreate, NotificationBulkResponse
 )
+from ..config import settings
 from ..services.notification_service import NotificationService
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
@@ -26,6 +27,25 @@ async def list_notifications(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk", response_model=NotificationBulkResponse)
+async def create_notifications_bulk(data: NotificationBulkCreate):
+    """Send one notification to many users (explicit IDs and/or a study group)"""
+    if not data.user_ids and data.study_group_id is None:
+        raise HTTPException(status_code=400, detail="user_ids or study_group_id is required")
+    if len(data.user_ids) > settings.fanout_max_recipients:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.fanout_max_recipients} recipients per request"
+        )
+    try:
+        return notification_service.create_notifications_bulk(
+            data.user_ids,
+            data.model_dump(exclude={"user_ids", "study_group_id"}),
+            study_group_id=data.study_group_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/mark-read")
 async def mark_notifications_read(
     data: NotificationMarkRead,
@@ -2,6 +2,7 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import List, Dict, Any
 from datetime import datetime
+from lm_common.db_pool import get_connection
 from ..config import settings
 
 class MessageService:
@@ -9,7 +10,7 @@ class MessageService:
         self.db_url = settings.database_url
     
     def get_connection(self):
-        return psycopg2.connect(self.db_url)
+        return get_connection(self.db_url)
     
     def send_message(self, sender_id: int, recipient_id: int, message: str) -> Dict[str, Any]:
         """Send a direct message"""
@@ -1,15 +1,19 @@
+import io
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from lm_common.db_pool import get_connection
 from ..config import settings
+from .unread_counter import get_unread_counter
 
 class NotificationService:
     def __init__(self):
         self.db_url = settings.database_url
+        self.unread = get_unread_counter()
     
     def get_connection(self):
-        return psycopg2.connect(self.db_url)
+        return get_connection(self.db_url)
     
     def list_notifications(self, user_id: int, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """List notifications for a user"""
@@ -39,6 +43,7 @@ class NotificationService:
                     WHERE user_id = %s AND id = ANY(%s) AND is_read = false
                 """, (user_id, notification_ids))
                 conn.commit()
+                self.unread.adjust(user_id, -cur.rowcount)
                 return cur.rowcount
         finally:
             conn.close()
@@ -54,6 +59,7 @@ class NotificationService:
                     WHERE user_id = %s AND is_read = false
                 """, (user_id,))
                 conn.commit()
+                self.unread.adjust(user_id, -cur.rowcount)
                 return cur.rowcount
         finally:
             conn.close()
@@ -66,24 +72,21 @@ class NotificationService:
                 cur.execute("""
                     DELETE FROM notifications
                     WHERE id = %s AND user_id = %s
+                    RETURNING is_read
                 """, (notification_id, user_id))
+                deleted = cur.fetchone()
                 conn.commit()
-                return cur.rowcount > 0
+                if deleted is None:
+                    return False
+                if not deleted[0]:
+                    self.unread.adjust(user_id, -1)
+                return True
         finally:
             conn.close()
     
     def get_unread_count(self, user_id: int) -> int:
-        """Get count of unread notifications"""
-        conn = self.get_connection()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT COUNT(*) FROM notifications
-                    WHERE user_id = %s AND is_read = false
-                """, (user_id,))
-                return cur.fetchone()[0]
-        finally:
-            conn.close()
+        """Get count of unread notifications (Redis counter, recounted on miss)"""
+        return self.unread.get(user_id)
     
     def get_preferences(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get notification preferences for a user"""
@@ -178,7 +181,67 @@ class NotificationService:
                     notification_data.get('related_type'),
                     notification_data.get('action_url')
                 ))
+                notification = dict(cur.fetchone())
                 conn.commit()
-                return dict(cur.fetchone())
+                self.unread.adjust(notification['user_id'], 1)
+                return notification
+        finally:
+            conn.close()
+
+    def create_notifications_bulk(self, user_ids: List[int], notification_data: Dict[str, Any],
+                                  study_group_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fan one notification out to many recipients in a single write
+
+        Recipient IDs are streamed into a temp table with COPY, then one
+        INSERT ... SELECT creates every row (recipients without a users row
+        are skipped rather than failing the batch). Unread counters are
+        bumped in one Redis pipeline after commit.
+
+        Returns:
+            Dict with created count and skipped recipient count
+        """
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("CREATE TEMP TABLE notification_recipients (user_id INTEGER) ON COMMIT DROP")
+                recipients = set(user_ids)
+                if recipients:
+                    cur.copy_expert(
+                        "COPY notification_recipients (user_id) FROM STDIN",
+                        io.StringIO("".join(f"{user_id}\n" for user_id in recipients))
+                    )
+                if study_group_id is not None:
+                    cur.execute("""
+                        INSERT INTO notification_recipients (user_id)
+                        SELECT user_id FROM study_group_members WHERE group_id = %s
+                    """, (study_group_id,))
+
+                cur.execute("""
+                    INSERT INTO notifications (user_id, notification_type, title, message, reference_id, reference_type, action_url)
+                    SELECT u.id, %s, %s, %s, %s, %s, %s
+                    FROM (SELECT DISTINCT user_id FROM notification_recipients) r
+                    JOIN users u ON u.id = r.user_id
+                    ORDER BY u.id
+                    RETURNING user_id
+                """, (
+                    notification_data['type'],
+                    notification_data['title'],
+                    notification_data['message'],
+                    notification_data.get('related_id'),
+                    notification_data.get('related_type'),
+                    notification_data.get('action_url')
+                ))
+                created = [row[0] for row in cur.fetchall()]
+
+                cur.execute("SELECT COUNT(DISTINCT user_id) FROM notification_recipients")
+                requested = cur.fetchone()[0]
+                conn.commit()
+
+            self.unread.adjust_many({user_id: 1 for user_id in created})
+            return {"created": len(created), "skipped": requested - len(created)}
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
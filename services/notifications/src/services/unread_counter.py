@@ -0,0 +1,178 @@
+"""
+Unread notification counters in Redis
+
+Badge polls read notifications:unread:{user_id} instead of running COUNT(*)
+over notifications. Writes apply deltas after their transaction commits, and
+only to counters that already exist, so a counter is always either absent
+(next read recounts from PostgreSQL) or seeded from a real count. Counters
+expire after unread_count_ttl, and reconcile() periodically recounts users
+read recently, which bounds any drift from races between a recount and a
+concurrent write.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from lm_common.redis_client import get_redis_client
+from lm_common.db_pool import get_connection
+from lm_common.logging import get_logger
+
+from ..config import settings
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "notifications:unread"
+ACTIVE_KEY = f"{KEY_PREFIX}:active"  # sorted set: user_id -> last read time
+
+# INCRBY only if the counter exists, never below zero
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+    return 0
+end
+return value
+"""
+
+
+def counter_key(user_id: int) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+class UnreadCounter:
+    """Per-user unread counts cached in Redis, recounted from PostgreSQL on miss"""
+
+    def __init__(self):
+        self.redis = get_redis_client()
+        self._adjust = self.redis.register_script(_ADJUST_SCRIPT)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _count(self, user_ids: List[int]) -> Dict[int, int]:
+        """Authoritative unread counts from PostgreSQL (partial index on unread rows)"""
+        conn = get_connection(settings.database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT user_id, COUNT(*) FROM notifications
+                    WHERE user_id = ANY(%s) AND is_read = false
+                    GROUP BY user_id
+                """, (user_ids,))
+                counts = dict(cur.fetchall())
+            return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+        finally:
+            conn.close()
+
+    def get(self, user_id: int) -> int:
+        """Unread count for a user (Redis, or a recount on miss)"""
+        try:
+            pipe = self.redis.pipeline()
+            pipe.get(counter_key(user_id))
+            pipe.zadd(ACTIVE_KEY, {str(user_id): time.time()})
+            cached, _ = pipe.execute()
+            if cached is not None:
+                return int(cached)
+        except redis.RedisError as e:
+            logger.warning(f"Unread counter unavailable: {e}")
+            return self._count([user_id])[user_id]
+
+        count = self._count([user_id])[user_id]
+        try:
+            # NX: a concurrent recount or reconcile may already have seeded it
+            self.redis.set(counter_key(user_id), count, ex=settings.unread_count_ttl, nx=True)
+        except redis.RedisError as e:
+            logger.warning(f"Unread counter not seeded: {e}")
+        return count
+
+    def adjust(self, user_id: int, delta: int):
+        """Apply a committed change to one user's counter"""
+        self.adjust_many({user_id: delta})
+
+    def adjust_many(self, deltas: Dict[int, int]):
+        """Apply committed changes to many counters in one pipeline"""
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id, delta in deltas.items():
+                self._adjust(keys=[counter_key(user_id)], args=[delta], client=pipe)
+            pipe.execute()
+        except redis.RedisError as e:
+            # Drop the counters so the next read recounts rather than serving stale values
+            logger.warning(f"Unread counter update failed for {len(deltas)} users: {e}")
+            try:
+                self.redis.delete(*[counter_key(user_id) for user_id in deltas])
+            except redis.RedisError:
+                pass
+
+    def reconcile(self, batch_size: int = 1000) -> int:
+        """
+        Recount every user whose badge was read within unread_count_ttl
+
+        Returns:
+            Number of counters corrected
+        """
+        cutoff = time.time() - settings.unread_count_ttl
+        self.redis.zremrangebyscore(ACTIVE_KEY, "-inf", cutoff)
+        user_ids = [int(member) for member in self.redis.zrange(ACTIVE_KEY, 0, -1)]
+
+        corrected = 0
+        for i in range(0, len(user_ids), batch_size):
+            chunk = user_ids[i:i + batch_size]
+            counts = self._count(chunk)
+            cached = self.redis.mget([counter_key(user_id) for user_id in chunk])
+
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id, value in zip(chunk, cached):
+                if value is None or int(value) != counts[user_id]:
+                    pipe.set(counter_key(user_id), counts[user_id], ex=settings.unread_count_ttl)
+                    corrected += value is not None
+            pipe.execute()
+
+        if corrected:
+            logger.info(f"Reconciled {corrected} of {len(user_ids)} unread counters")
+        return corrected
+
+    def run(self):
+        """Reconcile every unread_reconcile_interval seconds until stop()"""
+        while not self._stop.wait(settings.unread_reconcile_interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.error(f"Unread counter reconciliation failed: {e}")
+
+    def start(self):
+        """Run reconciliation in a daemon thread"""
+        self._thread = threading.Thread(target=self.run, name="unread-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Tracked user count for /health"""
+        try:
+            return {"active_users": self.redis.zcard(ACTIVE_KEY)}
+        except redis.RedisError as e:
+            return {"error": str(e)}
+
+
+_unread_counter: Optional[UnreadCounter] = None
+
+
+def get_unread_counter() -> UnreadCounter:
+    """Get the process-wide unread counter (singleton pattern)"""
+    global _unread_counter
+
+    if _unread_counter is None:
+        _unread_counter = UnreadCounter()
+
+    return _unread_counter
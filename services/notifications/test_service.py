@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Test Suite for Notifications Service
-Tests all 12 endpoints (7 notifications + 5 messages)
+Tests all 13 endpoints (8 notifications + 5 messages)
 """
 import requests
 import json
@@ -55,6 +55,41 @@ def test_get_unread_count():
         print_test("Get Unread Count", False, str(e))
         return False
 
+def _unread_count():
+    response = requests.get(f"{BASE_URL}/api/notifications/unread-count")
+    return response.json().get("unread_count", 0) if response.status_code == 200 else None
+
+def test_create_notifications_bulk():
+    """Test bulk fan-out: duplicates collapse, unknown users are skipped, unread counts move"""
+    try:
+        before = _unread_count()
+        data = {
+            "user_ids": [USER_ID, USER_ID, 2147483647],
+            "type": "study_group",
+            "title": "Study group meeting",
+            "message": "The group meets at 6pm"
+        }
+        response = requests.post(f"{BASE_URL}/api/notifications/bulk", json=data)
+        passed = response.status_code == 200
+        result = response.json() if passed else {}
+        after = _unread_count()
+        passed = (
+            passed
+            and result.get("created") == 1
+            and result.get("skipped") == 1
+            and before is not None and after == before + 1
+        )
+        
+        # A request with no recipients is rejected
+        empty = requests.post(f"{BASE_URL}/api/notifications/bulk", json={**data, "user_ids": []})
+        passed = passed and empty.status_code == 400
+        print_test("Create Notifications Bulk", passed,
+                   f"Created: {result.get('created')}, Skipped: {result.get('skipped')}, Unread: {before} -> {after}")
+        return passed
+    except Exception as e:
+        print_test("Create Notifications Bulk", False, str(e))
+        return False
+
 def test_get_preferences():
     """Test getting notification preferences"""
     try:
@@ -254,11 +289,12 @@ def main():
     results.append(test_health())
     print()
     
-    # Test 2-8: Notification workflow
+    # Test 2-9: Notification workflow
     print("Notification Tests:")
     print("-" * 40)
     results.append(test_list_notifications())
     results.append(test_get_unread_count())
+    results.append(test_create_notifications_bulk())
     results.append(test_get_preferences())
     results.append(test_update_preferences())
     results.append(test_mark_notifications_read())
@@ -266,7 +302,7 @@ def main():
     results.append(test_delete_notification())
     print()
     
-    # Test 9-13: Message workflow
+    # Test 10-14: Message workflow
     print("Message Tests:")
     print("-" * 40)
     passed, message_id = test_send_message()
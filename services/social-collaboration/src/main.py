@@ -4,6 +4,8 @@ FastAPI service for classmate connections, content sharing, and study groups
 """
 from fastapi import FastAPI
 
+from lm_common.db_pool import pool_stats
+
 from .config import settings
 from .routes import connections_router, sharing_router, groups_router
 
@@ -32,7 +34,8 @@ async def health_check():
     return {
         "status": "healthy",
         "service": settings.SERVICE_NAME,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "db_pools": pool_stats()
     }
 
 
@@ -0,0 +1,125 @@
+"""
+Speech-to-Text Service - Parallel Transcription Benchmark
+Compares one sequential faster-whisper pass against split-and-merge
+transcription across a process pool on a long recording
+
+Without --audio a synthetic lecture is generated: bursts of voiced,
+speech-like tones separated by short pauses, so the silence splitter has
+realistic cut points. Use a real lecture for accuracy comparisons.
+
+Usage:
+    python benchmark_parallel.py [--minutes 20] [--workers 4] [--audio lecture.mp3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.config import settings
+from src.services.parallel_transcriber import SAMPLE_RATE, ParallelTranscriber
+from src.services.whisper_service import WhisperService
+
+
+def make_lecture(path: str, minutes: float, seed: int = 42):
+    """Write a synthetic 16 kHz mono WAV of alternating 'speech' and pauses"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    pieces = []
+    length = 0
+
+    while length < total:
+        # 4-12 s of voiced sound: a wandering pitch with harmonics and a syllable envelope
+        seconds = rng.uniform(4, 12)
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        pitch = 120 + 30 * np.sin(2 * np.pi * rng.uniform(0.2, 0.6) * t)
+        phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+        voiced = sum(np.sin(h * phase) / h for h in range(1, 6))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 5) * t) ** 2
+        pieces.append((0.2 * voiced * envelope).astype(np.float32))
+
+        # 0.4-2 s pause with faint room noise
+        pause = int(rng.uniform(0.4, 2.0) * SAMPLE_RATE)
+        pieces.append((0.002 * rng.standard_normal(pause)).astype(np.float32))
+        length += len(pieces[-2]) + pause
+
+    audio = np.concatenate(pieces)[:total]
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def run_single(path: str, language: str):
+    """Baseline: one sequential pass with the shared model"""
+    service = WhisperService()
+    service.load_model()  # Exclude model load from the timing
+    start = time.perf_counter()
+    result = service.transcribe(path, language)
+    return time.perf_counter() - start, result
+
+
+def run_parallel(path: str, language: str, workers: int):
+    """Split at silence, transcribe windows in a process pool, stitch"""
+    transcriber = ParallelTranscriber(workers=workers)
+    # Warm the pool so model loading is excluded, as in the baseline
+    list(transcriber._get_pool().map(abs, range(workers)))
+
+    start = time.perf_counter()
+    details, segments = transcriber.stream(path, language)
+    texts = [segment['text'] for segment in segments if segment['text']]
+    elapsed = time.perf_counter() - start
+
+    transcriber.shutdown()
+    return elapsed, {'text': " ".join(texts), **details}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark split-and-merge transcription")
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // max(1, settings.WHISPER_CPU_THREADS)))
+    parser.add_argument("--audio", help="Real recording to use instead of the synthetic lecture")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    # Benchmark the split itself, not the minimum-length policy
+    settings.PARALLEL_MIN_DURATION = 0
+
+    print("=" * 70)
+    print("Speech-to-Text: Parallel Transcription Benchmark")
+    print("=" * 70)
+    print(f"Model: {settings.WHISPER_MODEL_SIZE} ({settings.WHISPER_COMPUTE_TYPE}), "
+          f"{settings.WHISPER_CPU_THREADS} threads per model, {os.cpu_count()} cores")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.audio
+        if not path:
+            path = os.path.join(tmp, "synthetic_lecture.wav")
+            print(f"Generating {args.minutes:.0f}-minute synthetic lecture...")
+            make_lecture(path, args.minutes)
+
+        print("\nSingle pass...")
+        single_time, single = run_single(path, args.language)
+        print(f"  {single_time:.1f}s for {single['duration']:.0f}s of audio "
+              f"({single['duration'] / single_time:.1f}x realtime)")
+
+        print(f"\nSplit-and-merge ({args.workers} workers)...")
+        parallel_time, parallel = run_parallel(path, args.language, args.workers)
+        print(f"  {parallel_time:.1f}s across {parallel['windows']} windows "
+              f"({parallel['duration'] / parallel_time:.1f}x realtime)")
+
+    print("\n" + "-" * 70)
+    print(f"Speedup: {single_time / parallel_time:.2f}x")
+    print(f"Transcript words: single={len(single['text'].split())}, "
+          f"parallel={len(parallel['text'].split())}")
+    print("-" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,30 @@ class Settings(BaseSettings):
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     WHISPER_MODEL_SIZE: str = os.getenv("WHISPER_MODEL_SIZE", "base")
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # "int8" or "float32"
+    WHISPER_CPU_THREADS: int = int(os.getenv("WHISPER_CPU_THREADS", "4"))  # threads per transcription
+    WHISPER_VAD_FILTER: bool = os.getenv("WHISPER_VAD_FILTER", "false").lower() == "true"  # skip silence by default
+    WHISPER_VAD_MIN_SILENCE_MS: int = int(os.getenv("WHISPER_VAD_MIN_SILENCE_MS", "500"))
+    WHISPER_CONCURRENCY: int = int(os.getenv("WHISPER_CONCURRENCY", "0"))  # parallel transcriptions (0 = per-process cores / threads)
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "1"))  # processes sharing the host's cores (async-jobs workers)
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./data/uploads")
+    TRANSCRIPTION_QUEUE: str = os.getenv("TRANSCRIPTION_QUEUE", "transcription_jobs")
+    
+    # Split-and-merge transcription of long recordings across a process pool
+    PARALLEL_TRANSCRIPTION: bool = os.getenv("PARALLEL_TRANSCRIPTION", "false").lower() == "true"
+    PARALLEL_WORKERS: int = int(os.getenv("PARALLEL_WORKERS", "0"))  # processes (0 = per-process cores / WHISPER_CPU_THREADS)
+    PARALLEL_MIN_DURATION: float = float(os.getenv("PARALLEL_MIN_DURATION", "600"))  # seconds; shorter files run single pass
+    PARALLEL_WINDOW_OVERLAP: float = float(os.getenv("PARALLEL_WINDOW_OVERLAP", "1.0"))  # seconds added on each side of a cut
+    PARALLEL_SPLIT_SEARCH: float = float(os.getenv("PARALLEL_SPLIT_SEARCH", "15.0"))  # seconds searched for silence around a cut
+    SEGMENT_FLUSH_SIZE: int = int(os.getenv("SEGMENT_FLUSH_SIZE", "10"))  # segments persisted per commit
+    
+    # Uploads are streamed to disk in fixed-size chunks, never held in memory
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes per read
+    MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", str(2 * 1024 * 1024 * 1024)))  # bytes per file or part
+    
+    # Multi-part uploads: how the worker waits for parts that are still arriving
+    UPLOAD_POLL_INTERVAL: float = float(os.getenv("UPLOAD_POLL_INTERVAL", "10.0"))  # seconds before a job waiting on parts is resumed
+    UPLOAD_STALL_TIMEOUT: float = float(os.getenv("UPLOAD_STALL_TIMEOUT", "3600"))  # seconds without a new part
     
     class Config:
         env_file = ".env"
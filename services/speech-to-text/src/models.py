@@ -4,7 +4,7 @@ SQLAlchemy ORM models for transcription jobs
 Extracted from POC 09 schema
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from lm_common.database import Base
 
@@ -24,13 +24,58 @@ class TranscriptionJob(Base):
     completed_at = Column(DateTime)
     error_message = Column(Text)
     
+    # Multi-part uploads ('uploading' until the client completes the upload)
+    upload_status = Column(String(20), default='complete', nullable=False)
+    language = Column(String(10))
+    vad_filter = Column(Boolean, default=False)  # Skip silence while transcribing
+    upload_parts = Column(Integer)  # Total parts, known once the upload is complete
+    queued_at = Column(DateTime)  # Set once, when the job is handed to the worker
+    
     # Relationship
     transcription = relationship("Transcription", back_populates="job", uselist=False)
+    parts = relationship("TranscriptionUploadPart", back_populates="job", cascade="all, delete-orphan")
+    segments = relationship("TranscriptionSegment", back_populates="job", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<TranscriptionJob(id={self.id}, status='{self.status}')>"
 
 
+class TranscriptionUploadPart(Base):
+    """Durable part of a multi-part audio upload"""
+    __tablename__ = 'transcription_upload_parts'
+    
+    job_id = Column(Integer, ForeignKey('transcription_jobs.id', ondelete='CASCADE'), primary_key=True)
+    part_number = Column(Integer, primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    job = relationship("TranscriptionJob", back_populates="parts")
+    
+    def __repr__(self):
+        return f"<TranscriptionUploadPart(job_id={self.job_id}, part_number={self.part_number})>"
+
+
+class TranscriptionSegment(Base):
+    """Timestamped transcript segment, stored as soon as it is decoded"""
+    __tablename__ = 'transcription_segments'
+    __table_args__ = (UniqueConstraint('job_id', 'segment_index', name='uq_transcription_segments_job_index'),)
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey('transcription_jobs.id', ondelete='CASCADE'), nullable=False)
+    segment_index = Column(Integer, nullable=False)
+    start_time = Column(Float, nullable=False)  # seconds from the start of the recording
+    end_time = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    job = relationship("TranscriptionJob", back_populates="segments")
+    
+    def __repr__(self):
+        return f"<TranscriptionSegment(job_id={self.job_id}, index={self.segment_index})>"
+
+
 class Transcription(Base):
     """Completed transcription model"""
     __tablename__ = 'transcriptions'
@@ -1,67 +1,369 @@
 """
 Speech-to-Text Service - Transcribe Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import AsyncIterator, Optional
+import asyncio
+import json
 import os
 
-from lm_common.database import get_db
+from lm_common.database import get_db, get_db_session
 from lm_common.redis_client import queue_push
 
-from ..models import TranscriptionJob, Transcription
-from ..schemas import TranscriptionJobResponse, TranscriptionResponse
+from ..models import TranscriptionJob, TranscriptionSegment, TranscriptionUploadPart, Transcription
+from ..schemas import (
+    TranscriptionJobResponse,
+    TranscriptionResponse,
+    TranscriptSegmentResponse,
+    TranscriptSegmentsResponse,
+    UploadCreateRequest,
+    UploadCompleteRequest,
+    UploadStatusResponse
+)
+from ..services.progress_service import (
+    TERMINAL_STATUSES,
+    get_progress,
+    publish_progress,
+    subscribe_progress
+)
+from ..services.upload_service import (
+    UploadTooLargeError,
+    part_path,
+    save_upload,
+    upload_dir
+)
 from ..config import settings
 
 router = APIRouter(prefix="/transcribe", tags=["transcription"])
 
 
+ALLOWED_TYPES = ['audio/mpeg', 'audio/wav', 'audio/mp3', 'audio/m4a', 'audio/flac']
+ALLOWED_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg')
+
+
+def _validate_audio(filename: str, content_type: Optional[str] = None):
+    if content_type not in ALLOWED_TYPES and not filename.endswith(ALLOWED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Invalid audio file type")
+
+
+async def _save_or_reject(file: UploadFile, dest_path: str) -> int:
+    try:
+        return await save_upload(file, dest_path)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+def _upload_status(job: TranscriptionJob, db: Session) -> UploadStatusResponse:
+    received = [
+        part_number for (part_number,) in db.query(TranscriptionUploadPart.part_number).filter(
+            TranscriptionUploadPart.job_id == job.id
+        ).order_by(TranscriptionUploadPart.part_number)
+    ]
+    return UploadStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        upload_status=job.upload_status,
+        received_parts=received,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        created_at=job.created_at
+    )
+
+
+def _publish_created(job: TranscriptionJob):
+    """Seed the progress snapshot so status reads never need the database"""
+    try:
+        publish_progress(job.id, job.status, percent=0, created_at=job.created_at.isoformat())
+    except Exception as e:
+        print(f"Progress publish failed for job {job.id}: {e}")
+
+
+def _get_upload_job(job_id: int, db: Session) -> TranscriptionJob:
+    job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @router.post("/", response_model=TranscriptionJobResponse)
 async def create_transcription_job(
     file: UploadFile = File(...),
     language: str = "en",
+    vad_filter: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Upload audio file and create transcription job"""
-    # Validate file type
-    allowed_types = ['audio/mpeg', 'audio/wav', 'audio/mp3', 'audio/m4a', 'audio/flac']
-    if file.content_type not in allowed_types and not file.filename.endswith(('.mp3', '.wav', '.m4a', '.flac', '.ogg')):
-        raise HTTPException(status_code=400, detail="Invalid audio file type")
+    """
+    Upload audio file and create transcription job
     
-    # Save file
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(settings.UPLOAD_DIR, f"audio_{datetime.utcnow().timestamp()}_{file.filename}")
+    - **vad_filter**: Skip silent stretches (faster on lectures with long pauses)
+    """
+    # Validate file type
+    _validate_audio(file.filename, file.content_type)
     
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Save file (streamed to disk in UPLOAD_CHUNK_SIZE pieces)
+    file_path = os.path.join(settings.UPLOAD_DIR, f"audio_{datetime.utcnow().timestamp()}_{os.path.basename(file.filename)}")
+    size = await _save_or_reject(file, file_path)
     
     # Create job
     job = TranscriptionJob(
         user_id=1,  # TODO: Get from JWT
         audio_file_path=file_path,
-        audio_file_size=len(content),
-        status='pending'
+        audio_file_size=size,
+        language=language,
+        vad_filter=vad_filter,
+        status='pending',
+        queued_at=datetime.utcnow()
     )
     db.add(job)
     db.commit()
     db.refresh(job)
     
     # Queue for processing
-    queue_push("transcription_jobs", {"job_id": job.id, "file_path": file_path, "language": language})
+    _publish_created(job)
+    queue_push(settings.TRANSCRIPTION_QUEUE, {
+        "job_id": job.id,
+        "file_path": file_path,
+        "language": language,
+        "vad_filter": vad_filter
+    })
     
     return TranscriptionJobResponse(job_id=job.id, status=job.status, created_at=job.created_at)
 
 
+@router.post("/uploads", response_model=UploadStatusResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(request: UploadCreateRequest, db: Session = Depends(get_db)):
+    """
+    Start a resumable multi-part upload
+    
+    Parts are self-contained audio segments sent with
+    `PUT /transcribe/uploads/{job_id}/parts/{part_number}`, numbered from 0.
+    """
+    _validate_audio(request.filename)
+    
+    job = TranscriptionJob(
+        user_id=1,  # TODO: Get from JWT
+        audio_file_path="",
+        audio_file_size=0,
+        language=request.language,
+        vad_filter=request.vad_filter,
+        status='pending',
+        upload_status='uploading'
+    )
+    db.add(job)
+    db.flush()
+    job.audio_file_path = upload_dir(job.id)
+    db.commit()
+    db.refresh(job)
+    _publish_created(job)
+    
+    return _upload_status(job, db)
+
+
+@router.get("/uploads/{job_id}", response_model=UploadStatusResponse)
+async def get_upload(job_id: int, db: Session = Depends(get_db)):
+    """Get received parts so an interrupted client can resume"""
+    return _upload_status(_get_upload_job(job_id, db), db)
+
+
+@router.put("/uploads/{job_id}/parts/{part_number}", response_model=UploadStatusResponse)
+async def upload_part(
+    job_id: int,
+    part_number: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload one part (idempotent: re-sending a part replaces it)
+    
+    The transcription job is queued as soon as the first part is durable.
+    """
+    if part_number < 0:
+        raise HTTPException(status_code=400, detail="part_number must be >= 0")
+    
+    job = _get_upload_job(job_id, db)
+    if job.upload_status != 'uploading':
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    
+    _validate_audio(file.filename, file.content_type)
+    extension = os.path.splitext(file.filename)[1].lower()
+    size = await _save_or_reject(file, part_path(job_id, part_number, extension))
+    
+    part = db.query(TranscriptionUploadPart).filter(
+        TranscriptionUploadPart.job_id == job_id,
+        TranscriptionUploadPart.part_number == part_number
+    ).first()
+    if part:
+        part.size_bytes = size
+    else:
+        db.add(TranscriptionUploadPart(job_id=job_id, part_number=part_number, size_bytes=size))
+    
+    # Claim the job for queueing exactly once, even with parts arriving concurrently
+    claimed = db.query(TranscriptionJob).filter(
+        TranscriptionJob.id == job_id,
+        TranscriptionJob.queued_at.is_(None)
+    ).update({TranscriptionJob.queued_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    
+    if claimed:
+        queue_push(settings.TRANSCRIPTION_QUEUE, {
+            "job_id": job_id,
+            "file_path": upload_dir(job_id),
+            "language": job.language,
+            "vad_filter": bool(job.vad_filter),
+            "chunked": True
+        })
+    
+    db.refresh(job)
+    return _upload_status(job, db)
+
+
+@router.post("/uploads/{job_id}/complete", response_model=UploadStatusResponse)
+async def complete_upload(
+    job_id: int,
+    request: UploadCompleteRequest,
+    db: Session = Depends(get_db)
+):
+    """Mark the upload complete once parts 0..total_parts-1 are all stored"""
+    job = _get_upload_job(job_id, db)
+    
+    parts = db.query(TranscriptionUploadPart).filter(
+        TranscriptionUploadPart.job_id == job_id
+    ).all()
+    received = {part.part_number for part in parts}
+    missing = [n for n in range(request.total_parts) if n not in received]
+    extra = sorted(n for n in received if n >= request.total_parts)
+    if missing or extra:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload parts do not match total_parts", "missing_parts": missing, "extra_parts": extra}
+        )
+    
+    job.upload_status = 'complete'
+    job.upload_parts = request.total_parts
+    job.audio_file_size = sum(part.size_bytes for part in parts)
+    db.commit()
+    db.refresh(job)
+    
+    return _upload_status(job, db)
+
+
 @router.get("/jobs/{job_id}", response_model=TranscriptionJobResponse)
 async def get_job_status(job_id: int, db: Session = Depends(get_db)):
-    """Get transcription job status"""
+    """Get transcription job status (served from the progress snapshot when available)"""
+    try:
+        progress = await asyncio.to_thread(get_progress, job_id)
+    except Exception as e:
+        print(f"Progress lookup failed for job {job_id}: {e}")
+        progress = None
+    
+    if progress and progress.get("created_at"):
+        return TranscriptionJobResponse(
+            job_id=job_id,
+            status=progress["status"],
+            percent=progress.get("percent"),
+            created_at=progress["created_at"]
+        )
+    
     job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return TranscriptionJobResponse(job_id=job.id, status=job.status, created_at=job.created_at)
 
 
+def _job_snapshot(job_id: int) -> Optional[dict]:
+    """Current job state from the database, for jobs with no published progress"""
+    with get_db_session() as db:
+        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+        if not job:
+            return None
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "percent": 100 if job.status == 'completed' else None,
+            "created_at": job.created_at.isoformat() if job.created_at else None
+        }
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: int):
+    """
+    Stream job progress as server-sent events until the job completes or fails
+    
+    Each `data:` line is a JSON object with `status`, `percent` and, for newly
+    decoded segments, the partial transcript `text` with `start`/`end` seconds.
+    """
+    progress = await asyncio.to_thread(get_progress, job_id)
+    if progress is None:
+        # Nothing published yet (or expired): fall back to the database once
+        progress = await asyncio.to_thread(_job_snapshot, job_id)
+        if progress is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        if progress["status"] in TERMINAL_STATUSES:
+            yield f"data: {json.dumps(progress)}\n\n"
+            return
+        
+        async for event in subscribe_progress(job_id):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx buffering so events flush immediately
+        }
+    )
+
+
+@router.get("/jobs/{job_id}/segments", response_model=TranscriptSegmentsResponse)
+async def get_segments(
+    job_id: int,
+    after: int = Query(-1, description="Return segments with index greater than this"),
+    limit: int = Query(200, ge=1, le=1000),
+    q: Optional[str] = Query(None, description="Only segments containing this text"),
+    db: Session = Depends(get_db)
+):
+    """
+    Timestamped transcript segments, available while transcription is running
+    
+    Page forward by passing the returned `next_after` as `after`.
+    """
+    job = db.query(TranscriptionJob.status).filter(TranscriptionJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    query = db.query(TranscriptionSegment).filter(
+        TranscriptionSegment.job_id == job_id,
+        TranscriptionSegment.segment_index > after
+    )
+    if q:
+        query = query.filter(TranscriptionSegment.text.ilike(f"%{q}%"))
+    
+    segments = query.order_by(TranscriptionSegment.segment_index).limit(limit).all()
+    
+    return TranscriptSegmentsResponse(
+        job_id=job_id,
+        status=job.status,
+        segments=[
+            TranscriptSegmentResponse(
+                index=segment.segment_index,
+                start=segment.start_time,
+                end=segment.end_time,
+                text=segment.text
+            )
+            for segment in segments
+        ],
+        next_after=segments[-1].segment_index if len(segments) == limit else None
+    )
+
+
 @router.get("/results/{job_id}", response_model=TranscriptionResponse)
 async def get_transcription(job_id: int, db: Session = Depends(get_db)):
     """Get completed transcription"""
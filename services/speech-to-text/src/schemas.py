@@ -1,8 +1,8 @@
 """
 Speech-to-Text Service - Schemas
 """
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -10,6 +10,7 @@ class TranscriptionJobResponse(BaseModel):
     """Transcription job response"""
     job_id: int
     status: str
+    percent: Optional[float] = None
     created_at: datetime
     
     class Config:
@@ -27,3 +28,41 @@ class TranscriptionResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class UploadCreateRequest(BaseModel):
+    """Start a multi-part audio upload"""
+    filename: str = Field(min_length=1, max_length=255)
+    language: str = "en"
+    vad_filter: bool = False
+
+
+class UploadCompleteRequest(BaseModel):
+    """Finish a multi-part audio upload"""
+    total_parts: int = Field(gt=0)
+
+
+class UploadStatusResponse(BaseModel):
+    """Multi-part upload state, used by clients to resume"""
+    job_id: int
+    status: str
+    upload_status: str
+    received_parts: List[int]
+    chunk_size: int
+    created_at: datetime
+
+
+class TranscriptSegmentResponse(BaseModel):
+    """Timestamped transcript segment"""
+    index: int
+    start: float
+    end: float
+    text: str
+
+
+class TranscriptSegmentsResponse(BaseModel):
+    """Page of transcript segments (available while transcription runs)"""
+    job_id: int
+    status: str
+    segments: List[TranscriptSegmentResponse]
+    next_after: Optional[int] = None
@@ -0,0 +1,204 @@
+"""
+Speech-to-Text Service - Parallel Transcriber
+Split-and-merge transcription for long recordings
+
+One faster-whisper pass only scales to the cores a single model instance
+uses. Here the audio is cut at the quietest point near each of N evenly spaced
+boundaries, the windows (padded with a little overlap so no word is cut) are
+transcribed in parallel in a process pool, and the results are stitched back
+together: each segment belongs to the window its midpoint falls in, which
+drops the duplicates decoded in the overlaps.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03  # energy frame for silence detection
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+
+
+def _init_worker(model_size: str, compute_type: str, cpu_threads: int):
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_window(
+    audio: np.ndarray,
+    offset: float,
+    language: Optional[str],
+    vad_filter: bool
+) -> Tuple[List[Dict], str, float]:
+    """Transcribe one window in a pool process; timestamps are shifted by offset"""
+    segments, info = _worker_model.transcribe(
+        audio,
+        language=language,
+        beam_size=5,
+        vad_filter=vad_filter,
+        vad_parameters={"min_silence_duration_ms": settings.WHISPER_VAD_MIN_SILENCE_MS} if vad_filter else None
+    )
+    return (
+        [
+            {'start': offset + segment.start, 'end': offset + segment.end, 'text': segment.text.strip()}
+            for segment in segments
+        ],
+        info.language,
+        info.language_probability
+    )
+
+
+def find_split_points(audio: np.ndarray, windows: int, search_seconds: float) -> List[int]:
+    """
+    Sample offsets that cut the audio into `windows` parts at silence
+
+    Each cut is moved from its evenly spaced position to the lowest-energy
+    frame within +/- search_seconds.
+    """
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    frame_count = len(audio) // frame
+    if windows <= 1 or frame_count < windows:
+        return []
+
+    energy = np.sqrt(np.mean(audio[:frame_count * frame].reshape(frame_count, frame) ** 2, axis=1))
+    search = max(1, int(search_seconds / FRAME_SECONDS))
+
+    cuts = []
+    for k in range(1, windows):
+        target = frame_count * k // windows
+        lo, hi = max(0, target - search), min(frame_count, target + search + 1)
+        cuts.append((lo + int(np.argmin(energy[lo:hi]))) * frame)
+
+    return sorted(set(cuts))
+
+
+class ParallelTranscriber:
+    """Transcribes long recordings across a persistent process pool"""
+
+    def __init__(self, workers: Optional[int] = None):
+        cpu_threads = max(1, settings.WHISPER_CPU_THREADS)
+        # Cores are split across the WORKER_PROCESSES processes that each own a pool
+        cores = max(1, (os.cpu_count() or 1) // max(1, settings.WORKER_PROCESSES))
+        self.workers = workers or settings.PARALLEL_WORKERS or max(1, cores // cpu_threads)
+        self.cpu_threads = cpu_threads
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.WHISPER_MODEL_SIZE, settings.WHISPER_COMPUTE_TYPE, self.cpu_threads)
+            )
+        return self._pool
+
+    def should_split(self, duration: float) -> bool:
+        """Only long recordings are worth the decode and pool overhead"""
+        return self.workers > 1 and duration >= settings.PARALLEL_MIN_DURATION
+
+    def stream(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        vad_filter: Optional[bool] = None
+    ) -> Tuple[Dict, Iterator[Dict]]:
+        """
+        Split-and-merge counterpart of WhisperService.stream
+
+        All windows are submitted at once; segments are yielded in order as
+        each window finishes.
+
+        Returns:
+            Tuple of (info dict, iterator of segment dicts with index, start, end, text)
+        """
+        from faster_whisper import decode_audio
+
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+        vad_filter = settings.WHISPER_VAD_FILTER if vad_filter is None else vad_filter
+        audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+        duration = len(audio) / SAMPLE_RATE
+
+        windows = self.workers if self.should_split(duration) else 1
+        cuts = find_split_points(audio, windows, settings.PARALLEL_SPLIT_SEARCH)
+        bounds = [0] + cuts + [len(audio)]
+        overlap = int(settings.PARALLEL_WINDOW_OVERLAP * SAMPLE_RATE)
+
+        pool = self._get_pool()
+        futures = []
+        for start, end in zip(bounds, bounds[1:]):
+            window_start = max(0, start - overlap)
+            window_end = min(len(audio), end + overlap)
+            futures.append((
+                start / SAMPLE_RATE,
+                end / SAMPLE_RATE,
+                pool.submit(
+                    _transcribe_window,
+                    audio[window_start:window_end],
+                    window_start / SAMPLE_RATE,
+                    language,
+                    vad_filter
+                )
+            ))
+        del audio
+
+        # Language is detected on the first window (when not given)
+        first_segments, detected_language, probability = futures[0][2].result()
+        details = {
+            'language': language or detected_language,
+            'confidence': round(probability, 2),
+            'duration': round(duration, 2),
+            'windows': len(futures)
+        }
+
+        def iterate() -> Iterator[Dict]:
+            index = 0
+            previous_text = None
+            for i, (owned_start, owned_end, future) in enumerate(futures):
+                segments = first_segments if i == 0 else future.result()[0]
+                for segment in segments:
+                    # Keep only segments centred in this window's own span
+                    midpoint = (segment['start'] + segment['end']) / 2
+                    last_window = i == len(futures) - 1
+                    if midpoint < owned_start or (midpoint >= owned_end and not last_window):
+                        continue
+                    # A phrase straddling the cut can still be decoded by both windows
+                    if segment['text'] and segment['text'] == previous_text:
+                        continue
+                    previous_text = segment['text']
+                    yield {
+                        'index': index,
+                        'start': round(segment['start'], 2),
+                        'end': round(segment['end'], 2),
+                        'text': segment['text']
+                    }
+                    index += 1
+
+        return details, iterate()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+_parallel_transcriber: Optional[ParallelTranscriber] = None
+
+
+def get_parallel_transcriber() -> ParallelTranscriber:
+    """Get the process-wide parallel transcriber (singleton pattern)"""
+    global _parallel_transcriber
+
+    if _parallel_transcriber is None:
+        _parallel_transcriber = ParallelTranscriber()
+
+    return _parallel_transcriber
@@ -0,0 +1,113 @@
+"""
+Speech-to-Text Service - Progress Service
+Transcription progress pushed over Redis pub/sub instead of polled from the DB
+
+The worker publishes every status change and decoded segment to
+transcription:progress:{job_id}, and keeps the latest event in
+transcription:status:{job_id} so late subscribers and status reads get the
+current state without touching PostgreSQL.
+"""
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from lm_common.redis_client import get_redis_client
+
+from ..config import settings
+
+TERMINAL_STATUSES = ("completed", "failed")
+STATUS_TTL = 86400  # seconds the latest event is kept after the last update
+
+_async_client: Optional[aioredis.Redis] = None
+
+
+def progress_channel(job_id: int) -> str:
+    return f"transcription:progress:{job_id}"
+
+
+def status_key(job_id: int) -> str:
+    return f"transcription:status:{job_id}"
+
+
+def publish_progress(
+    job_id: int,
+    status: str,
+    percent: Optional[float] = None,
+    text: Optional[str] = None,
+    **extra: Any
+) -> None:
+    """
+    Publish a progress event (blocking; called from the worker)
+
+    Args:
+        job_id: Transcription job ID
+        status: pending, processing, retrying, completed or failed
+        percent: Completion percentage, if known
+        text: Newly decoded segment text (partial transcript)
+        **extra: Additional event fields (e.g. segment timestamps, error)
+    """
+    event = {"job_id": job_id, "status": status, "percent": percent, "updated_at": time.time(), **extra}
+
+    # The snapshot carries state only; segment text is delivered live
+    snapshot = json.dumps(event)
+    if text is not None:
+        event["text"] = text
+
+    client = get_redis_client()
+    pipe = client.pipeline()
+    pipe.set(status_key(job_id), snapshot, ex=STATUS_TTL)
+    pipe.publish(progress_channel(job_id), json.dumps(event))
+    pipe.execute()
+
+
+def get_progress(job_id: int) -> Optional[Dict[str, Any]]:
+    """Latest published event for a job, or None if nothing was published"""
+    raw = get_redis_client().get(status_key(job_id))
+    return json.loads(raw) if raw else None
+
+
+def get_async_client() -> aioredis.Redis:
+    """Async Redis client for long-lived subscriptions (singleton pattern)"""
+    global _async_client
+
+    if _async_client is None:
+        _async_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+
+    return _async_client
+
+
+async def subscribe_progress(job_id: int, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Yield the current state, then live events until the job finishes
+
+    Yields None after `keepalive` seconds without events so callers can keep
+    idle connections open.
+    """
+    client = get_async_client()
+    pubsub = client.pubsub()
+
+    # Subscribe before reading the snapshot so no event falls in between
+    await pubsub.subscribe(progress_channel(job_id))
+    try:
+        snapshot = await client.get(status_key(job_id))
+        if snapshot:
+            event = json.loads(snapshot)
+            yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive)
+            if message is None:
+                yield None
+                continue
+
+            event = json.loads(message["data"])
+            yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe(progress_channel(job_id))
+        await pubsub.reset()
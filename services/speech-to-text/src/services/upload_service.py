@@ -0,0 +1,141 @@
+"""
+Speech-to-Text Service - Upload Service
+Streams audio uploads to disk in fixed-size chunks and tracks multi-part uploads
+
+Multi-part protocol (resumable, for flaky mobile connections):
+    POST /transcribe/uploads                          -> job_id
+    PUT  /transcribe/uploads/{job_id}/parts/{n}       (repeatable, any order)
+    GET  /transcribe/uploads/{job_id}                 -> received parts, to resume
+    POST /transcribe/uploads/{job_id}/complete        {"total_parts": N}
+
+Each part is a self-contained audio segment (e.g. one recorder chunk). The job
+is queued as soon as the first part is durable. The worker transcribes the
+parts that are ready, in order, then re-queues the job with a delay
+(UPLOAD_POLL_INTERVAL) to pick up later ones, so it never holds a worker slot
+while waiting on the client.
+"""
+import os
+from datetime import datetime
+from typing import List, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import func
+
+from lm_common.database import get_db_session
+
+from ..config import settings
+from ..models import TranscriptionJob, TranscriptionUploadPart
+
+
+class UploadTooLargeError(ValueError):
+    """Upload exceeded MAX_UPLOAD_SIZE"""
+
+
+def upload_dir(job_id: int) -> str:
+    """Directory holding the parts of a multi-part upload"""
+    return os.path.join(settings.UPLOAD_DIR, f"job_{job_id}")
+
+
+def part_path(job_id: int, part_number: int, extension: str = "") -> str:
+    """Path of one uploaded part"""
+    return os.path.join(upload_dir(job_id), f"part_{part_number:05d}{extension}")
+
+
+def find_part(job_id: int, part_number: int) -> str:
+    """Locate a stored part regardless of its audio extension"""
+    prefix = os.path.basename(part_path(job_id, part_number))
+    for name in os.listdir(upload_dir(job_id)):
+        if name.startswith(prefix) and not name.endswith(".tmp"):
+            return os.path.join(upload_dir(job_id), name)
+    raise FileNotFoundError(f"Part {part_number} of job {job_id} not found")
+
+
+async def save_upload(file: UploadFile, dest_path: str) -> int:
+    """
+    Stream an upload to disk chunk by chunk, then make it durable
+
+    The data is written to a temporary file, fsynced and atomically renamed,
+    so a part that is visible on disk is always complete. Re-sending a part
+    simply replaces it.
+
+    Args:
+        file: Incoming upload
+        dest_path: Final file path
+
+    Returns:
+        Number of bytes written
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.tmp"
+    size = 0
+
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise UploadTooLargeError(f"Upload exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return size
+
+
+def ready_parts(job_id: int, next_part: int) -> Tuple[List[str], bool]:
+    """
+    Parts of a multi-part upload that can be transcribed now (non-blocking;
+    used by the transcription worker, which re-queues itself to wait for more)
+
+    Args:
+        job_id: Transcription job
+        next_part: First part not yet transcribed
+
+    Returns:
+        Tuple of (consecutive durable parts from next_part, in order; whether
+        the upload is complete and no parts remain after them)
+
+    Raises:
+        TimeoutError: No part arrived within UPLOAD_STALL_TIMEOUT of the
+            previous one (or of job creation, before the first)
+    """
+    with get_db_session() as db:
+        job = db.query(
+            TranscriptionJob.upload_status, TranscriptionJob.upload_parts, TranscriptionJob.created_at
+        ).filter(TranscriptionJob.id == job_id).first()
+        if job is None:
+            raise ValueError(f"Transcription job {job_id} not found")
+
+        ready = {
+            part_number for (part_number,) in db.query(TranscriptionUploadPart.part_number).filter(
+                TranscriptionUploadPart.job_id == job_id,
+                TranscriptionUploadPart.part_number >= next_part
+            )
+        }
+        # Newest arrival across all parts, including ones already transcribed
+        last_part_at = db.query(func.max(TranscriptionUploadPart.created_at)).filter(
+            TranscriptionUploadPart.job_id == job_id
+        ).scalar()
+
+    paths = []
+    while next_part + len(paths) in ready:
+        paths.append(find_part(job_id, next_part + len(paths)))
+
+    upload_status, upload_parts, job_created_at = job
+    if upload_status == 'complete' and next_part + len(paths) >= (upload_parts or 0):
+        return paths, True
+
+    if not paths:
+        last_activity = last_part_at or job_created_at
+        if last_activity and (datetime.utcnow() - last_activity).total_seconds() > settings.UPLOAD_STALL_TIMEOUT:
+            raise TimeoutError(f"Upload for job {job_id} stalled waiting for part {next_part}")
+
+    return paths, False
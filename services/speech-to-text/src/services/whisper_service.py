@@ -1,56 +1,137 @@
 """
 Speech-to-Text Service - Whisper Service
 Extracted from POC 09 transcription_engine.py - Validated
+Models are loaded once per process and shared: faster-whisper's num_workers
+lets several threads transcribe concurrently against one model instance
 """
 import os
+import threading
 from faster_whisper import WhisperModel
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional, Tuple
 from ..config import settings
 
+_models: Dict[Tuple[str, str], WhisperModel] = {}
+_models_lock = threading.Lock()
+
+
+def cpu_budget() -> int:
+    """Cores available to this process when WORKER_PROCESSES processes share the host"""
+    return max(1, (os.cpu_count() or 1) // max(1, settings.WORKER_PROCESSES))
+
+
+def get_concurrency() -> int:
+    """Number of transcriptions that can run at once in this process"""
+    if settings.WHISPER_CONCURRENCY > 0:
+        return settings.WHISPER_CONCURRENCY
+    return max(1, cpu_budget() // max(1, settings.WHISPER_CPU_THREADS))
+
+
+def get_model(model_size: Optional[str] = None, compute_type: Optional[str] = None) -> WhisperModel:
+    """
+    Get the shared Whisper model for a size and compute type (pool pattern)
+    
+    Loaded from disk on first use only; later calls return the same instance.
+    """
+    key = (model_size or settings.WHISPER_MODEL_SIZE, compute_type or settings.WHISPER_COMPUTE_TYPE)
+    
+    if key not in _models:
+        with _models_lock:
+            if key not in _models:
+                _models[key] = WhisperModel(
+                    key[0],
+                    device="cpu",
+                    compute_type=key[1],
+                    cpu_threads=settings.WHISPER_CPU_THREADS,
+                    num_workers=get_concurrency()
+                )
+    
+    return _models[key]
+
 
 class WhisperService:
     """Whisper transcription service using faster-whisper"""
     
-    def __init__(self):
-        """Initialize Whisper model"""
-        self.model_size = settings.WHISPER_MODEL_SIZE
+    def __init__(self, model_size: Optional[str] = None, compute_type: Optional[str] = None):
+        """Initialize Whisper service (the model itself comes from the shared pool)"""
+        self.model_size = model_size or settings.WHISPER_MODEL_SIZE
+        self.compute_type = compute_type or settings.WHISPER_COMPUTE_TYPE
         self.model = None
     
     def load_model(self):
-        """Load Whisper model (lazy loading)"""
+        """Load Whisper model (lazy loading, shared across instances)"""
         if self.model is None:
-            self.model = WhisperModel(self.model_size, device="cpu")
+            self.model = get_model(self.model_size, self.compute_type)
     
-    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict:
+    def stream(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        vad_filter: Optional[bool] = None
+    ) -> Tuple[Dict, Iterator[Dict]]:
         """
-        Transcribe audio file
+        Transcribe audio file lazily, segment by segment
+        
+        Decoding happens as the returned iterator is consumed, so callers can
+        persist or publish each segment without waiting for the whole file.
         
         Args:
             audio_path: Path to audio file
             language: Language code or None for auto-detect
+            vad_filter: Skip silence with Silero VAD (default: WHISPER_VAD_FILTER)
             
         Returns:
-            Dict with text, language, duration, confidence
+            Tuple of (info dict with language, confidence, duration;
+            iterator of segment dicts with index, start, end, text)
         """
         self.load_model()
         
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
+        vad_filter = settings.WHISPER_VAD_FILTER if vad_filter is None else vad_filter
         segments, info = self.model.transcribe(
             audio_path,
             language=language,
-            beam_size=5
+            beam_size=5,
+            vad_filter=vad_filter,
+            vad_parameters={"min_silence_duration_ms": settings.WHISPER_VAD_MIN_SILENCE_MS} if vad_filter else None
         )
         
-        # Collect segments
-        transcript_text = ""
-        for segment in segments:
-            transcript_text += segment.text + " "
-        
-        return {
-            'text': transcript_text.strip(),
+        details = {
             'language': info.language,
             'confidence': round(info.language_probability, 2),
             'duration': round(info.duration, 2)
         }
+        
+        def iterate() -> Iterator[Dict]:
+            for index, segment in enumerate(segments):
+                yield {
+                    'index': index,
+                    'start': round(segment.start, 2),
+                    'end': round(segment.end, 2),
+                    'text': segment.text.strip()
+                }
+        
+        return details, iterate()
+    
+    def transcribe(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        vad_filter: Optional[bool] = None
+    ) -> Dict:
+        """
+        Transcribe audio file
+        
+        Args:
+            audio_path: Path to audio file
+            language: Language code or None for auto-detect
+            vad_filter: Skip silence with Silero VAD (default: WHISPER_VAD_FILTER)
+            
+        Returns:
+            Dict with text, language, duration, confidence
+        """
+        details, segments = self.stream(audio_path, language, vad_filter)
+        texts = [segment['text'] for segment in segments if segment['text']]
+        
+        return {'text': " ".join(texts), **details}
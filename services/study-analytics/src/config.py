@@ -24,6 +24,7 @@ class Settings(BaseSettings):
     
     # External Services
     gamification_service_url: str = "http://localhost:8011"
+    point_events_stream: str = "gamification:point_events"  # Redis stream read by gamification (REDIS_URL via lm_common)
     
     @property
     def cors_origins_list(self) -> List[str]:
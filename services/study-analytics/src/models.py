@@ -33,6 +33,15 @@ class ActivityLog(BaseModel):
     duration_minutes: Optional[int] = None
     metadata: Optional[Dict[str, Any]] = None
 
+class BatchActivity(ActivityLog):
+    """One activity in a batch upload"""
+    client_activity_id: Optional[str] = Field(None, max_length=64)  # makes re-uploads idempotent
+    occurred_at: Optional[datetime] = None  # when the activity finished (offline clients); defaults to now
+
+class ActivityBatch(BaseModel):
+    """Request model for logging many activities in one call"""
+    activities: List[BatchActivity] = Field(..., min_length=1, max_length=1000)
+
 class StudySession(BaseModel):
     """Response model for a study session"""
     id: int
@@ -223,6 +232,29 @@ class SessionsListResponse(BaseModel):
     total_minutes: int
     avg_duration: Optional[int]
 
+class StudyStatsResponse(BaseModel):
+    """Response model for study stats (served from rollups)"""
+    totals: Dict[str, Any]
+    summary: Dict[str, Any]
+    daily_breakdown: List[Dict[str, Any]]
+
+class ActivityBatchResult(BaseModel):
+    """Outcome of one item in a batch upload"""
+    index: int
+    status: str  # created, duplicate or rejected
+    activity_id: Optional[int] = None
+    accuracy_percentage: Optional[float] = None
+    points_earned: Optional[int] = None
+    error: Optional[str] = None
+
+class ActivityBatchResponse(BaseModel):
+    """Response model for a batch upload"""
+    session_id: int
+    created: int
+    duplicates: int
+    rejected: int
+    results: List[ActivityBatchResult]
+
 class GoalsListResponse(BaseModel):
     """Response model for goals list"""
     goals: List[StudyGoal]
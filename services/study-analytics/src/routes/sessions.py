@@ -7,10 +7,11 @@ from datetime import date
 import psycopg2
 from ..config import settings
 from ..models import (
-    SessionStart, SessionEnd, ActivityLog,
-    SessionsListResponse, MessageResponse
+    SessionStart, SessionEnd, ActivityLog, ActivityBatch, ActivityBatchResponse,
+    SessionsListResponse, StudyStatsResponse, MessageResponse
 )
 from ..services.session_service import SessionService
+from ..services.rollup_service import RollupService
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
@@ -92,6 +93,25 @@ async def log_activity(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/{session_id}/activities/batch", response_model=ActivityBatchResponse)
+async def log_activities(
+    session_id: int,
+    batch: ActivityBatch,
+    current_user: dict = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    """Log many activities within a session in one call (e.g. an offline day's upload)"""
+    try:
+        service = SessionService(conn)
+        result = service.log_activities(
+            session_id=session_id,
+            user_id=current_user["user_id"],
+            activities=[activity.model_dump() for activity in batch.activities]
+        )
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("", response_model=SessionsListResponse)
 async def list_sessions(
     class_id: Optional[int] = Query(None),
@@ -114,3 +134,20 @@ async def list_sessions(
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/stats", response_model=StudyStatsResponse)
+async def get_stats(
+    class_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    """Get user's all-time totals and per-day study stats (read from rollups)"""
+    try:
+        rollups = RollupService(conn)
+        result = rollups.daily(current_user["user_id"], class_id, start_date, end_date)
+        result["totals"] = rollups.totals(current_user["user_id"], class_id)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,226 @@
+"""
+Study analytics rollups
+
+Per-user, per-class, per-day aggregates (study_rollups_daily) and all-time
+totals (study_rollups_total) are bumped in the same transaction that ends a
+session or logs an activity, so stats reads touch a handful of rollup rows
+instead of a user's whole session history. rebuild() recomputes them from
+study_sessions and session_activities for backfills and repairs.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import RealDictCursor
+
+COUNTERS = ("sessions", "study_minutes", "activities", "items_completed", "items_correct", "activity_points")
+
+# Bump the daily row and the all-time row in one round trip
+BUMP_SQL = """
+    WITH daily AS (
+        INSERT INTO study_rollups_daily (user_id, class_key, day, {columns})
+        VALUES (%(user_id)s, %(class_key)s, %(day)s, {values})
+        ON CONFLICT (user_id, class_key, day) DO UPDATE
+        SET {daily_updates}, updated_at = NOW()
+    )
+    INSERT INTO study_rollups_total (user_id, class_key, {columns})
+    VALUES (%(user_id)s, %(class_key)s, {values})
+    ON CONFLICT (user_id, class_key) DO UPDATE
+    SET {total_updates}, updated_at = NOW()
+""".format(
+    columns=", ".join(COUNTERS),
+    values=", ".join(f"%({c})s" for c in COUNTERS),
+    daily_updates=", ".join(f"{c} = study_rollups_daily.{c} + EXCLUDED.{c}" for c in COUNTERS),
+    total_updates=", ".join(f"{c} = study_rollups_total.{c} + EXCLUDED.{c}" for c in COUNTERS)
+)
+
+REBUILD_DAILY_SQL = """
+    INSERT INTO study_rollups_daily (user_id, class_key, day, {columns})
+    SELECT user_id, class_key, day,
+           SUM(sessions), SUM(study_minutes), SUM(activities),
+           SUM(items_completed), SUM(items_correct), SUM(activity_points)
+    FROM (
+        SELECT user_id, COALESCE(class_id, 0) AS class_key, start_time::date AS day,
+               1 AS sessions, COALESCE(duration_minutes, 0) AS study_minutes,
+               0 AS activities, 0 AS items_completed, 0 AS items_correct, 0 AS activity_points
+        FROM study_sessions
+        WHERE end_time IS NOT NULL {session_filter}
+        UNION ALL
+        SELECT s.user_id, COALESCE(s.class_id, 0), a.created_at::date,
+               0, 0, 1, COALESCE(a.items_completed, 0), COALESCE(a.items_correct, 0), COALESCE(a.points_earned, 0)
+        FROM session_activities a
+        JOIN study_sessions s ON a.session_id = s.id
+        WHERE TRUE {activity_filter}
+    ) events
+    GROUP BY user_id, class_key, day
+"""
+
+REBUILD_TOTAL_SQL = """
+    INSERT INTO study_rollups_total (user_id, class_key, {columns})
+    SELECT user_id, class_key, {sums}
+    FROM study_rollups_daily
+    WHERE TRUE {filter}
+    GROUP BY user_id, class_key
+"""
+
+
+class RollupService:
+    """Maintains and reads study analytics rollups"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    # ------------------------------------------------------------------
+    # Incremental updates (caller commits)
+    # ------------------------------------------------------------------
+
+    def _bump(self, cursor, user_id: int, class_id: Optional[int], day: date, **deltas: int):
+        params = {c: int(deltas.get(c) or 0) for c in COUNTERS}
+        params.update(user_id=user_id, class_key=class_id or 0, day=day)
+        cursor.execute(BUMP_SQL, params)
+
+    def record_session(self, cursor, user_id: int, class_id: Optional[int],
+                      day: date, duration_minutes: Optional[int]):
+        """Count an ended session on the day it started"""
+        self._bump(cursor, user_id, class_id, day, sessions=1, study_minutes=duration_minutes)
+
+    def record_activity(self, cursor, user_id: int, class_id: Optional[int], day: date,
+                       items_completed: Optional[int], items_correct: Optional[int],
+                       points_earned: Optional[int]):
+        """Count a logged activity on the day it was logged"""
+        self._bump(cursor, user_id, class_id, day, activities=1,
+                   items_completed=items_completed, items_correct=items_correct,
+                   activity_points=points_earned)
+
+    def record_activities(self, cursor, user_id: int, class_id: Optional[int],
+                         activities: List[Dict[str, Any]]):
+        """Count a batch of activities with one bump per day"""
+        days: Dict[date, Dict[str, int]] = {}
+        for activity in activities:
+            day = days.setdefault(activity['day'], {c: 0 for c in COUNTERS})
+            day['activities'] += 1
+            day['items_completed'] += activity['items_completed'] or 0
+            day['items_correct'] += activity['items_correct'] or 0
+            day['activity_points'] += activity['points_earned'] or 0
+
+        for day, deltas in sorted(days.items()):
+            self._bump(cursor, user_id, class_id, day, **deltas)
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        Recompute rollups from source tables (all users, or one) and commit
+
+        Rollup tables are locked against concurrent bumps for the duration,
+        so a session ending mid-rebuild is either in the rebuilt rows or
+        applied on top of them, never lost or double-counted.
+
+        Returns:
+            Number of daily rows written
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "LOCK TABLE study_rollups_daily, study_rollups_total IN SHARE ROW EXCLUSIVE MODE"
+            )
+
+            if user_id is None:
+                cursor.execute("DELETE FROM study_rollups_daily")
+                cursor.execute("DELETE FROM study_rollups_total")
+                session_filter = activity_filter = total_filter = ""
+                params: Dict[str, Any] = {}
+            else:
+                cursor.execute("DELETE FROM study_rollups_daily WHERE user_id = %(user_id)s", {"user_id": user_id})
+                cursor.execute("DELETE FROM study_rollups_total WHERE user_id = %(user_id)s", {"user_id": user_id})
+                session_filter = "AND user_id = %(user_id)s"
+                activity_filter = "AND s.user_id = %(user_id)s"
+                total_filter = "AND user_id = %(user_id)s"
+                params = {"user_id": user_id}
+
+            cursor.execute(REBUILD_DAILY_SQL.format(
+                columns=", ".join(COUNTERS),
+                session_filter=session_filter,
+                activity_filter=activity_filter
+            ), params)
+            rows = cursor.rowcount
+
+            cursor.execute(REBUILD_TOTAL_SQL.format(
+                columns=", ".join(COUNTERS),
+                sums=", ".join(f"SUM({c})" for c in COUNTERS),
+                filter=total_filter
+            ), params)
+
+            self.conn.commit()
+            return rows
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def totals(self, user_id: int, class_id: Optional[int] = None) -> Dict[str, Any]:
+        """All-time totals for a user, optionally for one class"""
+        cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            query = f"""
+                SELECT {", ".join(f"COALESCE(SUM({c}), 0) AS {c}" for c in COUNTERS)}
+                FROM study_rollups_total
+                WHERE user_id = %s
+            """
+            params: List[Any] = [user_id]
+            if class_id:
+                query += " AND class_key = %s"
+                params.append(class_id)
+
+            cursor.execute(query, params)
+            return self._with_averages(dict(cursor.fetchone()))
+        finally:
+            cursor.close()
+
+    def daily(self, user_id: int, class_id: Optional[int],
+             start_date: Optional[date], end_date: Optional[date]) -> Dict[str, Any]:
+        """Per-day breakdown (all classes combined) and totals over a date range"""
+        cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            query = f"""
+                SELECT day, {", ".join(f"SUM({c})::int AS {c}" for c in COUNTERS)}
+                FROM study_rollups_daily
+                WHERE user_id = %s
+            """
+            params: List[Any] = [user_id]
+            if class_id:
+                query += " AND class_key = %s"
+                params.append(class_id)
+            if start_date:
+                query += " AND day >= %s"
+                params.append(start_date)
+            if end_date:
+                query += " AND day <= %s"
+                params.append(end_date)
+            query += " GROUP BY day ORDER BY day"
+
+            cursor.execute(query, params)
+            days = [dict(row) for row in cursor.fetchall()]
+
+            summary = {c: sum(day[c] for day in days) for c in COUNTERS}
+            return {
+                "summary": self._with_averages(summary),
+                "daily_breakdown": [self._with_averages(day) for day in days]
+            }
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _with_averages(row: Dict[str, Any]) -> Dict[str, Any]:
+        row = {key: int(value) if key in COUNTERS else value for key, value in row.items()}
+        row["avg_session_minutes"] = row["study_minutes"] // row["sessions"] if row["sessions"] else None
+        row["accuracy_percentage"] = (
+            round(row["items_correct"] * 100 / row["items_completed"], 2) if row["items_completed"] else None
+        )
+        return row
@@ -2,17 +2,19 @@
 Session management business logic
 """
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime
+from psycopg2.extras import RealDictCursor, Json, execute_values
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
-import requests
+from lm_common.redis_client import stream_publish
 from ..config import settings
+from .rollup_service import RollupService
 
 class SessionService:
     """Service for managing study sessions"""
     
     def __init__(self, conn):
         self.conn = conn
+        self.rollups = RollupService(conn)
     
     def start_session(self, user_id: int, class_id: Optional[int], 
                      session_type: str, focus_mode: bool, 
@@ -57,7 +59,7 @@ class SessionService:
                     productivity_rating = %s,
                     notes = %s
                 WHERE id = %s AND user_id = %s AND end_time IS NULL
-                RETURNING id, duration_minutes
+                RETURNING id, duration_minutes, class_id, start_time::date AS day
             """, (mood_rating, productivity_rating, notes, session_id, user_id))
             
             result = cursor.fetchone()
@@ -68,12 +70,15 @@ class SessionService:
             duration = result['duration_minutes'] or 0
             points = int(duration * 0.5)
             
-            # Award points via gamification service
-            if points > 0:
-                self._award_points(user_id, points, "study_session", session_id)
+            # Rollups commit together with the session
+            self.rollups.record_session(cursor, user_id, result['class_id'], result['day'], duration)
             
             self.conn.commit()
             
+            # Award points via the gamification event stream (applied asynchronously)
+            if points > 0:
+                self._award_points(user_id, points, "study_session", session_id)
+            
             return {
                 "session_id": session_id,
                 "duration_minutes": duration,
@@ -97,11 +102,12 @@ class SessionService:
         try:
             # Verify session belongs to user and is active
             cursor.execute("""
-                SELECT id FROM study_sessions
+                SELECT id, class_id FROM study_sessions
                 WHERE id = %s AND user_id = %s AND end_time IS NULL
             """, (session_id, user_id))
             
-            if not cursor.fetchone():
+            session = cursor.fetchone()
+            if not session:
                 raise Exception("Session not found or already ended")
             
             # Calculate points for activity
@@ -116,11 +122,13 @@ class SessionService:
                  items_completed, items_correct, duration_minutes, 
                  points_earned, metadata, end_time)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                RETURNING id, accuracy_percentage, points_earned
+                RETURNING id, accuracy_percentage, points_earned, created_at::date AS day
             """, (session_id, activity_type, content_type, content_id,
                   items_completed, items_correct, duration_minutes, points, metadata))
             
             result = cursor.fetchone()
+            self.rollups.record_activity(cursor, user_id, session['class_id'], result['day'],
+                                         items_completed, items_correct, result['points_earned'])
             self.conn.commit()
             
             return {
@@ -135,6 +143,125 @@ class SessionService:
         finally:
             cursor.close()
     
+    def log_activities(self, session_id: int, user_id: int,
+                      activities: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Log many activities for a session in one transaction
+        
+        The session is checked once, valid items are inserted with one
+        multi-row INSERT, and every item gets its own result. Items carrying a
+        client_activity_id that was already uploaded are reported as
+        duplicates, so offline clients can safely retry. Uploads may target a
+        session that has since ended, as long as each activity's occurred_at
+        falls within it.
+        """
+        cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+        
+        try:
+            cursor.execute("""
+                SELECT id, class_id, start_time, end_time, LOCALTIMESTAMP AS now
+                FROM study_sessions
+                WHERE id = %s AND user_id = %s
+            """, (session_id, user_id))
+            
+            session = cursor.fetchone()
+            if not session:
+                raise Exception("Session not found")
+            
+            now = session['now']
+            latest = session['end_time'] or now
+            results = [None] * len(activities)
+            rows = []
+            seen_client_ids = set()
+            
+            for index, activity in enumerate(activities):
+                occurred_at = activity.get('occurred_at') or now
+                if occurred_at.tzinfo is not None:
+                    occurred_at = occurred_at.astimezone(timezone.utc).replace(tzinfo=None)
+                items_completed = activity.get('items_completed') or 0
+                items_correct = activity.get('items_correct')
+                client_id = activity.get('client_activity_id')
+                
+                error = None
+                if items_correct is not None and items_correct > items_completed:
+                    error = "items_correct cannot exceed items_completed"
+                elif occurred_at < session['start_time'] or occurred_at > latest:
+                    error = "occurred_at is outside the session"
+                elif client_id and client_id in seen_client_ids:
+                    error = "client_activity_id repeated within the batch"
+                
+                if error:
+                    results[index] = {"index": index, "status": "rejected", "error": error}
+                    continue
+                
+                if client_id:
+                    seen_client_ids.add(client_id)
+                
+                duration = activity.get('duration_minutes')
+                started_at = occurred_at - timedelta(minutes=duration) if duration else occurred_at
+                points = items_correct if items_correct and items_correct > 0 else 0  # 1 point per correct item
+                metadata = activity.get('metadata')
+                
+                rows.append((index, (
+                    session_id, activity['activity_type'], activity.get('content_type'),
+                    activity.get('content_id'), items_completed, items_correct, duration,
+                    points, Json(metadata) if metadata is not None else None,
+                    started_at, occurred_at, occurred_at, client_id
+                )))
+            
+            created = []
+            if rows:
+                # Reserve IDs up front so each returned row maps back to its item
+                cursor.execute(
+                    "SELECT nextval('session_activities_id_seq') AS id FROM generate_series(1, %s)",
+                    (len(rows),)
+                )
+                ids = [row['id'] for row in cursor.fetchall()]
+                
+                inserted = execute_values(cursor, """
+                    INSERT INTO session_activities
+                    (id, session_id, activity_type, content_type, content_id,
+                     items_completed, items_correct, duration_minutes,
+                     points_earned, metadata, start_time, end_time, created_at, client_activity_id)
+                    VALUES %s
+                    ON CONFLICT (session_id, client_activity_id) DO NOTHING
+                    RETURNING id, accuracy_percentage, points_earned, items_completed, items_correct,
+                              created_at::date AS day
+                """, [(activity_id,) + values for activity_id, (_, values) in zip(ids, rows)],
+                    page_size=len(rows), fetch=True)
+                by_id = {row['id']: row for row in inserted}
+                
+                for activity_id, (index, _) in zip(ids, rows):
+                    row = by_id.get(activity_id)
+                    if row is None:
+                        results[index] = {"index": index, "status": "duplicate"}
+                        continue
+                    created.append(row)
+                    results[index] = {
+                        "index": index,
+                        "status": "created",
+                        "activity_id": row['id'],
+                        "accuracy_percentage": float(row['accuracy_percentage']) if row['accuracy_percentage'] else None,
+                        "points_earned": row['points_earned']
+                    }
+                
+                self.rollups.record_activities(cursor, user_id, session['class_id'], created)
+            
+            self.conn.commit()
+            
+            return {
+                "session_id": session_id,
+                "created": len(created),
+                "duplicates": sum(1 for r in results if r['status'] == "duplicate"),
+                "rejected": sum(1 for r in results if r['status'] == "rejected"),
+                "results": results
+            }
+        except Exception as e:
+            self.conn.rollback()
+            raise Exception(f"Failed to log activities: {str(e)}")
+        finally:
+            cursor.close()
+    
     def list_sessions(self, user_id: int, class_id: Optional[int],
                      start_date: Optional[str], end_date: Optional[str],
                      limit: int) -> Dict[str, Any]:
@@ -169,49 +296,30 @@ class SessionService:
             cursor.execute(query, params)
             sessions = cursor.fetchall()
             
-            # Get total stats
-            stats_query = """
-                SELECT 
-                    COUNT(*) as total_count,
-                    COALESCE(SUM(duration_minutes), 0) as total_minutes,
-                    COALESCE(AVG(duration_minutes), 0) as avg_duration
-                FROM study_sessions
-                WHERE user_id = %s AND end_time IS NOT NULL
-            """
-            stats_params = [user_id]
-            
-            if class_id:
-                stats_query += " AND class_id = %s"
-                stats_params.append(class_id)
-            
-            cursor.execute(stats_query, stats_params)
-            stats = cursor.fetchone()
+            # Total stats come from the all-time rollup, not a scan of every session
+            stats = self.rollups.totals(user_id, class_id)
             
             return {
                 "sessions": sessions,
-                "total_count": stats['total_count'],
-                "total_minutes": int(stats['total_minutes']),
-                "avg_duration": int(stats['avg_duration']) if stats['avg_duration'] else None
+                "total_count": stats['sessions'],
+                "total_minutes": stats['study_minutes'],
+                "avg_duration": stats['avg_session_minutes']
             }
         finally:
             cursor.close()
     
     def _award_points(self, user_id: int, points: int, 
                      reason: str, reference_id: int):
-        """Award points via gamification service"""
+        """Publish a point award event for the gamification consumer"""
         try:
-            response = requests.post(
-                f"{settings.gamification_service_url}/api/gamification/points/award",
-                json={
-                    "user_id": user_id,
-                    "points": points,
-                    "reason": reason,
-                    "reference_type": "study_session",
-                    "reference_id": reference_id
-                },
-                timeout=5
-            )
-            response.raise_for_status()
+            # Keyed on the session, so a retried publish is applied once
+            stream_publish(settings.point_events_stream, {
+                "user_id": user_id,
+                "points": points,
+                "reason": reason,
+                "reference_type": "study_session",
+                "reference_id": reference_id
+            })
         except Exception as e:
             # Log error but don't fail the session end
             print(f"Warning: Failed to award points: {e}")
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Test Suite for Study Analytics Service
-Tests all 9 endpoints (4 sessions + 5 goals)
+Tests all 10 endpoints (5 sessions + 5 goals)
 """
 import requests
 import json
@@ -77,6 +77,46 @@ def test_log_activity(session_id):
         print_test("Log Activity", False, str(e))
         return False
 
+def test_log_activities_batch(session_id):
+    """Test batch activity upload: per-item results, rejections and idempotent re-upload"""
+    try:
+        data = {
+            "activities": [
+                {"activity_type": "flashcards", "items_completed": 20, "items_correct": 18,
+                 "duration_minutes": 10, "client_activity_id": "batch-1"},
+                {"activity_type": "testing", "items_completed": 5, "items_correct": 6},
+                {"activity_type": "reading", "client_activity_id": "batch-1"},
+                {"activity_type": "notes", "duration_minutes": 15}
+            ]
+        }
+        url = f"{BASE_URL}/api/analytics/sessions/{session_id}/activities/batch"
+        response = requests.post(url, json=data)
+        passed = response.status_code == 200
+        result = response.json() if passed else {}
+        statuses = [item["status"] for item in result.get("results", [])]
+        first = result.get("results", [{}])[0]
+        passed = (
+            passed
+            and statuses == ["created", "rejected", "rejected", "created"]
+            and [item["index"] for item in result["results"]] == [0, 1, 2, 3]
+            and result["created"] == 2 and result["rejected"] == 2
+            and first.get("activity_id") is not None
+            and first.get("accuracy_percentage") == 90.0
+            and first.get("points_earned") == 18
+        )
+        print_test("Log Activities Batch", passed, f"Statuses: {statuses}")
+        
+        # Re-uploading the same batch (e.g. after a dropped response) is safe
+        response = requests.post(url, json=data)
+        retry = response.json() if response.status_code == 200 else {}
+        retry_statuses = [item["status"] for item in retry.get("results", [])]
+        retry_passed = retry_statuses == ["duplicate", "rejected", "rejected", "created"]
+        print_test("Re-upload Activities Batch", retry_passed, f"Statuses: {retry_statuses}")
+        return passed and retry_passed
+    except Exception as e:
+        print_test("Log Activities Batch", False, str(e))
+        return False
+
 def test_end_session(session_id):
     """Test ending a study session"""
     try:
@@ -223,7 +263,7 @@ def main():
     results.append(test_health())
     print()
     
-    # Test 2-5: Session workflow
+    # Test 2-6: Session workflow
     print("Session Workflow Tests:")
     print("-" * 40)
     passed, session_id = test_start_session()
@@ -231,14 +271,15 @@ def main():
     
     if session_id:
         results.append(test_log_activity(session_id))
+        results.append(test_log_activities_batch(session_id))
         results.append(test_end_session(session_id))
     else:
-        results.extend([False, False])
+        results.extend([False, False, False])
     
     results.append(test_list_sessions())
     print()
     
-    # Test 6-10: Goal workflow
+    # Test 7-11: Goal workflow
     print("Goal Workflow Tests:")
     print("-" * 40)
     passed, goal_id = test_create_goal()
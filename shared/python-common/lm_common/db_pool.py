@@ -0,0 +1,285 @@
+"""
+Database Connection Pools
+Pooled raw PostgreSQL connections for services that use psycopg2 directly
+
+psycopg2.connect() costs a TCP and auth handshake on every call. get_connection()
+hands out a connection from a per-DSN ThreadedConnectionPool instead; calling
+close() on it returns it to the pool, so existing `conn.close()` code keeps
+working unchanged. get_async_pool() is the asyncpg equivalent for async code.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+from .database import DATABASE_URL
+
+
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))  # ping connections idle longer
+
+
+class PoolTimeoutError(psycopg2.OperationalError):
+    """No pooled connection became free within DB_POOL_TIMEOUT"""
+
+
+class ConnectionPool:
+    """Blocking, health-checked wrapper around psycopg2's ThreadedConnectionPool"""
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        timeout: float = POOL_TIMEOUT
+    ):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool = ThreadedConnectionPool(min_size, max_size, dsn)
+        # ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"checkouts": 0, "waits": 0, "timeouts": 0, "discarded": 0, "health_checks": 0}
+
+    def _count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def _healthy(self, conn) -> bool:
+        """Closed connections are dropped; long-idle ones are pinged first"""
+        if conn.closed:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < POOL_HEALTH_CHECK_INTERVAL:
+            return True  # fresh or recently used
+
+        self._count("health_checks")
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, cursor_factory=None) -> "PooledConnection":
+        """
+        Check out a connection (blocks up to `timeout` seconds when all are in use)
+
+        Args:
+            cursor_factory: Default cursor factory for this checkout (e.g. RealDictCursor)
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count("timeouts")
+                raise PoolTimeoutError(f"No database connection available within {self.timeout}s")
+
+        try:
+            conn = self._pool.getconn()
+            if not self._healthy(conn):
+                self._count("discarded")
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        conn.cursor_factory = cursor_factory
+        self._count("checkouts")
+        return PooledConnection(self, conn)
+
+    def putconn(self, conn):
+        """Return a connection, resetting any state the caller left behind"""
+        try:
+            discard = bool(conn.closed)
+            if not discard:
+                try:
+                    if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    if conn.autocommit:
+                        conn.autocommit = False
+                    conn.cursor_factory = None
+                except psycopg2.Error:
+                    discard = True
+
+            if discard:
+                self._count("discarded")
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn, close=discard)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and usage counters"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        in_use = len(self._pool._used)
+        return {
+            "max_size": self.max_size,
+            "open": in_use + len(self._pool._pool),
+            "in_use": in_use,
+            "idle": len(self._pool._pool),
+            **metrics
+        }
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+class PooledConnection:
+    """psycopg2 connection proxy whose close() returns the connection to its pool"""
+
+    def __init__(self, pool: ConnectionPool, conn):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        # Same semantics as psycopg2: a transaction block, not a close
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    @property
+    def closed(self) -> bool:
+        conn = object.__getattribute__(self, "_conn")
+        return conn is None or bool(conn.closed)
+
+    def close(self):
+        """Return the connection to the pool (idempotent)"""
+        conn = object.__getattribute__(self, "_conn")
+        if conn is not None:
+            object.__setattr__(self, "_conn", None)
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        # Safety net for code paths that never call close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dsn: Optional[str] = None) -> ConnectionPool:
+    """Get the process-wide pool for a DSN (created on first use)"""
+    dsn = dsn or DATABASE_URL
+
+    if dsn not in _pools:
+        with _pools_lock:
+            if dsn not in _pools:
+                _pools[dsn] = ConnectionPool(dsn)
+
+    return _pools[dsn]
+
+
+def get_connection(dsn: Optional[str] = None, cursor_factory=None) -> PooledConnection:
+    """
+    Drop-in replacement for psycopg2.connect(dsn)
+
+    Usage:
+        conn = get_connection(settings.DATABASE_URL)
+        try:
+            ...
+        finally:
+            conn.close()  # back to the pool
+    """
+    return get_pool(dsn).getconn(cursor_factory=cursor_factory)
+
+
+@contextmanager
+def pooled_connection(dsn: Optional[str] = None, cursor_factory=None) -> Generator[PooledConnection, None, None]:
+    """
+    Pooled connection as a context manager (returned to the pool on exit)
+
+    Usage:
+        with pooled_connection(settings.DATABASE_URL) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+    """
+    conn = get_connection(dsn, cursor_factory=cursor_factory)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every pool in this process, keyed by database host/name (no credentials)"""
+    stats = {}
+    for dsn, pool in list(_pools.items()):
+        params = extensions.parse_dsn(dsn)
+        stats[f"{params.get('host', 'localhost')}/{params.get('dbname', '')}"] = pool.stats()
+    for dsn, pool in list(_async_pools.items()):
+        params = extensions.parse_dsn(dsn)
+        stats[f"{params.get('host', 'localhost')}/{params.get('dbname', '')} (async)"] = {
+            "max_size": pool.get_max_size(),
+            "open": pool.get_size(),
+            "idle": pool.get_idle_size(),
+            "in_use": pool.get_size() - pool.get_idle_size()
+        }
+    return stats
+
+
+# Async (asyncpg) pools, keyed by DSN
+_async_pools: Dict[str, Any] = {}
+
+
+async def get_async_pool(dsn: Optional[str] = None):
+    """
+    Get the process-wide asyncpg pool for a DSN (requires the asyncpg package)
+
+    Usage:
+        pool = await get_async_pool(settings.DATABASE_URL)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT * FROM user_points WHERE user_id = $1", user_id)
+    """
+    try:
+        import asyncpg
+    except ImportError as e:
+        raise ImportError("get_async_pool requires asyncpg: pip install asyncpg") from e
+
+    dsn = dsn or DATABASE_URL
+
+    if dsn not in _async_pools:
+        _async_pools[dsn] = await asyncpg.create_pool(
+            dsn,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            timeout=POOL_TIMEOUT,
+            max_inactive_connection_lifetime=300
+        )
+
+    return _async_pools[dsn]
+
+
+async def close_async_pools():
+    """Close asyncpg pools on shutdown"""
+    for dsn in list(_async_pools):
+        await _async_pools.pop(dsn).close()
@@ -3,7 +3,7 @@ Redis Client Utilities
 Redis connection and operations for caching and job queues
 """
 import redis
-from typing import Optional, Any
+from typing import Optional, Any, List, Union
 import json
 import os
 
@@ -109,12 +109,12 @@ def queue_push(queue_name: str, item: Any) -> int:
     return client.rpush(queue_name, serialized)
 
 
-def queue_pop(queue_name: str, timeout: int = 0) -> Optional[Any]:
+def queue_pop(queue_name: Union[str, List[str]], timeout: int = 0) -> Optional[Any]:
     """
     Pop an item from a Redis queue (blocking)
     
     Args:
-        queue_name: Name of the queue
+        queue_name: Name of the queue, or a list of queues checked in order
         timeout: Timeout in seconds (0 = block indefinitely)
         
     Returns:
@@ -145,3 +145,23 @@ def queue_length(queue_name: str) -> int:
     """
     client = get_redis_client()
     return client.llen(queue_name)
+
+
+def stream_publish(stream_name: str, item: Any, maxlen: Optional[int] = None) -> str:
+    """
+    Append an event to a Redis stream
+    
+    Streams read through a consumer group should stay unbounded here and be
+    trimmed by their consumer: MAXLEN drops the oldest entries whether or not
+    the group has read them.
+    
+    Args:
+        stream_name: Name of the stream
+        item: Event payload (will be JSON serialized into the "data" field)
+        maxlen: Approximate cap on retained entries (None = unbounded)
+        
+    Returns:
+        Stream entry ID
+    """
+    client = get_redis_client()
+    return client.xadd(stream_name, {"data": json.dumps(item)}, maxlen=maxlen, approximate=True)
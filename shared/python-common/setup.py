@@ -36,6 +36,9 @@ setup(
         "redis>=5.0.1",
     ],
     extras_require={
+        "async": [
+            "asyncpg>=0.29.0",
+        ],
         "dev": [
             "pytest>=7.4.3",
             "pytest-cov>=4.1.0",